@@ -38,6 +38,7 @@ from app.schemas.device import (
 from app.services.auth import AuthService, get_current_device
 from app.services.otp import OTPService
 from app.services.email import EmailService
+from app.services.push_targets import device_push_target, replace_push_target
 from app.models.device import Device
 from app.config import settings
 
@@ -303,6 +304,8 @@ async def update_device(
     - **push_token**: Update APNs push notification token
     - **is_push_enabled**: Enable/disable push notifications
     """
+    old_target = device_push_target(device)
+
     if updates.push_token is not None:
         device.push_token = updates.push_token
 
@@ -311,5 +314,6 @@ async def update_device(
 
     await db.commit()
     await db.refresh(device)
+    await replace_push_target(db, device, old_target)
 
     return DeviceResponse.model_validate(device)
@@ -10,20 +10,29 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete as sa_delete
+from sqlalchemy import select, func, text, delete as sa_delete
 from sqlalchemy.orm import selectinload
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.database import get_db
 from app.schemas.feed import FeedSighting, FeedResponse, AllFeedsResponse
-from app.schemas.vote import VoteType, VoteCreate, VoteResponse, VoteResult
+from app.schemas.vote import (
+    VoteType,
+    VoteCreate,
+    VoteResponse,
+    VoteResult,
+    VoteBatchRequest,
+    SightingVotes,
+    VoteBatchResponse,
+)
 from app.models.taps_sighting import TapsSighting
 from app.models.parking_lot import ParkingLot
 from app.models.vote import Vote, VoteType as VoteTypeModel
 from app.models.device import Device
 from app.services.auth import get_current_device, require_verified_device
-from app.services.cache import cache_get, cache_set, cache_delete, TTL_VOTE_COUNTS
+from app.services.cache import cache_get_many, cache_set_many, cache_delete, TTL_VOTE_COUNTS
+from app.services.sighting_index import sighting_index
 
 router = APIRouter(prefix="/feed", tags=["Feed"])
 
@@ -40,31 +49,141 @@ def _insert_fn(db: AsyncSession):
     return sqlite_insert if dialect == "sqlite" else pg_insert
 
 
-async def _batch_build_feed_sightings(
+def _is_postgres(db: AsyncSession) -> bool:
+    try:
+        return db.get_bind().dialect.name == "postgresql"
+    except Exception:
+        return True
+
+
+# Existence check, toggle/update/insert and action classification in one
+# round trip. All CTEs see the same snapshot, so `existing` is the vote as it
+# was before this statement; DELETE and INSERT are mutually exclusive on it.
+# xmax = 0 on the RETURNING row means a fresh insert, otherwise ON CONFLICT
+# updated an existing row.
+_TOGGLE_VOTE_SQL = text("""
+    WITH target AS (
+        SELECT id FROM taps_sightings WHERE id = :sighting_id
+    ),
+    existing AS (
+        SELECT vote_type FROM votes
+        WHERE sighting_id = :sighting_id AND device_id = :device_id
+    ),
+    removed AS (
+        DELETE FROM votes
+        WHERE sighting_id = :sighting_id
+          AND device_id = :device_id
+          AND vote_type = CAST(:vote_type AS votetype)
+        RETURNING id
+    ),
+    upserted AS (
+        INSERT INTO votes (device_id, sighting_id, vote_type, created_at, updated_at)
+        SELECT :device_id, target.id, CAST(:vote_type AS votetype), now(), now()
+        FROM target
+        WHERE NOT EXISTS (
+            SELECT 1 FROM existing WHERE vote_type = CAST(:vote_type AS votetype)
+        )
+        ON CONFLICT (device_id, sighting_id)
+        DO UPDATE SET vote_type = EXCLUDED.vote_type, updated_at = now()
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM target) AS sighting_exists,
+        EXISTS (SELECT 1 FROM removed) AS was_removed,
+        (SELECT inserted FROM upserted) AS was_inserted
+""")
+
+
+async def _toggle_vote_pg(
     db: AsyncSession,
-    sightings: list,
+    sighting_id: int,
+    device_id: int,
+    vote_type: VoteTypeModel,
+) -> Optional[str]:
+    """
+    Apply a vote click in a single statement (PostgreSQL).
+
+    Returns:
+        "created", "updated" or "removed", or None if the sighting doesn't exist
+    """
+    row = (await db.execute(
+        _TOGGLE_VOTE_SQL,
+        # Enum columns store member names (UPVOTE/DOWNVOTE)
+        {"sighting_id": sighting_id, "device_id": device_id, "vote_type": vote_type.name},
+    )).one()
+    await db.commit()
+
+    if not row.sighting_exists:
+        return None
+    if row.was_removed:
+        return "removed"
+    return "created" if row.was_inserted else "updated"
+
+
+async def _toggle_vote_generic(
+    db: AsyncSession,
+    sighting_id: int,
+    device_id: int,
+    vote_type: VoteTypeModel,
+) -> Optional[str]:
+    """Multi-statement equivalent of _toggle_vote_pg for SQLite (tests)."""
+    sighting_result = await db.execute(select(TapsSighting.id).where(TapsSighting.id == sighting_id))
+    if sighting_result.scalar_one_or_none() is None:
+        return None
+
+    existing_vote_result = await db.execute(
+        select(Vote.vote_type).where(Vote.sighting_id == sighting_id, Vote.device_id == device_id)
+    )
+    existing_vote_type = existing_vote_result.scalar_one_or_none()
+
+    # Toggle: same vote type clicked again → remove
+    if existing_vote_type == vote_type:
+        # Core DELETE is concurrency-safe: 0-row result is not an error
+        await db.execute(
+            sa_delete(Vote).where(
+                Vote.device_id == device_id,
+                Vote.sighting_id == sighting_id,
+            )
+        )
+        await db.commit()
+        return "removed"
+
+    # New vote or changing vote type — upsert prevents UniqueViolationError and
+    # StaleDataError from concurrent requests hitting the same (device, sighting) pair.
+    stmt = (
+        _insert_fn(db)(Vote)
+        .values(device_id=device_id, sighting_id=sighting_id, vote_type=vote_type)
+        .on_conflict_do_update(
+            index_elements=["device_id", "sighting_id"],
+            set_={"vote_type": vote_type},
+        )
+    )
+    await db.execute(stmt)
+    await db.commit()
+    return "created" if existing_vote_type is None else "updated"
+
+
+async def _batch_vote_state(
+    db: AsyncSession,
+    sighting_ids: list[int],
     device: Device,
-    lot_by_id: dict,
-) -> list:
+) -> tuple[dict[int, dict], dict[int, VoteTypeModel]]:
     """
-    Build FeedSighting objects for a list of sightings using at most 2 DB
-    queries (batch vote counts + batch user votes) regardless of list length.
+    Load vote counts and the caller's own votes for a list of sightings using
+    at most 2 DB queries (batch vote counts + batch user votes).
 
     Vote counts are cached per sighting with a 30-second TTL and invalidated
     whenever a vote is cast or removed.
-    """
-    if not sightings:
-        return []
-
-    sighting_ids = [s.id for s in sightings]
-    now = datetime.now(timezone.utc)
 
+    Returns:
+        Tuple of ({sighting_id: {"up": n, "down": n}}, {sighting_id: vote_type})
+    """
     # ── 1. Vote counts — try cache first, batch-fetch misses ────────────────
     vote_data: dict[int, dict] = {}
     cache_misses: list[int] = []
 
-    for sid in sighting_ids:
-        cached = await cache_get(f"vote_counts:{sid}")
+    cached_counts = await cache_get_many([f"vote_counts:{sid}" for sid in sighting_ids])
+    for sid, cached in zip(sighting_ids, cached_counts):
         if cached is not None:
             vote_data[sid] = cached
         else:
@@ -84,8 +203,9 @@ async def _batch_build_feed_sightings(
                 vote_data[row.sighting_id]["down"] = row.n
 
         # Store freshly loaded counts in cache
-        for sid in cache_misses:
-            await cache_set(f"vote_counts:{sid}", vote_data[sid], TTL_VOTE_COUNTS)
+        await cache_set_many(
+            {f"vote_counts:{sid}": vote_data[sid] for sid in cache_misses}, TTL_VOTE_COUNTS
+        )
 
     # ── 2. User's own votes — always live (personal, low cost) ─────────────
     user_vote_rows = await db.execute(
@@ -94,7 +214,25 @@ async def _batch_build_feed_sightings(
     )
     user_votes: dict[int, VoteTypeModel] = {r.sighting_id: r.vote_type for r in user_vote_rows}
 
-    # ── 3. Assemble ─────────────────────────────────────────────────────────
+    return vote_data, user_votes
+
+
+async def _batch_build_feed_sightings(
+    db: AsyncSession,
+    sightings: list,
+    device: Device,
+    lot_by_id: dict,
+) -> list:
+    """
+    Build FeedSighting objects for a list of sightings using at most 2 DB
+    queries regardless of list length (see _batch_vote_state).
+    """
+    if not sightings:
+        return []
+
+    now = datetime.now(timezone.utc)
+    vote_data, user_votes = await _batch_vote_state(db, [s.id for s in sightings], device)
+
     result = []
     for sighting in sightings:
         lot = lot_by_id[sighting.parking_lot_id]
@@ -143,16 +281,18 @@ async def get_all_feeds(
     lots = lots_result.scalars().all()
     lot_by_id = {lot.id: lot for lot in lots}
 
-    # 1 query: all recent sightings across every lot
-    sightings_result = await db.execute(
-        select(TapsSighting)
-        .where(
-            TapsSighting.parking_lot_id.in_(lot_by_id.keys()),
-            TapsSighting.reported_at >= cutoff,
+    # Recent sightings across every lot — in-memory index, else 1 query
+    all_sightings = sighting_index.recent(cutoff, lot_by_id.keys())
+    if all_sightings is None:
+        sightings_result = await db.execute(
+            select(TapsSighting)
+            .where(
+                TapsSighting.parking_lot_id.in_(lot_by_id.keys()),
+                TapsSighting.reported_at >= cutoff,
+            )
+            .order_by(TapsSighting.reported_at.desc())
         )
-        .order_by(TapsSighting.reported_at.desc())
-    )
-    all_sightings = sightings_result.scalars().all()
+        all_sightings = sightings_result.scalars().all()
 
     # Group sightings by lot
     sightings_by_lot: dict[int, list] = {lot.id: [] for lot in lots}
@@ -203,12 +343,14 @@ async def get_lot_feed(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Parking lot {lot_id} not found")
 
     cutoff = datetime.now(timezone.utc) - timedelta(hours=FEED_WINDOW_HOURS)
-    sightings_result = await db.execute(
-        select(TapsSighting)
-        .where(TapsSighting.parking_lot_id == lot_id, TapsSighting.reported_at >= cutoff)
-        .order_by(TapsSighting.reported_at.desc())
-    )
-    sightings = sightings_result.scalars().all()
+    sightings = sighting_index.recent(cutoff, [lot_id])
+    if sightings is None:
+        sightings_result = await db.execute(
+            select(TapsSighting)
+            .where(TapsSighting.parking_lot_id == lot_id, TapsSighting.reported_at >= cutoff)
+            .order_by(TapsSighting.reported_at.desc())
+        )
+        sightings = sightings_result.scalars().all()
 
     feed_sightings = await _batch_build_feed_sightings(db, sightings, device, {lot.id: lot})
 
@@ -233,44 +375,17 @@ async def vote_on_sighting(
     device: Device = Depends(require_verified_device),
     db: AsyncSession = Depends(get_db)
 ):
-    sighting_result = await db.execute(select(TapsSighting).where(TapsSighting.id == sighting_id))
-    sighting = sighting_result.scalar_one_or_none()
-    if sighting is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Sighting {sighting_id} not found")
-
-    existing_vote_result = await db.execute(
-        select(Vote).where(Vote.sighting_id == sighting_id, Vote.device_id == device.id)
-    )
-    existing_vote = existing_vote_result.scalar_one_or_none()
     vote_type_model = VoteTypeModel(vote_data.vote_type.value)
 
-    # Toggle: same vote type clicked again → remove
-    if existing_vote is not None and existing_vote.vote_type == vote_type_model:
-        # Core DELETE is concurrency-safe: 0-row result is not an error
-        await db.execute(
-            sa_delete(Vote).where(
-                Vote.device_id == device.id,
-                Vote.sighting_id == sighting_id,
-            )
-        )
-        await db.commit()
-        action = "removed"
-        result_vote = None
+    if _is_postgres(db):
+        action = await _toggle_vote_pg(db, sighting_id, device.id, vote_type_model)
     else:
-        # New vote or changing vote type — upsert prevents UniqueViolationError and
-        # StaleDataError from concurrent requests hitting the same (device, sighting) pair.
-        stmt = (
-            _insert_fn(db)(Vote)
-            .values(device_id=device.id, sighting_id=sighting_id, vote_type=vote_type_model)
-            .on_conflict_do_update(
-                index_elements=["device_id", "sighting_id"],
-                set_={"vote_type": vote_type_model},
-            )
-        )
-        await db.execute(stmt)
-        await db.commit()
-        action = "created" if existing_vote is None else "updated"
-        result_vote = vote_data.vote_type
+        action = await _toggle_vote_generic(db, sighting_id, device.id, vote_type_model)
+
+    if action is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Sighting {sighting_id} not found")
+
+    result_vote = None if action == "removed" else vote_data.vote_type
 
     # Invalidate cached vote count for this sighting
     await cache_delete(f"vote_counts:{sighting_id}")
@@ -302,6 +417,48 @@ async def remove_vote(
     return {"success": True, "message": "Vote removed"}
 
 
+@router.post(
+    "/votes:batch",
+    response_model=VoteBatchResponse,
+    summary="Get vote state for many sightings",
+    description="Get vote counts and your own vote for a list of sightings in one request."
+)
+async def get_votes_batch(
+    request: VoteBatchRequest,
+    device: Device = Depends(get_current_device),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Batch version of GET /feed/sightings/{id}/votes.
+
+    Sighting IDs that don't exist are omitted from the response.
+
+    - **sighting_ids**: IDs of the sightings to look up (max 200)
+    """
+    requested = list(dict.fromkeys(request.sighting_ids))
+    existing_result = await db.execute(
+        select(TapsSighting.id).where(TapsSighting.id.in_(requested))
+    )
+    existing = set(existing_result.scalars().all())
+    sighting_ids = [sid for sid in requested if sid in existing]
+
+    if not sighting_ids:
+        return VoteBatchResponse(votes=[])
+
+    vote_data, user_votes = await _batch_vote_state(db, sighting_ids, device)
+
+    return VoteBatchResponse(votes=[
+        SightingVotes(
+            sighting_id=sid,
+            upvotes=vote_data[sid]["up"],
+            downvotes=vote_data[sid]["down"],
+            net_score=vote_data[sid]["up"] - vote_data[sid]["down"],
+            user_vote=VoteType(user_votes[sid].value) if sid in user_votes else None,
+        )
+        for sid in sighting_ids
+    ])
+
+
 @router.get(
     "/sightings/{sighting_id}/votes",
     summary="Get vote counts for sighting",
@@ -317,28 +474,9 @@ async def get_sighting_votes(
     if sighting is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Sighting {sighting_id} not found")
 
-    cached = await cache_get(f"vote_counts:{sighting_id}")
-    if cached:
-        upvotes, downvotes = cached["up"], cached["down"]
-    else:
-        upvote_result = await db.execute(
-            select(func.count()).select_from(Vote).where(
-                Vote.sighting_id == sighting_id, Vote.vote_type == VoteTypeModel.UPVOTE
-            )
-        )
-        downvote_result = await db.execute(
-            select(func.count()).select_from(Vote).where(
-                Vote.sighting_id == sighting_id, Vote.vote_type == VoteTypeModel.DOWNVOTE
-            )
-        )
-        upvotes = upvote_result.scalar() or 0
-        downvotes = downvote_result.scalar() or 0
-        await cache_set(f"vote_counts:{sighting_id}", {"up": upvotes, "down": downvotes}, TTL_VOTE_COUNTS)
-
-    user_vote_result = await db.execute(
-        select(Vote.vote_type).where(Vote.sighting_id == sighting_id, Vote.device_id == device.id)
-    )
-    user_vote_row = user_vote_result.scalar_one_or_none()
+    vote_data, user_votes = await _batch_vote_state(db, [sighting_id], device)
+    upvotes, downvotes = vote_data[sighting_id]["up"], vote_data[sighting_id]["down"]
+    user_vote_row = user_votes.get(sighting_id)
 
     return {
         "sighting_id": sighting_id,
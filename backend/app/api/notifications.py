@@ -4,7 +4,10 @@ Notifications API endpoints.
 Handles in-app notification polling and management.
 """
 
-from fastapi import APIRouter, Depends
+from contextlib import nullcontext
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
@@ -16,36 +19,59 @@ from app.schemas.notification import (
 from app.models.device import Device
 from app.services.auth import get_current_device
 from app.services.notification import NotificationService
+from app.services.notification_waiters import notification_waiters, wait_for_notification
+from app.services.pagination import encode_cursor
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+# Longest a long-poll may hold the request open
+MAX_WAIT_SECONDS = 25
+
+# Largest page GET /notifications will return
+MAX_PAGE_SIZE = 100
+
 
 @router.get(
     "",
     response_model=NotificationList,
     summary="Get notifications",
-    description="Get all notifications for the current device."
+    description=(
+        "Get all notifications for the current device, newest first. When more results exist, "
+        "the X-Next-Cursor response header holds the cursor for the next page."
+    ),
 )
 async def get_notifications(
-    limit: int = 100,
-    offset: int = 0,
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     device: Device = Depends(get_current_device),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get all notifications for this device.
 
-    Supports pagination with limit and offset.
+    Supports pagination with a cursor (preferred) or limit and offset.
 
-    - **limit**: Maximum number of notifications to return
-    - **offset**: Number of notifications to skip
+    - **limit**: Maximum number of notifications to return (max 100)
+    - **offset**: Number of notifications to skip (ignored with a cursor)
+    - **cursor**: X-Next-Cursor value from the previous page
     """
-    notifications, unread_count, total = await NotificationService.get_all_notifications(
-        db=db,
-        device=device,
-        limit=limit,
-        offset=offset,
-    )
+    try:
+        # Fetch one extra notification to learn whether there is a next page
+        notifications, unread_count, total = await NotificationService.get_all_notifications(
+            db=db,
+            device=device,
+            limit=limit + 1,
+            offset=offset,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(notifications[-1].created_at, notifications[-1].id)
 
     return NotificationList(
         notifications=[
@@ -74,6 +100,7 @@ async def get_notifications(
 )
 async def get_unread_notifications(
     limit: int = 50,
+    wait: int = Query(0, ge=0, le=MAX_WAIT_SECONDS),
     device: Device = Depends(get_current_device),
     db: AsyncSession = Depends(get_db)
 ):
@@ -82,12 +109,26 @@ async def get_unread_notifications(
 
     This endpoint is optimized for polling - call it periodically
     to check for new TAPS alerts or reminders.
+
+    - **wait**: Long-poll: if nothing is unread, hold the request up to this
+      many seconds and return as soon as a notification arrives
     """
-    notifications = await NotificationService.get_unread_notifications(
-        db=db,
-        device=device,
-        limit=limit,
-    )
+    # Register before the first check so a notification committed in between still wakes us
+    with notification_waiters.register(device.id) if wait else nullcontext() as arrived:
+        notifications = await NotificationService.get_unread_notifications(
+            db=db,
+            device=device,
+            limit=limit,
+        )
+        if not notifications and wait:
+            # Return the connection to the pool while parked
+            await db.commit()
+            if await wait_for_notification(arrived, timeout=wait):
+                notifications = await NotificationService.get_unread_notifications(
+                    db=db,
+                    device=device,
+                    limit=limit,
+                )
 
     return NotificationList(
         notifications=[
@@ -147,25 +188,7 @@ async def mark_all_notifications_read(
     """
     Mark all notifications as read for this device.
     """
-    # Get all unread notification IDs
-    notifications = await NotificationService.get_unread_notifications(
-        db=db,
-        device=device,
-        limit=1000,  # High limit to get all
-    )
-
-    if not notifications:
-        return {
-            "success": True,
-            "marked_count": 0,
-        }
-
-    notification_ids = [n.id for n in notifications]
-    marked_count = await NotificationService.mark_notifications_read(
-        db=db,
-        device=device,
-        notification_ids=notification_ids,
-    )
+    marked_count = await NotificationService.mark_all_notifications_read(db=db, device=device)
 
     return {
         "success": True,
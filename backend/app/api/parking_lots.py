@@ -20,6 +20,7 @@ from app.services.prediction import PredictionService
 from app.services.auth import get_current_device
 from app.models.device import Device
 from app.services.cache import cache_get, cache_set, TTL_LOTS_LIST, TTL_LOT_STATS
+from app.services.sighting_index import sighting_index
 
 router = APIRouter(prefix="/lots", tags=["Parking Lots"])
 
@@ -92,13 +93,15 @@ async def get_parking_lot(
 
     # Count recent sightings (last hour)
     one_hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
-    sightings_result = await db.execute(
-        select(func.count(TapsSighting.id)).where(
-            TapsSighting.parking_lot_id == lot_id,
-            TapsSighting.reported_at >= one_hour_ago,
+    recent_sightings = sighting_index.count(one_hour_ago, lot_id)
+    if recent_sightings is None:
+        sightings_result = await db.execute(
+            select(func.count(TapsSighting.id)).where(
+                TapsSighting.parking_lot_id == lot_id,
+                TapsSighting.reported_at >= one_hour_ago,
+            )
         )
-    )
-    recent_sightings = sightings_result.scalar() or 0
+        recent_sightings = sightings_result.scalar() or 0
 
     try:
         prediction = await PredictionService.predict(db, lot_id=lot_id)
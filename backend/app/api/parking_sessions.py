@@ -21,6 +21,8 @@ from app.models.parking_session import ParkingSession
 from app.models.parking_lot import ParkingLot
 from app.models.device import Device
 from app.services.auth import require_verified_device
+from app.services.push_targets import add_push_target, remove_push_target
+from app.services.reminder_queue import cancel_reminder, schedule_reminder
 
 router = APIRouter(prefix="/sessions", tags=["Parking Sessions"])
 
@@ -93,6 +95,8 @@ async def check_in(
     db.add(session)
     await db.commit()
     await db.refresh(session)
+    await add_push_target(lot.id, device)
+    await schedule_reminder(session)
 
     return ParkingSessionResponse.from_session(session, lot.name, lot.code)
 
@@ -133,6 +137,8 @@ async def check_out(
     checkout_time = datetime.now(timezone.utc)
     session.checked_out_at = checkout_time
     await db.commit()
+    await remove_push_target(session.parking_lot_id, device)
+    await cancel_reminder(session.id)
 
     return CheckoutResponse(
         success=True,
@@ -4,11 +4,11 @@ TAPS sightings API endpoints.
 Handles reporting TAPS sightings and listing recent sightings.
 """
 
-from typing import List
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,6 +16,7 @@ from sqlalchemy import select, text
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from app.config import settings
 from app.database import get_db
 from app.schemas.taps_sighting import (
     TapsSightingCreate,
@@ -27,14 +28,21 @@ from app.models.parking_lot import ParkingLot
 from app.models.device import Device
 from app.models.vote import Vote, VoteType as VoteTypeModel
 from app.services.auth import require_verified_device
-from app.services.notification import NotificationService
+from app.models.notification_job import NotificationJobType
+from app.services.outbox import enqueue_job, wake_outbox_workers
 from app.services.cache import cache_delete
+from app.services.pagination import after_cursor, encode_cursor
+from app.services.sighting_index import IndexedSighting, sighting_index, publish_sighting
 
 router = APIRouter(prefix="/sightings", tags=["TAPS Sightings"])
 
 # Any report at a lot within this window is treated as an upvote on the existing sighting
 RATE_LIMIT_MINUTES = 10
 
+# Bounds for sighting history queries; older raw rows are rolled up by the retention job
+MAX_HISTORY_HOURS = 24 * settings.sighting_retention_days
+MAX_PAGE_SIZE = 100
+
 _PACIFIC = ZoneInfo("America/Los_Angeles")
 
 
@@ -55,6 +63,133 @@ def _insert_fn(db: AsyncSession):
     return sqlite_insert if dialect == "sqlite" else pg_insert
 
 
+def _is_postgres(db: AsyncSession) -> bool:
+    try:
+        return db.get_bind().dialect.name == "postgresql"
+    except Exception:
+        return True
+
+
+# Single-statement dedupe for PostgreSQL. `recent` finds a sighting inside the
+# sliding window; if there is none, `inserted` creates one, otherwise `upvoted`
+# upserts the reporter's upvote on it. Reports racing past `recent` together
+# collide on the (parking_lot_id, dedupe_bucket) unique key, so exactly one
+# insert wins without any lock. now() is the transaction start time, so every
+# statement in the request sees the same bucket.
+_DEDUPE_BUCKET_SQL = "CAST(floor(extract(epoch FROM now()) / :bucket_seconds) AS integer)"
+
+_INSERT_OR_UPVOTE_SQL = text(f"""
+    WITH recent AS (
+        SELECT id, reported_at, notes
+        FROM taps_sightings
+        WHERE parking_lot_id = :lot_id AND reported_at >= :cutoff
+        ORDER BY reported_at DESC
+        LIMIT 1
+    ),
+    inserted AS (
+        INSERT INTO taps_sightings (parking_lot_id, reported_by_device_id, notes, reported_at, dedupe_bucket)
+        SELECT :lot_id, :device_id, :notes, now(), {_DEDUPE_BUCKET_SQL}
+        WHERE NOT EXISTS (SELECT 1 FROM recent)
+        ON CONFLICT (parking_lot_id, dedupe_bucket) DO NOTHING
+        RETURNING id, reported_at, notes
+    ),
+    upvoted AS (
+        INSERT INTO votes (device_id, sighting_id, vote_type)
+        SELECT :device_id, id, CAST(:upvote AS votetype) FROM recent
+        ON CONFLICT (device_id, sighting_id)
+        DO UPDATE SET vote_type = EXCLUDED.vote_type, updated_at = now()
+    )
+    SELECT id, reported_at, notes, true AS created FROM inserted
+    UNION ALL
+    SELECT id, reported_at, notes, false AS created FROM recent
+""")
+
+# Fallback when the insert lost the bucket race: the winner has committed by
+# the time ON CONFLICT DO NOTHING returns, so a fresh snapshot sees it.
+_BUCKET_WINNER_SQL = text(f"""
+    SELECT id, reported_at, notes
+    FROM taps_sightings
+    WHERE parking_lot_id = :lot_id AND dedupe_bucket = {_DEDUPE_BUCKET_SQL}
+""")
+
+
+async def _upvote_sighting(db: AsyncSession, device_id: int, sighting_id: int) -> None:
+    """Upsert an upvote on an existing sighting (idempotent for the same device)."""
+    stmt = (
+        _insert_fn(db)(Vote)
+        .values(device_id=device_id, sighting_id=sighting_id, vote_type=VoteTypeModel.UPVOTE)
+        .on_conflict_do_update(
+            index_elements=["device_id", "sighting_id"],
+            set_={"vote_type": VoteTypeModel.UPVOTE},
+        )
+    )
+    await db.execute(stmt)
+
+
+async def _insert_or_upvote_pg(
+    db: AsyncSession,
+    lot_id: int,
+    device_id: int,
+    notes: Optional[str],
+    cutoff: datetime,
+) -> Tuple[IndexedSighting, bool]:
+    """
+    Create a sighting or upvote the one already in the window, atomically.
+    Returns the sighting and whether it was created. Nothing is committed.
+    """
+    bucket_seconds = RATE_LIMIT_MINUTES * 60
+    result = await db.execute(_INSERT_OR_UPVOTE_SQL, {
+        "lot_id": lot_id,
+        "device_id": device_id,
+        "notes": notes,
+        "cutoff": cutoff,
+        "bucket_seconds": bucket_seconds,
+        "upvote": VoteTypeModel.UPVOTE.name,
+    })
+    row = result.first()
+    if row is not None:
+        return IndexedSighting(row.id, lot_id, row.reported_at, row.notes), row.created
+
+    # Lost the race for this bucket to a concurrent report
+    result = await db.execute(_BUCKET_WINNER_SQL, {"lot_id": lot_id, "bucket_seconds": bucket_seconds})
+    row = result.one()
+    await _upvote_sighting(db, device_id, row.id)
+    return IndexedSighting(row.id, lot_id, row.reported_at, row.notes), False
+
+
+async def _insert_or_upvote_generic(
+    db: AsyncSession,
+    lot_id: int,
+    device_id: int,
+    notes: Optional[str],
+    cutoff: datetime,
+) -> Tuple[TapsSighting, bool]:
+    """Select-then-insert fallback for SQLite (tests), which runs one writer at a time."""
+    result = await db.execute(
+        select(TapsSighting)
+        .where(
+            TapsSighting.parking_lot_id == lot_id,
+            TapsSighting.reported_at >= cutoff,
+        )
+        .order_by(TapsSighting.reported_at.desc())
+        .limit(1)
+    )
+    recent_sighting = result.scalar_one_or_none()
+    if recent_sighting is not None:
+        await _upvote_sighting(db, device_id, recent_sighting.id)
+        return recent_sighting, False
+
+    sighting = TapsSighting(
+        parking_lot_id=lot_id,
+        reported_by_device_id=device_id,
+        notes=notes,
+    )
+    db.add(sighting)
+    await db.flush()
+    await db.refresh(sighting)
+    return sighting, True
+
+
 @router.post(
     "",
     response_model=TapsSightingWithNotifications,
@@ -70,7 +205,6 @@ def _insert_fn(db: AsyncSession):
 )
 async def report_sighting(
     sighting_data: TapsSightingCreate,
-    background_tasks: BackgroundTasks,
     device: Device = Depends(require_verified_device),
     db: AsyncSession = Depends(get_db)
 ):
@@ -96,39 +230,28 @@ async def report_sighting(
             detail=f"Parking lot {sighting_data.parking_lot_id} not found"
         )
 
-    # Acquire a per-lot advisory lock (PostgreSQL) so concurrent reports for the
-    # same lot are serialized through the rate-limit check.  SQLite (used in tests)
-    # doesn't support advisory locks, so we swallow the error gracefully.
-    try:
-        await db.execute(text("SELECT pg_advisory_xact_lock(:lot_id)"), {"lot_id": lot.id})
-    except Exception:
-        pass
-
     # Soft rate limit: if there's already a sighting at this lot within the last
     # RATE_LIMIT_MINUTES, upvote it instead of creating a new sighting.
     rate_limit_cutoff = datetime.now(timezone.utc) - timedelta(minutes=RATE_LIMIT_MINUTES)
-    recent_result = await db.execute(
-        select(TapsSighting)
-        .where(
-            TapsSighting.parking_lot_id == lot.id,
-            TapsSighting.reported_at >= rate_limit_cutoff,
-        )
-        .order_by(TapsSighting.reported_at.desc())
-        .limit(1)
-    )
-    recent_sighting = recent_result.scalar_one_or_none()
+
+    # A hit in the in-memory index is authoritative (sightings are never
+    # removed inside the window). A miss may just mean another worker's insert
+    # hasn't been broadcast yet, so it is confirmed by the atomic insert below.
+    recent_sighting = sighting_index.latest(rate_limit_cutoff, lot_id=lot.id)
+    created = False
 
     if recent_sighting is not None:
-        # Upsert an upvote on the existing sighting (idempotent for the same device)
-        stmt = (
-            _insert_fn(db)(Vote)
-            .values(device_id=device.id, sighting_id=recent_sighting.id, vote_type=VoteTypeModel.UPVOTE)
-            .on_conflict_do_update(
-                index_elements=["device_id", "sighting_id"],
-                set_={"vote_type": VoteTypeModel.UPVOTE},
-            )
+        await _upvote_sighting(db, device.id, recent_sighting.id)
+    elif _is_postgres(db):
+        recent_sighting, created = await _insert_or_upvote_pg(
+            db, lot.id, device.id, sighting_data.notes, rate_limit_cutoff
         )
-        await db.execute(stmt)
+    else:
+        recent_sighting, created = await _insert_or_upvote_generic(
+            db, lot.id, device.id, sighting_data.notes, rate_limit_cutoff
+        )
+
+    if not created:
         await db.commit()
         await cache_delete(f"vote_counts:{recent_sighting.id}")
 
@@ -144,29 +267,29 @@ async def report_sighting(
         )
         return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(payload))
 
-    # Create sighting record
-    sighting = TapsSighting(
-        parking_lot_id=lot.id,
-        reported_by_device_id=device.id,
-        notes=sighting_data.notes,
-    )
-    db.add(sighting)
+    sighting = recent_sighting
+
+    # Queue the lot alert in the same transaction as the sighting; the outbox
+    # workers fan it out with their own sessions, off the request path.
+    # Skip on weekends: TAPS doesn't ticket Saturday/Sunday.
+    alert_queued = not _is_weekend()
+    if alert_queued:
+        enqueue_job(db, NotificationJobType.LOT_ALERT, {
+            "sighting_id": sighting.id,
+            "reported_at": sighting.reported_at.isoformat(),  # Origin for alert latency tracing
+            "parking_lot_id": lot.id,
+            "parking_lot_name": lot.name,
+            "parking_lot_code": lot.code,
+        })
+
     await db.commit()
-    await db.refresh(sighting)
+
+    if alert_queued:
+        wake_outbox_workers()
 
     # Bust caches — lot stats and prediction are now stale
     await cache_delete(f"lot_stats:{lot.id}", f"prediction:{lot.id}", "prediction:global")
-
-    # Fire notifications in the background — don't block the response.
-    # Skip on weekends: TAPS doesn't ticket Saturday/Sunday.
-    if not _is_weekend():
-        background_tasks.add_task(
-            NotificationService.notify_parked_users,
-            db=db,
-            parking_lot_id=lot.id,
-            parking_lot_name=lot.name,
-            parking_lot_code=lot.code,
-        )
+    await publish_sighting(sighting)
 
     return TapsSightingWithNotifications(
         id=sighting.id,
@@ -183,21 +306,27 @@ async def report_sighting(
     "",
     response_model=List[TapsSightingResponse],
     summary="List recent sightings",
-    description="Get recent TAPS sightings across all lots."
+    description=(
+        "Get recent TAPS sightings across all lots, newest first. When more results exist, "
+        "the X-Next-Cursor response header holds the cursor for the next page."
+    ),
 )
 async def list_sightings(
-    hours: int = 24,
+    response: Response,
+    hours: int = Query(24, ge=1, le=MAX_HISTORY_HOURS),
     lot_id: int = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     device: Device = Depends(require_verified_device),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get recent TAPS sightings.
 
-    - **hours**: How many hours back to look (default 24)
+    - **hours**: How many hours back to look (default 24, max the retention window)
     - **lot_id**: Optional filter by parking lot ID
-    - **limit**: Maximum number of sightings to return
+    - **limit**: Maximum number of sightings to return (max 100)
+    - **cursor**: X-Next-Cursor value from the previous page
     """
     # Calculate time cutoff
     cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
@@ -208,11 +337,22 @@ async def list_sightings(
     if lot_id is not None:
         query = query.where(TapsSighting.parking_lot_id == lot_id)
 
-    query = query.order_by(TapsSighting.reported_at.desc()).limit(limit)
+    if cursor is not None:
+        try:
+            query = query.where(after_cursor(TapsSighting.reported_at, TapsSighting.id, cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Fetch one extra row to learn whether there is a next page
+    query = query.order_by(TapsSighting.reported_at.desc(), TapsSighting.id.desc()).limit(limit + 1)
 
     result = await db.execute(query)
     sightings = result.scalars().all()
 
+    if len(sightings) > limit:
+        sightings = sightings[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(sightings[-1].reported_at, sightings[-1].id)
+
     # Get lot details
     lot_ids = {s.parking_lot_id for s in sightings}
     if lot_ids:
@@ -263,7 +403,7 @@ async def get_latest_sighting(
     result = await db.execute(
         select(TapsSighting)
         .where(TapsSighting.parking_lot_id == lot_id)
-        .order_by(TapsSighting.reported_at.desc())
+        .order_by(TapsSighting.reported_at.desc(), TapsSighting.id.desc())
         .limit(1)
     )
     sighting = result.scalar_one_or_none()
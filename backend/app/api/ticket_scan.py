@@ -14,10 +14,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models.device import Device
+from app.models.notification_job import NotificationJobType
 from app.models.taps_sighting import TapsSighting
 from app.schemas.ticket_scan import TicketScanResponse
 from app.services.auth import require_verified_device
-from app.services.notification import NotificationService
+from app.services.cache import cache_delete
+from app.services.outbox import enqueue_job, wake_outbox_workers
+from app.services.sighting_index import publish_sighting
 from app.services.ticket_ocr import TicketOCRService, ImageTooLargeError, CorruptImageError
 from app.api.auth import limiter
 
@@ -181,18 +184,28 @@ async def scan_ticket(
         notes=f"Ticket scan: {ticket_location}",
     )
     db.add(sighting)
+    await db.flush()
+
+    # Queue the lot alert for a recent ticket in the same transaction as the
+    # sighting; the outbox workers fan it out off the request path
+    if is_recent:
+        enqueue_job(db, NotificationJobType.LOT_ALERT, {
+            "sighting_id": sighting.id,
+            "reported_at": sighting.reported_at.isoformat(),  # Origin for alert latency tracing
+            "parking_lot_id": lot.id,
+            "parking_lot_name": lot.name,
+            "parking_lot_code": lot.code,
+        })
+
     await db.commit()
     await db.refresh(sighting)
 
-    # Notify if recent
-    users_notified = 0
     if is_recent:
-        users_notified = await NotificationService.notify_parked_users(
-            db=db,
-            parking_lot_id=lot.id,
-            parking_lot_name=lot.name,
-            parking_lot_code=lot.code,
-        )
+        wake_outbox_workers()
+
+    # Bust caches — lot stats and prediction are now stale
+    await cache_delete(f"lot_stats:{lot.id}", f"prediction:{lot.id}", "prediction:global")
+    await publish_sighting(sighting)
 
     return TicketScanResponse(
         success=True,
@@ -204,5 +217,5 @@ async def scan_ticket(
         mapped_lot_code=lot.code,
         is_recent=is_recent,
         sighting_id=sighting.id,
-        users_notified=users_notified,
+        users_notified=0,
     )
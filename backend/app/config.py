@@ -9,7 +9,7 @@ from pydantic_settings import BaseSettings
 from typing import Optional
 
 GCP_PROJECT = "tapout-485821"
-SECRET_NAMES = ["DATABASE_URL", "DATABASE_URL_SYNC", "SECRET_KEY", "FIREBASE_CREDENTIALS_JSON", "RESEND_API_KEY", "ANTHROPIC_API_KEY", "APNS_KEY_ID", "APNS_TEAM_ID", "APNS_KEY_CONTENT", "APNS_BUNDLE_ID", "ADMIN_BYPASS_EMAIL", "ADMIN_BYPASS_OTP"]
+SECRET_NAMES = ["DATABASE_URL", "DATABASE_URL_SYNC", "SECRET_KEY", "FIREBASE_CREDENTIALS_JSON", "RESEND_API_KEY", "ANTHROPIC_API_KEY", "APNS_KEY_ID", "APNS_TEAM_ID", "APNS_KEY_CONTENT", "APNS_BUNDLE_ID", "ADMIN_BYPASS_EMAIL", "ADMIN_BYPASS_OTP", "METRICS_TOKEN"]
 
 
 def _load_secrets_from_gcp():
@@ -67,6 +67,9 @@ class Settings(BaseSettings):
     admin_bypass_email: Optional[str] = None
     admin_bypass_otp: Optional[str] = None
 
+    # Bearer token for internal endpoints (GET /metrics); unset hides them
+    metrics_token: Optional[str] = None
+
     # SMTP settings for OTP emails
     resend_api_key: str = ""
 
@@ -91,9 +94,35 @@ class Settings(BaseSettings):
     # Reminder settings
     parking_reminder_hours: int = 3  # Hours before sending checkout reminder
 
+    # Push delivery
+    fcm_executor_workers: int = 4  # Threads for blocking firebase_admin calls (alert lane)
+    fcm_reminder_executor_workers: int = 1  # Threads for reminder-lane FCM calls
+    apns_max_connections: int = 4  # HTTP/2 connections in the APNs client pool
+    apns_max_concurrent_sends: int = 200  # In-flight push sends per process, both lanes
+    push_reminder_max_concurrent_sends: int = 20  # Reminder-lane share of that cap
+    apns_send_timeout_seconds: float = 10.0
+    alert_suppression_minutes: int = 30  # Repeat alerts for the same lot skip a device this long
+
     # Polling settings
     notification_poll_interval_seconds: int = 30
 
+    # Notification outbox workers
+    outbox_worker_concurrency: int = 2  # In-process workers; 0 when a dedicated worker process runs the outbox
+    outbox_worker_process_concurrency: int = 8  # Workers in `python -m app.services.outbox`
+    outbox_poll_interval_seconds: float = 2.0
+    outbox_max_attempts: int = 5
+
+    # Scheduled jobs (one process cluster-wide runs each tick)
+    scheduler_lease_seconds: int = 60  # Renewed every third of this while a job runs
+    scheduler_slow_job_seconds: float = 60.0  # /health flags a job run taking longer (nightly jobs: 30 min)
+    reminder_queue_poll_seconds: float = 5.0  # How often each process pops due reminders (needs Redis)
+
+    # Data retention
+    sighting_retention_days: int = 90  # Older sightings/votes are rolled up hourly and deleted
+    notification_retention_days: int = 30  # Older read notifications and all older broadcasts are deleted
+    retention_batch_size: int = 5000
+    auto_checkout_batch_size: int = 1000  # Sessions closed per transaction by the nightly auto-checkout
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -3,6 +3,7 @@ Database connection and session management.
 Uses SQLAlchemy async engine for non-blocking database operations.
 """
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
@@ -43,6 +44,42 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+# Idempotent DDL for tables that already exist in production. create_all only
+# creates missing tables, so columns and indexes added to existing models
+# must also be listed here. PostgreSQL only.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE taps_sightings ADD COLUMN IF NOT EXISTS dedupe_bucket INTEGER",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_taps_sightings_lot_dedupe_bucket "
+    "ON taps_sightings (parking_lot_id, dedupe_bucket)",
+    "CREATE INDEX IF NOT EXISTS ix_taps_sightings_lot_reported_at "
+    "ON taps_sightings (parking_lot_id, reported_at DESC, id DESC)",
+    "ALTER TABLE devices ADD COLUMN IF NOT EXISTS push_platform VARCHAR(10)",
+    "UPDATE devices SET push_platform = CASE WHEN push_token ~ '^[0-9a-fA-F]{64}$' "
+    "THEN 'apns' ELSE 'fcm' END WHERE push_token IS NOT NULL AND push_platform IS NULL",
+    "ALTER TABLE devices ADD COLUMN IF NOT EXISTS broadcast_read_cursor INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE devices ADD COLUMN IF NOT EXISTS broadcast_read_cursor_at TIMESTAMP WITH TIME ZONE",
+    # Existing devices start NULL (uncounted) and are counted on first listing or nightly
+    "ALTER TABLE devices ADD COLUMN IF NOT EXISTS notification_count INTEGER",
+    "ALTER TABLE devices ADD COLUMN IF NOT EXISTS unread_notification_count INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_notifications_device_read_created "
+    "ON notifications (device_id, read_at, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_notifications_device_created_id "
+    "ON notifications (device_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_parking_sessions_active_device "
+    "ON parking_sessions (device_id) WHERE checked_out_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_parking_sessions_active_lot "
+    "ON parking_sessions (parking_lot_id) WHERE checked_out_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_parking_sessions_reminder_due "
+    "ON parking_sessions (checked_in_at) WHERE checked_out_at IS NULL AND reminder_sent = false",
+    "ALTER TABLE broadcast_notifications ADD COLUMN IF NOT EXISTS job_id INTEGER",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_broadcast_notifications_job_id "
+    "ON broadcast_notifications (job_id)",
+    "CREATE INDEX IF NOT EXISTS ix_notification_jobs_completed_at "
+    "ON notification_jobs (completed_at)",
+    "ALTER TABLE scheduler_leases ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP WITH TIME ZONE",
+]
+
+
 async def init_db():
     """
     Initialize the database by creating all tables.
@@ -50,6 +87,9 @@ async def init_db():
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
 
 
 async def close_db():
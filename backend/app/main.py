@@ -4,11 +4,12 @@ WarnABrotha API - Main application entry point.
 A parking enforcement tracking app for UC Davis students.
 """
 
-import json
 import logging
+import os
 from contextlib import asynccontextmanager
+from datetime import timedelta
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy import select
@@ -26,11 +27,32 @@ from app.api import (
     ticket_scan_router,
 )
 from app.services.reminder import run_reminder_job, ReminderService
+from app.services.reminder_queue import start_reminder_queue, stop_reminder_queue
+from app.services.notification import init_firebase, NotificationService
+from app.services.outbox import start_outbox_workers, stop_outbox_workers
+from app.services.retention import RetentionService
+from app.services.auth import require_metrics_token
+from app.services.metrics import metrics_snapshot
+from app.services.job_metrics import (
+    SCHEDULER_EVENTS,
+    job_run,
+    jobs_health,
+    record_error,
+    record_rows,
+    scheduler_listener,
+)
+from app.services.scheduler_lease import run_exclusive, unfinished_jobs
 from apscheduler.triggers.cron import CronTrigger
 from app.models.parking_lot import ParkingLot
 from app.database import Base
 from app.api.auth import limiter
-from app.services.cache import init_cache, close_cache
+from app.services.cache import init_cache, close_cache, cache_available
+from app.services.sighting_index import (
+    resync_sighting_index,
+    start_sighting_index,
+    stop_sighting_index,
+)
+from app.services.notification_waiters import start_notification_listener, stop_notification_listener
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
@@ -101,16 +123,93 @@ async def seed_initial_data():
         await db.commit()
 
 
+# Minimum spacing between runs of a job across the cluster. Each process's
+# scheduler fires every tick; the first to acquire the lease runs it.
+REMINDER_MIN_INTERVAL = timedelta(minutes=4)
+NIGHTLY_MIN_INTERVAL = timedelta(hours=12)
+
+# Nightly jobs work through whole tables; /health flags them as slow after this
+NIGHTLY_SLOW_AFTER = 30 * 60
+
+
 async def run_scheduled_reminder_job():
-    """Wrapper to run the reminder job with a database session."""
-    async with AsyncSessionLocal() as db:
-        await run_reminder_job(db)
+    """Run the reminder job on one process cluster-wide."""
+    await run_exclusive(AsyncSessionLocal, "checkout_reminder", run_reminder_job, REMINDER_MIN_INTERVAL)
 
 
 async def run_auto_checkout_job():
-    """Wrapper to run the nightly auto-checkout job with a database session."""
-    async with AsyncSessionLocal() as db:
-        await ReminderService.auto_checkout_expired_sessions(db)
+    """Run the nightly auto-checkout job on one process cluster-wide."""
+    await run_exclusive(
+        AsyncSessionLocal, "auto_checkout",
+        ReminderService.auto_checkout_expired_sessions, NIGHTLY_MIN_INTERVAL, NIGHTLY_SLOW_AFTER,
+    )
+
+
+async def run_retention_job():
+    """Run the nightly sighting rollup/retention job on one process cluster-wide."""
+    await run_exclusive(
+        AsyncSessionLocal, "sighting_retention",
+        RetentionService.archive_old_sightings, NIGHTLY_MIN_INTERVAL, NIGHTLY_SLOW_AFTER,
+    )
+
+
+async def run_notification_retention_job():
+    """Run the nightly notification retention job on one process cluster-wide."""
+    await run_exclusive(
+        AsyncSessionLocal, "notification_retention",
+        RetentionService.prune_old_notifications, NIGHTLY_MIN_INTERVAL, NIGHTLY_SLOW_AFTER,
+    )
+
+
+async def run_notification_count_job():
+    """Run the nightly notification counter reconciliation on one process cluster-wide."""
+    await run_exclusive(
+        AsyncSessionLocal, "notification_count_reconcile",
+        NotificationService.reconcile_notification_counts, NIGHTLY_MIN_INTERVAL, NIGHTLY_SLOW_AFTER,
+    )
+
+
+async def run_sighting_index_resync():
+    """Reload sightings this process's index missed (runs on every process)."""
+    async with job_run("sighting_index_resync"):
+        try:
+            async with AsyncSessionLocal() as db:
+                record_rows(processed=await resync_sighting_index(db))
+        except Exception as e:
+            logger.error(f"Sighting index resync failed: {e}")
+            record_error(e)
+
+
+# Nightly jobs tick once a day. If the process running one dies, another
+# process finishes the run within this window instead of skipping a day.
+NIGHTLY_RESUME_WINDOW = timedelta(hours=2)
+
+NIGHTLY_JOBS = {
+    "auto_checkout": ReminderService.auto_checkout_expired_sessions,
+    "sighting_retention": RetentionService.archive_old_sightings,
+    "notification_retention": RetentionService.prune_old_notifications,
+    "notification_count_reconcile": NotificationService.reconcile_notification_counts,
+}
+
+
+async def resume_nightly_jobs():
+    """Take over nightly runs whose holder died before completing them."""
+    # Only the check is timed here; a resumed run reports under its own job id
+    async with job_run("resume_nightly_jobs"):
+        try:
+            async with AsyncSessionLocal() as db:
+                job_ids = await unfinished_jobs(db, list(NIGHTLY_JOBS), NIGHTLY_RESUME_WINDOW)
+        except Exception as e:
+            logger.error(f"Could not check for unfinished nightly jobs: {e}")
+            record_error(e)
+            return
+        record_rows(scanned=len(NIGHTLY_JOBS), processed=len(job_ids))
+    for job_id in job_ids:
+        logger.warning(f"Resuming nightly job {job_id}: its last run never completed")
+        await run_exclusive(
+            AsyncSessionLocal, job_id, NIGHTLY_JOBS[job_id], NIGHTLY_MIN_INTERVAL, NIGHTLY_SLOW_AFTER,
+            resume_within=NIGHTLY_RESUME_WINDOW,
+        )
 
 
 @asynccontextmanager
@@ -123,26 +222,7 @@ async def lifespan(app: FastAPI):
     logger.info("Starting WarnABrotha API...")
 
     # Initialize Firebase Admin SDK for FCM
-    if settings.firebase_credentials_json:
-        try:
-            import firebase_admin
-            from firebase_admin import credentials
-
-            cred_value = settings.firebase_credentials_json
-            if cred_value.strip().startswith("{"):
-                # JSON string (e.g., from env var in app.yaml)
-                cred = credentials.Certificate(json.loads(cred_value))
-            else:
-                # File path (e.g., for local development)
-                cred = credentials.Certificate(cred_value)
-            firebase_admin.initialize_app(cred)
-            logger.info("Firebase Admin SDK initialized")
-        except Exception as e:
-            logger.error(f"Failed to initialize Firebase Admin SDK: {e}")
-    else:
-        logger.warning(
-            "Firebase credentials not configured, FCM push notifications disabled"
-        )
+    init_firebase()
 
     # Initialize Redis cache (GCP MemoryStore)
     if settings.redis_host:
@@ -157,12 +237,20 @@ async def lifespan(app: FastAPI):
     # Seed initial data
     await seed_initial_data()
 
-    # Start background scheduler for reminders
-    # Run every 5 minutes to check for sessions needing reminders
+    # Load the in-memory recent-sighting index (needs Redis for cross-worker updates)
+    async with AsyncSessionLocal() as db:
+        await start_sighting_index(db)
+
+    # Wake long-polling /notifications/unread requests when other workers notify
+    await start_notification_listener()
+
+    # Checkout reminders: queued at check-in and sent on time when Redis is available,
+    # with an hourly scan as backstop; otherwise scan every 5 minutes
+    await start_reminder_queue(AsyncSessionLocal)
     scheduler.add_job(
         run_scheduled_reminder_job,
         "interval",
-        minutes=5,
+        minutes=60 if cache_available() else 5,
         id="checkout_reminder",
         replace_existing=True,
     )
@@ -172,14 +260,56 @@ async def lifespan(app: FastAPI):
         id="auto_checkout",
         replace_existing=True,
     )
+    scheduler.add_job(
+        run_retention_job,
+        CronTrigger(hour=3, minute=30, timezone="America/Los_Angeles"),
+        id="sighting_retention",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        run_notification_retention_job,
+        CronTrigger(hour=3, minute=45, timezone="America/Los_Angeles"),
+        id="notification_retention",
+        replace_existing=True,
+    )
+    # After notification retention, so deleted broadcasts are reflected in the counters
+    scheduler.add_job(
+        run_notification_count_job,
+        CronTrigger(hour=4, minute=0, timezone="America/Los_Angeles"),
+        id="notification_count_reconcile",
+        replace_existing=True,
+    )
+    # Each process holds its own sighting index, so this isn't run_exclusive
+    scheduler.add_job(
+        run_sighting_index_resync,
+        "interval",
+        minutes=5,
+        id="sighting_index_resync",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        resume_nightly_jobs,
+        "interval",
+        minutes=5,
+        id="resume_nightly_jobs",
+        replace_existing=True,
+    )
+    scheduler.add_listener(scheduler_listener, SCHEDULER_EVENTS)
     scheduler.start()
     logger.info("Background scheduler started")
 
+    # Start notification outbox workers
+    start_outbox_workers(AsyncSessionLocal, settings.outbox_worker_concurrency)
+
     yield
 
     # Shutdown
     logger.info("Shutting down WarnABrotha API...")
     scheduler.shutdown()
+    await stop_outbox_workers()
+    await stop_reminder_queue()
+    await stop_sighting_index()
+    await stop_notification_listener()
     await close_cache()
     await close_db()
     logger.info("Shutdown complete")
@@ -220,6 +350,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API routers
@@ -246,8 +377,23 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Detailed health check endpoint."""
+    jobs = jobs_health()
     return {
         "status": "healthy",
         "database": "connected",
         "scheduler": "running" if scheduler.running else "stopped",
+        "slow_jobs": [job_id for job_id, job in jobs.items() if job["slow"]],
+        "jobs": jobs,
     }
+
+
+@app.get(
+    "/metrics", tags=["Health"], include_in_schema=False, dependencies=[Depends(require_metrics_token)],
+)
+async def metrics():
+    """
+    Latency metrics and counters (push delivery, scheduler jobs, etc.) for
+    the worker process answering the request only; every worker keeps its
+    own, so scrape each one. Internal: requires METRICS_TOKEN.
+    """
+    return {"scope": "process", "pid": os.getpid(), **metrics_snapshot()}
@@ -4,20 +4,32 @@ All models inherit from Base for unified table management.
 """
 
 from app.models.parking_lot import ParkingLot
-from app.models.device import Device
+from app.models.device import Device, PushPlatform
 from app.models.parking_session import ParkingSession
 from app.models.taps_sighting import TapsSighting
 from app.models.notification import Notification
+from app.models.broadcast_notification import BroadcastNotification, BroadcastRead
 from app.models.vote import Vote, VoteType
 from app.models.email_otp import EmailOTP
+from app.models.sighting_rollup import SightingHourlyRollup
+from app.models.notification_job import NotificationJob, NotificationJobType, NotificationJobStatus
+from app.models.scheduler_lease import SchedulerLease
 
 __all__ = [
     "ParkingLot",
     "Device",
+    "PushPlatform",
     "ParkingSession",
     "TapsSighting",
     "Notification",
+    "BroadcastNotification",
+    "BroadcastRead",
     "Vote",
     "VoteType",
     "EmailOTP",
+    "SightingHourlyRollup",
+    "NotificationJob",
+    "NotificationJobType",
+    "NotificationJobStatus",
+    "SchedulerLease",
 ]
@@ -0,0 +1,93 @@
+"""
+Broadcast notifications — one row per lot-wide alert, read by every device
+that was parked at the lot when it was sent.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Enum, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+from app.models.notification import Notification, NotificationType
+
+
+class BroadcastNotification(Base):
+    """
+    A lot-wide alert, stored once instead of once per parked device.
+
+    Recipients are not stored: a device received the broadcast if one of its
+    parking sessions at the lot was active at created_at. Sessions are never
+    reopened, so that membership is a fixed snapshot. Read state lives in
+    Device.broadcast_read_cursor (everything up to an id, set by read-all)
+    and BroadcastRead (individually read broadcasts).
+
+    Attributes:
+        id: Primary key
+        notification_type: Type of notification (TAPS_SPOTTED)
+        title: Notification title
+        message: Notification body text
+        parking_lot_id: FK to the lot the alert is for
+        job_id: Outbox job that sent the alert, so a retried job doesn't send it twice
+        created_at: When the alert was sent; decides who received it
+    """
+
+    __tablename__ = "broadcast_notifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+    notification_type = Column(
+        Enum(NotificationType, name="notification_type", values_callable=lambda x: [e.value for e in x]),
+        nullable=False
+    )
+    title = Column(String(255), nullable=False)
+    message = Column(String(1000), nullable=False)
+    parking_lot_id = Column(Integer, ForeignKey("parking_lots.id"), nullable=False)
+    job_id = Column(Integer, nullable=True)  # No FK: completed jobs are pruned first
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_broadcast_notifications_lot_created_at", "parking_lot_id", "created_at"),
+        Index("uq_broadcast_notifications_job_id", "job_id", unique=True),
+    )
+
+    def as_notification(self, device_id: int, read_at: Optional[datetime]) -> Notification:
+        """
+        A transient (never added to a session) Notification view of this
+        broadcast for one device. Broadcasts use negative ids in the API so
+        they can't collide with personal notification ids.
+        """
+        return Notification(
+            id=-self.id,
+            device_id=device_id,
+            notification_type=self.notification_type,
+            title=self.title,
+            message=self.message,
+            parking_lot_id=self.parking_lot_id,
+            created_at=self.created_at,
+            read_at=read_at,
+        )
+
+    def __repr__(self):
+        return f"<BroadcastNotification(id={self.id}, type={self.notification_type}, lot_id={self.parking_lot_id})>"
+
+
+class BroadcastRead(Base):
+    """
+    A device marking one broadcast read individually (read-all moves the
+    device's cursor instead).
+
+    Attributes:
+        device_id: FK to the device
+        broadcast_id: FK to the broadcast
+        read_at: When it was marked read
+    """
+
+    __tablename__ = "broadcast_reads"
+
+    device_id = Column(Integer, ForeignKey("devices.id"), primary_key=True)
+    broadcast_id = Column(Integer, ForeignKey("broadcast_notifications.id"), primary_key=True)
+    read_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<BroadcastRead(device_id={self.device_id}, broadcast_id={self.broadcast_id})>"
@@ -3,13 +3,38 @@ Device model representing registered user devices.
 Stores minimal information - just enough to send notifications.
 """
 
+from typing import Optional
+
 from sqlalchemy import Column, Integer, String, DateTime, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
+import enum
 
 from app.database import Base
 
 
+class PushPlatform(str, enum.Enum):
+    """Push provider a token belongs to."""
+    APNS = "apns"  # iOS
+    FCM = "fcm"    # Android
+
+
+def detect_push_platform(token: str) -> PushPlatform:
+    """
+    Infer the provider from the token format.
+
+    APNs tokens are exactly 64 hex characters; FCM tokens are longer and
+    contain colons/alphanumeric characters.
+    """
+    if len(token) == 64:
+        try:
+            int(token, 16)
+            return PushPlatform.APNS
+        except ValueError:
+            pass
+    return PushPlatform.FCM
+
+
 class Device(Base):
     """
     Represents a registered device that can receive notifications.
@@ -23,7 +48,12 @@ class Device(Base):
         id: Primary key
         device_id: Unique device identifier (UUID from iOS)
         email_verified: True if UC Davis email was verified
-        push_token: APNs push notification token (nullable)
+        push_token: APNs or FCM push notification token (nullable)
+        push_platform: "apns" or "fcm", derived from push_token when it is set
+        broadcast_read_cursor: Broadcast notifications with id <= this are read (set by read-all)
+        broadcast_read_cursor_at: When the cursor was last moved
+        notification_count: Maintained count of personal + broadcast notifications (NULL until first counted)
+        unread_notification_count: Maintained count of unread notifications (NULL until first counted)
         is_push_enabled: Whether push notifications are enabled
         created_at: Timestamp when device was registered
         last_seen_at: Timestamp of last API interaction
@@ -35,7 +65,12 @@ class Device(Base):
     device_id = Column(String(255), nullable=False, unique=True, index=True)
     email_verified = Column(Boolean, default=False, nullable=False)
     push_token = Column(String(255), nullable=True)
+    push_platform = Column(String(10), nullable=True)
     is_push_enabled = Column(Boolean, default=False, nullable=False)
+    broadcast_read_cursor = Column(Integer, default=0, nullable=False)
+    broadcast_read_cursor_at = Column(DateTime(timezone=True), nullable=True)
+    notification_count = Column(Integer, default=0, nullable=True)
+    unread_notification_count = Column(Integer, default=0, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_seen_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -45,5 +80,10 @@ class Device(Base):
     notifications = relationship("Notification", back_populates="device")
     votes = relationship("Vote", back_populates="device")
 
+    @validates("push_token")
+    def _set_push_platform(self, key: str, token: Optional[str]) -> Optional[str]:
+        self.push_platform = detect_push_platform(token).value if token else None
+        return token
+
     def __repr__(self):
         return f"<Device(id={self.id}, device_id='{self.device_id[:8]}...', verified={self.email_verified})>"
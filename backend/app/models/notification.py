@@ -2,7 +2,7 @@
 Notification model for storing notifications for in-app polling.
 """
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Boolean, Enum
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -52,6 +52,13 @@ class Notification(Base):
     # Relationships
     device = relationship("Device", back_populates="notifications")
 
+    __table_args__ = (
+        # Unread listing and mark-all-read: WHERE device_id = ? AND read_at IS NULL
+        Index("ix_notifications_device_read_created", "device_id", "read_at", "created_at"),
+        # Full listing: keyset pages in (created_at DESC, id DESC) order
+        Index("ix_notifications_device_created_id", "device_id", created_at.desc(), id.desc()),
+    )
+
     @property
     def is_read(self) -> bool:
         """Returns True if the notification has been read."""
@@ -0,0 +1,69 @@
+"""
+NotificationJob model — durable outbox for notification fan-out work.
+"""
+
+from sqlalchemy import Column, Integer, DateTime, String, Enum, JSON, Index
+from sqlalchemy.sql import func
+import enum
+
+from app.database import Base
+
+
+class NotificationJobType(str, enum.Enum):
+    """Kinds of work the outbox workers know how to run."""
+    LOT_ALERT = "lot_alert"  # Notify everyone parked at a lot about a TAPS sighting
+
+
+class NotificationJobStatus(str, enum.Enum):
+    """Lifecycle of an outbox job."""
+    PENDING = "pending"        # Waiting to be claimed (possibly after a backoff)
+    PROCESSING = "processing"  # Claimed by a worker until locked_until
+    DONE = "done"              # Completed successfully
+    FAILED = "failed"          # Gave up after max attempts
+
+
+class NotificationJob(Base):
+    """
+    A unit of notification work written in the same transaction as the
+    event that caused it, then executed by the outbox worker pool.
+
+    Attributes:
+        id: Primary key
+        job_type: What to run (LOT_ALERT)
+        payload: JSON arguments for the job handler
+        status: PENDING, PROCESSING, DONE or FAILED
+        attempts: Number of times a worker has claimed this job
+        available_at: Earliest time the job may be (re)claimed
+        locked_until: Claim expiry — a crashed worker's job becomes claimable again after this
+        last_error: Error message from the most recent failed attempt
+        created_at: When the job was enqueued
+        completed_at: When the job finished (DONE or FAILED)
+    """
+
+    __tablename__ = "notification_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(
+        Enum(NotificationJobType, name="notification_job_type", values_callable=lambda x: [e.value for e in x]),
+        nullable=False
+    )
+    payload = Column(JSON, nullable=False)
+    status = Column(
+        Enum(NotificationJobStatus, name="notification_job_status", values_callable=lambda x: [e.value for e in x]),
+        nullable=False,
+        default=NotificationJobStatus.PENDING,
+    )
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String(1000), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_notification_jobs_status_available_at", "status", "available_at"),
+        Index("ix_notification_jobs_completed_at", "completed_at"),
+    )
+
+    def __repr__(self):
+        return f"<NotificationJob(id={self.id}, type={self.job_type}, status={self.status}, attempts={self.attempts})>"
@@ -2,7 +2,7 @@
 ParkingSession model tracking when users park at and leave lots.
 """
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -35,6 +35,28 @@ class ParkingSession(Base):
     checked_out_at = Column(DateTime(timezone=True), nullable=True)
     reminder_sent = Column(Boolean, default=False, nullable=False)
 
+    # Partial indexes over active sessions only, which stay small as history grows
+    __table_args__ = (
+        # Check-in/check-out/current session: WHERE device_id = ? AND checked_out_at IS NULL
+        Index(
+            "ix_parking_sessions_active_device", "device_id",
+            postgresql_where=text("checked_out_at IS NULL"),
+            sqlite_where=text("checked_out_at IS NULL"),
+        ),
+        # Active parkers and push targets per lot
+        Index(
+            "ix_parking_sessions_active_lot", "parking_lot_id",
+            postgresql_where=text("checked_out_at IS NULL"),
+            sqlite_where=text("checked_out_at IS NULL"),
+        ),
+        # Reminder scan: active, unreminded sessions by check-in time
+        Index(
+            "ix_parking_sessions_reminder_due", "checked_in_at",
+            postgresql_where=text("checked_out_at IS NULL AND reminder_sent = false"),
+            sqlite_where=text("checked_out_at IS NULL AND reminder_sent = 0"),
+        ),
+    )
+
     # Relationships
     device = relationship("Device", back_populates="parking_sessions")
     parking_lot = relationship("ParkingLot", back_populates="parking_sessions")
@@ -0,0 +1,37 @@
+"""
+SchedulerLease model — which process currently runs a scheduled job.
+"""
+
+from sqlalchemy import Column, Integer, DateTime, String
+
+from app.database import Base
+
+
+class SchedulerLease(Base):
+    """
+    One row per scheduled job. Every web process runs the same scheduler;
+    the process that wins this row for a tick runs the job, the rest skip it.
+
+    Attributes:
+        job_id: Scheduler job id (e.g. "checkout_reminder")
+        holder: host:pid of the process that last acquired the lease
+        fencing_token: Incremented on every acquisition; renewals and releases
+            only apply while the holder's token is still current
+        started_at: When the current or most recent run started
+        completed_at: When that run finished (NULL while running, or if its
+            holder died or was cancelled before finishing)
+        locked_until: Lease expiry while a run is in progress (NULL when idle);
+            a crashed holder's lease lapses after this
+    """
+
+    __tablename__ = "scheduler_leases"
+
+    job_id = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=True)
+    fencing_token = Column(Integer, default=0, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<SchedulerLease(job_id={self.job_id}, holder={self.holder}, token={self.fencing_token})>"
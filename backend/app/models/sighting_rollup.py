@@ -0,0 +1,37 @@
+"""
+SightingHourlyRollup model — per-lot hourly aggregates of archived sightings.
+"""
+
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+
+from app.database import Base
+
+
+class SightingHourlyRollup(Base):
+    """
+    Sighting and vote counts for one parking lot in one UTC hour.
+
+    Raw taps_sightings/votes rows older than the retention window are folded
+    into these rows and then deleted, so long-range analytics read from here.
+
+    Attributes:
+        parking_lot_id: FK to the lot
+        hour_start: Start of the UTC hour the sightings were reported in
+        sighting_count: Number of sightings reported in that hour
+        upvote_count: Upvotes cast on those sightings
+        downvote_count: Downvotes cast on those sightings
+    """
+
+    __tablename__ = "sighting_hourly_rollups"
+
+    parking_lot_id = Column(Integer, ForeignKey("parking_lots.id"), primary_key=True)
+    hour_start = Column(DateTime(timezone=True), primary_key=True)
+    sighting_count = Column(Integer, default=0, nullable=False)
+    upvote_count = Column(Integer, default=0, nullable=False)
+    downvote_count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<SightingHourlyRollup(lot_id={self.parking_lot_id}, hour={self.hour_start}, "
+            f"sightings={self.sighting_count})>"
+        )
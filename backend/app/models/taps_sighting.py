@@ -2,7 +2,7 @@
 TapsSighting model recording when TAPS is spotted at a parking lot.
 """
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -22,6 +22,9 @@ class TapsSighting(Base):
         reported_by_device_id: FK to the device that reported (nullable for anonymous)
         reported_at: When the sighting was reported
         notes: Optional notes about the sighting
+        dedupe_bucket: Rate-limit time bucket (reported_at epoch // window); unique per lot
+            so concurrent reports can't both create a sighting. NULL for rows inserted
+            outside report_sighting.
     """
 
     __tablename__ = "taps_sightings"
@@ -31,6 +34,13 @@ class TapsSighting(Base):
     reported_by_device_id = Column(Integer, ForeignKey("devices.id"), nullable=True)
     reported_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     notes = Column(String(500), nullable=True)
+    dedupe_bucket = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("parking_lot_id", "dedupe_bucket", name="uq_taps_sightings_lot_dedupe_bucket"),
+        # Per-lot history and latest-sighting lookups, newest first (keyset pagination order)
+        Index("ix_taps_sightings_lot_reported_at", "parking_lot_id", reported_at.desc(), id.desc()),
+    )
 
     # Relationships
     parking_lot = relationship("ParkingLot", back_populates="taps_sightings")
@@ -44,6 +44,9 @@ from app.schemas.vote import (
     VoteCreate,
     VoteResponse,
     VoteResult,
+    VoteBatchRequest,
+    SightingVotes,
+    VoteBatchResponse,
 )
 from app.schemas.feed import (
     FeedSighting,
@@ -89,6 +92,9 @@ __all__ = [
     "VoteCreate",
     "VoteResponse",
     "VoteResult",
+    "VoteBatchRequest",
+    "SightingVotes",
+    "VoteBatchResponse",
     # Feed
     "FeedSighting",
     "FeedResponse",
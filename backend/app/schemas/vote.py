@@ -4,7 +4,7 @@ Pydantic schemas for voting operations.
 
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 
 
@@ -52,3 +52,44 @@ class VoteResult(BaseModel):
                 "vote_type": "upvote"
             }
         }
+
+
+class VoteBatchRequest(BaseModel):
+    """Schema for looking up vote state on many sightings at once."""
+    sighting_ids: List[int] = Field(..., min_length=1, max_length=200, description="Sighting IDs to look up")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "sighting_ids": [1, 2, 3]
+            }
+        }
+
+
+class SightingVotes(BaseModel):
+    """Schema for vote counts and the current user's vote on one sighting."""
+    sighting_id: int
+    upvotes: int = Field(0, description="Number of upvotes")
+    downvotes: int = Field(0, description="Number of downvotes")
+    net_score: int = Field(0, description="Upvotes minus downvotes")
+    user_vote: Optional[VoteType] = Field(None, description="Current user's vote on this sighting")
+
+
+class VoteBatchResponse(BaseModel):
+    """Schema for batch vote state response."""
+    votes: List[SightingVotes] = Field(default_factory=list)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "votes": [
+                    {
+                        "sighting_id": 1,
+                        "upvotes": 5,
+                        "downvotes": 1,
+                        "net_score": 4,
+                        "user_vote": "upvote"
+                    }
+                ]
+            }
+        }
@@ -9,6 +9,7 @@ from app.services.reminder import ReminderService
 from app.services.email import EmailService
 from app.services.otp import OTPService
 from app.services.ticket_ocr import TicketOCRService
+from app.services.retention import RetentionService
 
 __all__ = [
     "AuthService",
@@ -18,4 +19,5 @@ __all__ = [
     "EmailService",
     "OTPService",
     "TicketOCRService",
+    "RetentionService",
 ]
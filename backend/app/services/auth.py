@@ -10,6 +10,7 @@ This service handles:
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import re
+import secrets
 
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,11 +21,15 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
 from app.database import get_db
 from app.models.device import Device
+from app.services.push_targets import device_push_target, replace_push_target
 
 
 # HTTP Bearer token security scheme
 security = HTTPBearer()
 
+# Same scheme for internal endpoints, which answer 404 rather than 403 without a token
+optional_security = HTTPBearer(auto_error=False)
+
 
 class AuthService:
     """
@@ -123,11 +128,13 @@ class AuthService:
 
         if device:
             # Update push token if provided
+            old_target = device_push_target(device)
             if push_token:
                 device.push_token = push_token
                 device.is_push_enabled = True
             await db.commit()
             await db.refresh(device)
+            await replace_push_target(db, device, old_target)
             return device
 
         # Create new device
@@ -243,3 +250,20 @@ async def require_verified_device(
             detail="Email verification required",
         )
     return device
+
+
+async def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> None:
+    """
+    FastAPI dependency for internal endpoints such as GET /metrics.
+
+    The endpoint doesn't exist unless METRICS_TOKEN is configured, and then
+    only for requests presenting it as a Bearer token.
+
+    Raises:
+        HTTPException: If no token is configured or the presented one doesn't match
+    """
+    token = settings.metrics_token
+    if not token or credentials is None or not secrets.compare_digest(credentials.credentials, token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
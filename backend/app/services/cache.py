@@ -7,7 +7,7 @@ key missing, decode error) return None so callers can fall back to DB.
 
 import json
 import logging
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +18,7 @@ TTL_LOTS_LIST = 600       # 10 min  — lot list is nearly static
 TTL_LOT_STATS = 60        # 1 min   — active parkers + recent sightings
 TTL_VOTE_COUNTS = 30      # 30 sec  — invalidated on every vote
 TTL_PREDICTION = 300      # 5 min   — prediction per lot
+TTL_PUSH_TARGETS = 7200   # 2 h     — per-lot push targets, refreshed by every check-in/out
 
 
 def init_cache(host: str, port: int = 6379) -> None:
@@ -50,6 +51,18 @@ async def cache_get(key: str) -> Optional[Any]:
         return None
 
 
+async def cache_get_many(keys: List[str]) -> List[Optional[Any]]:
+    """MGET variant of cache_get — one round trip, None for every miss."""
+    if _redis is None or not keys:
+        return [None] * len(keys)
+    try:
+        raws = await _redis.mget(keys)
+        return [json.loads(raw) if raw is not None else None for raw in raws]
+    except Exception as e:
+        logger.warning(f"cache_get_many({len(keys)} keys): {e}")
+        return [None] * len(keys)
+
+
 async def cache_set(key: str, value: Any, ttl: int) -> None:
     if _redis is None:
         return
@@ -59,6 +72,36 @@ async def cache_set(key: str, value: Any, ttl: int) -> None:
         logger.warning(f"cache_set({key}): {e}")
 
 
+async def cache_set_many(items: Dict[str, Any], ttl: int) -> None:
+    if _redis is None or not items:
+        return
+    try:
+        async with _redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.setex(key, ttl, json.dumps(value))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"cache_set_many({len(items)} keys): {e}")
+
+
+async def cache_claim_many(keys: List[str], ttl: int) -> Optional[List[bool]]:
+    """
+    SET NX with a TTL for each key in one round trip. True where this call
+    created the key, False where it already existed. None when Redis is
+    unavailable, so callers can treat nothing as claimed.
+    """
+    if _redis is None or not keys:
+        return None
+    try:
+        async with _redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, 1, nx=True, ex=ttl)
+            return [bool(created) for created in await pipe.execute()]
+    except Exception as e:
+        logger.warning(f"cache_claim_many({len(keys)} keys): {e}")
+        return None
+
+
 async def cache_delete(*keys: str) -> None:
     if _redis is None or not keys:
         return
@@ -77,3 +120,168 @@ async def cache_delete_pattern(pattern: str) -> None:
             await _redis.delete(*keys)
     except Exception as e:
         logger.warning(f"cache_delete_pattern({pattern}): {e}")
+
+
+# ── sets ────────────────────────────────────────────────────────────────────
+
+async def cache_set_members(key: str) -> Optional[Set[str]]:
+    """SMEMBERS; None when Redis is unavailable (a missing key is an empty set)."""
+    if _redis is None:
+        return None
+    try:
+        return await _redis.smembers(key)
+    except Exception as e:
+        logger.warning(f"cache_set_members({key}): {e}")
+        return None
+
+
+async def cache_set_add(key: str, members: List[str], ttl: Optional[int] = None) -> None:
+    if _redis is None or not members:
+        return
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(key, *members)
+            if ttl is not None:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"cache_set_add({key}): {e}")
+
+
+# SADD and EXPIRE, but only if the set already exists
+_SADD_EXISTING = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('SADD', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+async def cache_set_add_existing(key: str, members: List[str], ttl: int) -> None:
+    """Add to a set and refresh its TTL; a no-op when the set doesn't exist."""
+    if _redis is None or not members:
+        return
+    try:
+        await _redis.eval(_SADD_EXISTING, 1, key, ttl, *members)
+    except Exception as e:
+        logger.warning(f"cache_set_add_existing({key}): {e}")
+
+
+# SADD and EXPIRE, but only while ARGV[2] is still in the guard set KEYS[2],
+# which it is taken out of
+_SADD_GUARDED = """
+if redis.call('SREM', KEYS[2], ARGV[2]) == 0 then
+    return 0
+end
+redis.call('SADD', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+async def cache_set_add_guarded(key: str, members: List[str], guard_key: str, guard: str, ttl: int) -> bool:
+    """
+    Add to a set and refresh its TTL if `guard` is still a member of the set
+    at `guard_key`, removing it from there. Returns whether the add happened.
+    """
+    if _redis is None or not members:
+        return False
+    try:
+        return bool(await _redis.eval(_SADD_GUARDED, 2, key, guard_key, ttl, guard, *members))
+    except Exception as e:
+        logger.warning(f"cache_set_add_guarded({key}): {e}")
+        return False
+
+
+# SREM and EXPIRE; while the guard set KEYS[2] exists, delete both keys instead
+_SREM_UNGUARDED = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 0
+end
+redis.call('SREM', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+async def cache_set_remove(key: str, members: List[str], guard_key: str, ttl: int) -> None:
+    """
+    Remove from a set and refresh its TTL (a no-op on a missing key). If the
+    set at `guard_key` exists, both keys are deleted instead, which voids
+    every guard a cache_set_add_guarded() caller holds on it.
+    """
+    if _redis is None or not members:
+        return
+    try:
+        await _redis.eval(_SREM_UNGUARDED, 2, key, guard_key, ttl, *members)
+    except Exception as e:
+        logger.warning(f"cache_set_remove({key}): {e}")
+
+
+# ── sorted sets ─────────────────────────────────────────────────────────────
+
+async def cache_zadd(key: str, mapping: Dict[str, float], nx: bool = False) -> None:
+    """ZADD; with nx=True existing members keep their score."""
+    if _redis is None or not mapping:
+        return
+    try:
+        await _redis.zadd(key, mapping, nx=nx)
+    except Exception as e:
+        logger.warning(f"cache_zadd({key}): {e}")
+
+
+async def cache_zrem(key: str, members: List[str]) -> None:
+    if _redis is None or not members:
+        return
+    try:
+        await _redis.zrem(key, *members)
+    except Exception as e:
+        logger.warning(f"cache_zrem({key}): {e}")
+
+
+async def cache_zpop_due(key: str, max_score: float, limit: int) -> Optional[List[str]]:
+    """
+    Remove and return up to `limit` members scored at or below `max_score`.
+    A member is returned only to the caller whose ZREM removed it, so
+    concurrent pollers never get the same member. None when Redis is
+    unavailable.
+    """
+    if _redis is None:
+        return None
+    try:
+        members = await _redis.zrangebyscore(key, "-inf", max_score, start=0, num=limit)
+        if not members:
+            return []
+        async with _redis.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.zrem(key, member)
+            removed = await pipe.execute()
+        return [member for member, n in zip(members, removed) if n]
+    except Exception as e:
+        logger.warning(f"cache_zpop_due({key}): {e}")
+        return None
+
+
+# ── pub/sub ─────────────────────────────────────────────────────────────────
+
+def cache_available() -> bool:
+    return _redis is not None
+
+
+async def cache_publish(channel: str, value: Any) -> None:
+    if _redis is None:
+        return
+    try:
+        await _redis.publish(channel, json.dumps(value))
+    except Exception as e:
+        logger.warning(f"cache_publish({channel}): {e}")
+
+
+def cache_pubsub():
+    """Return a new PubSub handle, or None when Redis is not configured."""
+    if _redis is None:
+        return None
+    return _redis.pubsub(ignore_subscribe_messages=True)
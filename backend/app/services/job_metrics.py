@@ -0,0 +1,188 @@
+"""
+Instrumentation for scheduled jobs.
+
+Every scheduler job runs inside job_run() (see run_exclusive; jobs that
+run on every process wrap themselves in app.main), which records under scheduler.<job_id>.* in GET /metrics:
+
+- lag: scheduled fire time to actual start
+- duration: run time; failed runs count as errors
+- runs, failures, skipped (another process held the lease), overlaps (a
+  tick fired while this process's previous run was still going) and missed
+  (a tick fired after its misfire grace time) counters
+- rows_scanned, rows_processed, pushes_sent and pushes_failed, reported by
+  the job code through record_rows() / record_pushes()
+
+A job that handles its own errors (to keep going, or to retry later) calls
+record_error() so the run still counts as failed.
+
+The Redis reminder-queue poller isn't a scheduler job but sends most
+reminders when Redis is configured, so each of its polls is a run too
+(job id reminder_queue, without lag).
+
+The latest run of each job is also summarized in GET /health, with a
+slow flag for a run in progress or finished that took longer than its
+threshold. /health is public, so a failed run shows only the exception
+type; the message (which may name hosts or hold SQL) stays in the logs.
+"""
+
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
+
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
+
+from app.config import settings
+from app.services.metrics import increment, latency
+
+# Histogram bucket upper bounds (seconds) for job lag and duration
+JOB_DURATION_BUCKETS = (0.1, 1.0, 5.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+# Per-run counts, exported as scheduler.<job_id>.<count>
+RUN_COUNTS = ("rows_scanned", "rows_processed", "pushes_sent", "pushes_failed")
+
+
+class JobRun:
+    """Counts and handled error reported by one run of a job."""
+
+    __slots__ = RUN_COUNTS + ("error",)
+
+    def __init__(self):
+        self.rows_scanned = 0
+        self.rows_processed = 0
+        self.pushes_sent = 0
+        self.pushes_failed = 0
+        self.error: Optional[BaseException] = None
+
+
+_current_run: ContextVar[Optional[JobRun]] = ContextVar("current_job_run", default=None)
+
+# Fire time of each job's latest tick, set when the scheduler submits it
+_scheduled_at: Dict[str, datetime] = {}
+
+# Latest run of each job, for /health
+_status: Dict[str, dict] = {}
+
+
+def record_rows(scanned: int = 0, processed: int = 0) -> None:
+    """Add to the current job run's row counts; a no-op outside a job."""
+    run = _current_run.get()
+    if run is not None:
+        run.rows_scanned += scanned
+        run.rows_processed += processed
+
+
+def record_pushes(sent: int = 0, failed: int = 0) -> None:
+    """Add to the current job run's push counts; a no-op outside a job."""
+    run = _current_run.get()
+    if run is not None:
+        run.pushes_sent += sent
+        run.pushes_failed += failed
+
+
+def record_error(error: BaseException) -> None:
+    """Mark the current job run failed for an error the job handled; a no-op outside a job."""
+    run = _current_run.get()
+    if run is not None:
+        run.error = error
+
+
+def record_skipped(job_id: str) -> None:
+    """Count a tick that another process ran."""
+    _scheduled_at.pop(job_id, None)
+    increment(f"scheduler.{job_id}.skipped")
+
+
+@asynccontextmanager
+async def job_run(job_id: str, slow_after: Optional[float] = None) -> AsyncIterator[JobRun]:
+    """
+    Instrument one run of `job_id`. The run's JobRun is current for the
+    block, including tasks created inside it.
+    """
+    prefix = f"scheduler.{job_id}"
+    started_at = datetime.now(timezone.utc)
+    scheduled_at = _scheduled_at.pop(job_id, None)
+    lag = max((started_at - scheduled_at).total_seconds(), 0.0) if scheduled_at else None
+    if lag is not None:
+        latency(f"{prefix}.lag", JOB_DURATION_BUCKETS).observe(lag)
+
+    status = _status.setdefault(job_id, {"consecutive_failures": 0})
+    status.update(
+        running=True,
+        started_at=started_at.isoformat(),
+        lag_s=round(lag, 3) if lag is not None else None,
+        slow_after_s=slow_after or settings.scheduler_slow_job_seconds,
+    )
+    status["_start"] = time.perf_counter()
+
+    run = JobRun()
+    token = _current_run.set(run)
+    error: Optional[BaseException] = None
+    try:
+        yield run
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_run.reset(token)
+        error = error or run.error
+        duration = time.perf_counter() - status.pop("_start")
+        latency(f"{prefix}.duration", JOB_DURATION_BUCKETS).observe(
+            duration, "error" if error is not None else "ok"
+        )
+        increment(f"{prefix}.runs")
+        if error is not None:
+            increment(f"{prefix}.failures")
+        for field in RUN_COUNTS:
+            increment(f"{prefix}.{field}", getattr(run, field))
+
+        status.update(
+            running=False,
+            duration_s=round(duration, 3),
+            outcome="error" if error is not None else "ok",
+            error=type(error).__name__ if error is not None else None,
+            consecutive_failures=status["consecutive_failures"] + 1 if error is not None else 0,
+            **{field: getattr(run, field) for field in RUN_COUNTS},
+        )
+
+
+def scheduler_listener(event) -> None:
+    """APScheduler listener for the lag, overlap and misfire bookkeeping."""
+    prefix = f"scheduler.{event.job_id}"
+    if event.code == EVENT_JOB_SUBMITTED:
+        if event.scheduled_run_times:
+            _scheduled_at[event.job_id] = event.scheduled_run_times[-1]
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+        # The previous run in this process is still going
+        increment(f"{prefix}.overlaps")
+    elif event.code == EVENT_JOB_MISSED:
+        increment(f"{prefix}.missed")
+
+
+SCHEDULER_EVENTS = EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED
+
+
+def jobs_health() -> Dict[str, dict]:
+    """Latest run of each job in this process, flagging slow ones."""
+    health = {}
+    for job_id, status in sorted(_status.items()):
+        entry = {k: v for k, v in status.items() if not k.startswith("_")}
+        if status.get("running"):
+            entry["running_for_s"] = round(time.perf_counter() - status["_start"], 3)
+            elapsed = entry["running_for_s"]
+        else:
+            elapsed = status.get("duration_s", 0.0)
+        entry["slow"] = elapsed > status["slow_after_s"]
+        health[job_id] = entry
+    return health
+
+
+def reset_job_metrics() -> None:
+    _scheduled_at.clear()
+    _status.clear()
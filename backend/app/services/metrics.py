@@ -0,0 +1,148 @@
+"""
+In-process metrics.
+
+Lightweight latency/outcome tracking for hot background paths (push
+delivery and the like) plus monotonic counters for batch jobs. Each
+process keeps its own numbers; they are exposed at GET /metrics (behind
+METRICS_TOKEN) for scraping or ad-hoc inspection, one process per request.
+"""
+
+import bisect
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterator, List, Optional, Sequence
+
+# Percentiles are computed over this many most recent samples
+SAMPLE_WINDOW = 1024
+
+# Histogram bucket upper bounds (seconds) for end-to-end alert latency
+ALERT_LATENCY_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class LatencyStats:
+    """
+    Outcome counters plus a sliding window of latencies for one operation,
+    and optionally a cumulative histogram over fixed buckets.
+    """
+
+    __slots__ = ("count", "errors", "timeouts", "_samples", "_bounds", "_buckets")
+
+    def __init__(self, window: int = SAMPLE_WINDOW, buckets: Optional[Sequence[float]] = None):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._bounds = tuple(buckets or ())
+        # One slot per bound plus the overflow (+Inf) slot
+        self._buckets: List[int] = [0] * (len(self._bounds) + 1) if self._bounds else []
+
+    def observe(self, seconds: float, outcome: str = "ok") -> None:
+        """Record one operation. outcome is "ok", "error" or "timeout"."""
+        self.count += 1
+        if outcome == "error":
+            self.errors += 1
+        elif outcome == "timeout":
+            self.timeouts += 1
+        self._samples.append(seconds)
+        if self._bounds:
+            self._buckets[bisect.bisect_left(self._bounds, seconds)] += 1
+
+    def percentile(self, pct: float) -> float:
+        """Latency in seconds at `pct` (0-100) over the sample window."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def histogram(self) -> Dict[str, int]:
+        """Cumulative count of observations <= each bucket bound (Prometheus-style)."""
+        histogram: Dict[str, int] = {}
+        running = 0
+        for bound, n in zip([*map(str, self._bounds), "+Inf"], self._buckets):
+            running += n
+            histogram[bound] = running
+        return histogram
+
+    def snapshot(self) -> dict:
+        snapshot = {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p95_ms": round(self.percentile(95) * 1000, 1),
+            "p99_ms": round(self.percentile(99) * 1000, 1),
+            "max_ms": round(max(self._samples, default=0.0) * 1000, 1),
+        }
+        if self._bounds:
+            snapshot["buckets_s"] = self.histogram()
+        return snapshot
+
+
+_latency: Dict[str, LatencyStats] = {}
+_counters: Dict[str, int] = {}
+
+
+def latency(name: str, buckets: Optional[Sequence[float]] = None) -> LatencyStats:
+    """Get (or create) the LatencyStats registered under `name`; `buckets` applies on creation."""
+    stats = _latency.get(name)
+    if stats is None:
+        stats = _latency[name] = LatencyStats(buckets=buckets)
+    return stats
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record the duration of the block under `name`; exceptions count as errors."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        latency(name).observe(time.perf_counter() - start, "error")
+        raise
+    latency(name).observe(time.perf_counter() - start)
+
+
+class AlertTrace:
+    """
+    Stage timings for one lot alert, measured from when its sighting was
+    committed. Stages run in different processes (request handler, outbox
+    worker), so this uses wall-clock time rather than perf_counter.
+
+    Each mark() is observed under alert.<stage> with ALERT_LATENCY_BUCKETS.
+    With no origin (an alert not triggered by a sighting) marks are ignored.
+    """
+
+    __slots__ = ("origin",)
+
+    def __init__(self, origin: Optional[datetime]):
+        if origin is not None and origin.tzinfo is None:
+            origin = origin.replace(tzinfo=timezone.utc)
+        self.origin = origin
+
+    def mark(self, stage: str, at: Optional[datetime] = None) -> None:
+        if self.origin is None:
+            return
+        elapsed = ((at or datetime.now(timezone.utc)) - self.origin).total_seconds()
+        # Clock skew between hosts can make early stages look negative
+        latency(f"alert.{stage}", ALERT_LATENCY_BUCKETS).observe(max(elapsed, 0.0))
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """Add `amount` to the counter registered under `name`."""
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def metrics_snapshot() -> dict:
+    """All registered metrics as a JSON-serializable dict."""
+    return {
+        "latency": {name: stats.snapshot() for name, stats in sorted(_latency.items())},
+        "counters": dict(sorted(_counters.items())),
+    }
+
+
+def reset_metrics() -> None:
+    _latency.clear()
+    _counters.clear()
@@ -7,19 +7,33 @@ Handles:
 - Managing notification state (read/unread)
 """
 
+import asyncio
+import json
 import logging
-from typing import List, Optional
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, insert, update, func, and_, or_, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.config import settings
-from app.models.device import Device
+from app.models.device import Device, PushPlatform, detect_push_platform
 from app.models.notification import Notification, NotificationType
+from app.models.broadcast_notification import BroadcastNotification, BroadcastRead
 from app.models.parking_session import ParkingSession
 from app.models.parking_lot import ParkingLot
+from app.services.cache import cache_claim_many, cache_delete
+from app.services.job_metrics import record_pushes, record_rows
+from app.services.metrics import AlertTrace, increment, latency, timed
+from app.services.notification_waiters import announce_notifications
+from app.services.pagination import after_cursor
+from app.services.push_lanes import PushLane, lane_slot
+from app.services.push_targets import PushTarget, get_lot_push_targets, invalidate_push_targets
 
 # Conditional import for APNs
 try:
@@ -32,12 +46,118 @@ except ImportError:
 try:
     import firebase_admin
     from firebase_admin import messaging as fcm_messaging
+    from firebase_admin import exceptions as fcm_exceptions
     FCM_IMPORTABLE = True
 except ImportError:
     FCM_IMPORTABLE = False
 
 logger = logging.getLogger(__name__)
 
+# FCM's send_each accepts at most 500 messages per call
+FCM_BATCH_SIZE = 500
+
+# APNs rejection reasons that mean the token will never work again
+APNS_DEAD_TOKEN_REASONS = {"BadDeviceToken", "Unregistered", "DeviceTokenNotForTopic"}
+
+# alert_sent:{lot_id}:{device_id} is held for ALERT_SUPPRESSION_MINUTES after a lot alert
+ALERT_SENT_PREFIX = "alert_sent:"
+
+
+class PushResult(NamedTuple):
+    """Outcome of one push send."""
+    token: str
+    success: bool
+    error: Optional[str] = None
+    unregistered: bool = False  # Provider says the token is dead
+    acked_at: Optional[datetime] = None  # When the provider accepted it
+
+
+class PushMessage(NamedTuple):
+    """One device's push in a send_push_messages call."""
+    token: str
+    title: str
+    body: str
+    data: Optional[dict] = None
+    platform: Optional[str] = None  # Stored Device.push_platform; None detects it from the token
+
+
+# Dedicated pools for blocking firebase_admin calls, so FCM sends don't
+# compete with the loop's default executor (DNS, file I/O, etc.). One per
+# lane, so reminder batches never occupy the threads alerts need.
+_fcm_executors: Dict[PushLane, ThreadPoolExecutor] = {}
+
+
+def _get_fcm_executor(lane: PushLane) -> ThreadPoolExecutor:
+    executor = _fcm_executors.get(lane)
+    if executor is None:
+        workers = (
+            settings.fcm_executor_workers if lane is PushLane.ALERT
+            else settings.fcm_reminder_executor_workers
+        )
+        executor = _fcm_executors[lane] = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"fcm-{lane.value}"
+        )
+    return executor
+
+
+def _fcm_ready() -> bool:
+    """True if firebase-admin is installed and initialized."""
+    if not FCM_IMPORTABLE:
+        logger.warning("firebase-admin not installed, skipping FCM notification")
+        return False
+
+    # Firebase app is initialized at runtime by init_firebase()
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        logger.warning("Firebase Admin SDK not initialized, skipping FCM notification")
+        return False
+    return True
+
+
+def _is_dead_fcm_token_error(error: Optional[Exception]) -> bool:
+    """True if FCM rejected the token itself, rather than the message or the request."""
+    if isinstance(error, (fcm_messaging.UnregisteredError, fcm_messaging.SenderIdMismatchError)):
+        return True
+    # INVALID_ARGUMENT also covers malformed payloads; only a token complaint counts
+    return isinstance(error, fcm_exceptions.InvalidArgumentError) and "registration token" in str(error)
+
+
+def _insert_fn(db: AsyncSession):
+    """Return dialect-appropriate insert (PostgreSQL in prod, SQLite in tests)."""
+    try:
+        dialect = db.get_bind().dialect.name
+    except Exception:
+        dialect = "postgresql"
+    return sqlite_insert if dialect == "sqlite" else pg_insert
+
+
+def init_firebase() -> None:
+    """Initialize the Firebase Admin SDK for FCM, if credentials are configured."""
+    if not settings.firebase_credentials_json:
+        logger.warning(
+            "Firebase credentials not configured, FCM push notifications disabled"
+        )
+        return
+    if not FCM_IMPORTABLE:
+        logger.warning("firebase-admin not installed, FCM push notifications disabled")
+        return
+
+    try:
+        from firebase_admin import credentials
+
+        cred_value = settings.firebase_credentials_json
+        if cred_value.strip().startswith("{"):
+            # JSON string (e.g., from env var in app.yaml)
+            cred = credentials.Certificate(json.loads(cred_value))
+        else:
+            # File path (e.g., for local development)
+            cred = credentials.Certificate(cred_value)
+        firebase_admin.initialize_app(cred)
+        logger.info("Firebase Admin SDK initialized")
+    except Exception as e:
+        logger.error(f"Failed to initialize Firebase Admin SDK: {e}")
+
 
 class NotificationService:
     """
@@ -103,6 +223,7 @@ class NotificationService:
                 team_id=settings.apns_team_id,
                 topic=settings.apns_bundle_id,
                 use_sandbox=settings.apns_use_sandbox,
+                max_connections=settings.apns_max_connections,
             )
             return cls._apns_client
         except Exception as e:
@@ -117,17 +238,10 @@ class NotificationService:
         APNs tokens are 64 hex characters.
         FCM tokens are longer and contain colons/alphanumeric characters.
         """
-        if len(token) > 64 or ':' in token:
-            return True
-        # APNs tokens are exactly 64 hex chars
-        try:
-            int(token, 16)
-            return len(token) != 64
-        except ValueError:
-            return True
+        return detect_push_platform(token) == PushPlatform.FCM
 
     @classmethod
-    async def send_push_notification(
+    async def _send_apns_result(
         cls,
         push_token: str,
         title: str,
@@ -135,40 +249,14 @@ class NotificationService:
         data: Optional[dict] = None,
         badge: int = 1,
         time_sensitive: bool = False,
-    ) -> bool:
-        """
-        Send a push notification via FCM (Android) or APNs (iOS),
-        based on the token format.
-
-        Args:
-            push_token: Device push token
-            title: Notification title
-            body: Notification body
-            data: Optional custom data payload
-
-        Returns:
-            True if notification was sent successfully
-        """
-        if cls._is_fcm_token(push_token):
-            return await cls._send_fcm(push_token, title, body, data)
-        else:
-            return await cls._send_apns(push_token, title, body, data, badge, time_sensitive)
-
-    @classmethod
-    async def _send_apns(
-        cls,
-        push_token: str,
-        title: str,
-        body: str,
-        data: Optional[dict] = None,
-        badge: int = 1,
-        time_sensitive: bool = False,
-    ) -> bool:
-        """Send a push notification via APNs (iOS)."""
+        lane: PushLane = PushLane.REMINDER,
+        collapse_id: Optional[str] = None,
+    ) -> PushResult:
+        """Send via APNs and report the outcome, including whether the token is dead."""
         apns_client = cls._get_apns_client()
         if apns_client is None:
             logger.debug("APNs client not available, skipping push notification")
-            return False
+            return PushResult(push_token, False, "APNs unavailable")
 
         try:
             request = NotificationRequest(
@@ -187,71 +275,204 @@ class NotificationService:
                 },
                 push_type=PushType.ALERT,
                 priority=10 if time_sensitive else None,
+                collapse_key=collapse_id,
             )
-            response = await apns_client.send_notification(request)
+        except Exception as e:
+            logger.error(f"Error building APNs request: {e}")
+            return PushResult(push_token, False, str(e))
 
-            if not response.is_successful:
-                logger.warning(f"APNs push notification failed: {response.description}")
-                return False
+        async with lane_slot(lane):
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    apns_client.send_notification(request),
+                    timeout=settings.apns_send_timeout_seconds,
+                )
+            except asyncio.TimeoutError:
+                latency("push.apns").observe(time.perf_counter() - start, "timeout")
+                logger.warning(f"APNs push timed out after {settings.apns_send_timeout_seconds}s")
+                return PushResult(push_token, False, "timeout")
+            except Exception as e:
+                latency("push.apns").observe(time.perf_counter() - start, "error")
+                logger.error(f"Error sending APNs push notification: {e}")
+                return PushResult(push_token, False, str(e))
 
-            return True
-        except Exception as e:
-            logger.error(f"Error sending APNs push notification: {e}")
-            return False
+        if not response.is_successful:
+            latency("push.apns").observe(time.perf_counter() - start, "error")
+            logger.warning(f"APNs push notification failed: {response.description}")
+            return PushResult(
+                push_token, False, response.description,
+                unregistered=response.description in APNS_DEAD_TOKEN_REASONS,
+            )
 
-    @classmethod
-    async def _send_fcm(
-        cls,
+        latency("push.apns").observe(time.perf_counter() - start)
+        return PushResult(push_token, True, acked_at=datetime.now(timezone.utc))
+
+    @staticmethod
+    def _build_fcm_message(
         push_token: str,
         title: str,
         body: str,
-        data: Optional[dict] = None
-    ) -> bool:
-        """Send a push notification via Firebase Cloud Messaging (Android)."""
-        if not FCM_IMPORTABLE:
-            logger.warning("firebase-admin not installed, skipping FCM notification")
-            return False
-
-        # Check if Firebase app is initialized (happens at runtime in lifespan)
-        try:
-            firebase_admin.get_app()
-        except ValueError:
-            logger.warning("Firebase Admin SDK not initialized, skipping FCM notification")
-            return False
+        data: Optional[dict] = None,
+        collapse_id: Optional[str] = None,
+    ) -> "fcm_messaging.Message":
+        # FCM data values must all be strings
+        str_data = {k: str(v) for k, v in (data or {}).items()}
 
-        try:
-            import asyncio
-
-            # FCM data values must all be strings
-            str_data = {k: str(v) for k, v in (data or {}).items()}
-
-            message = fcm_messaging.Message(
-                token=push_token,
-                notification=fcm_messaging.Notification(title=title, body=body),
-                data=str_data,
-                android=fcm_messaging.AndroidConfig(
-                    priority="high",
-                    notification=fcm_messaging.AndroidNotification(
-                        channel_id="taps_alerts",
-                        sound="default",
-                    ),
+        return fcm_messaging.Message(
+            token=push_token,
+            notification=fcm_messaging.Notification(title=title, body=body),
+            data=str_data,
+            android=fcm_messaging.AndroidConfig(
+                priority="high",
+                collapse_key=collapse_id,
+                notification=fcm_messaging.AndroidNotification(
+                    channel_id="taps_alerts",
+                    sound="default",
                 ),
-            )
+            ),
+        )
 
-            # firebase_admin.messaging.send() is synchronous — run in executor
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, fcm_messaging.send, message)
-            logger.info(f"FCM notification sent successfully: {response}")
-            return True
-        except fcm_messaging.UnregisteredError:
-            logger.warning(f"FCM token unregistered (stale): {push_token[:20]}...")
-            return False
-        except Exception as e:
-            logger.error(f"Error sending FCM notification: {e}")
-            return False
+    @classmethod
+    async def _send_fcm_batch(
+        cls,
+        messages: List[PushMessage],
+        lane: PushLane = PushLane.REMINDER,
+        collapse_id: Optional[str] = None,
+    ) -> List[PushResult]:
+        """
+        Send FCM messages with send_each, in chunks of FCM_BATCH_SIZE. The
+        messages may differ. Returns one PushResult per message.
+        """
+        if not messages:
+            return []
+        if not _fcm_ready():
+            return [PushResult(m.token, False, "FCM unavailable") for m in messages]
+
+        loop = asyncio.get_running_loop()
+        results: List[PushResult] = []
+        for i in range(0, len(messages), FCM_BATCH_SIZE):
+            chunk = messages[i:i + FCM_BATCH_SIZE]
+            try:
+                fcm_messages = [
+                    cls._build_fcm_message(m.token, m.title, m.body, m.data, collapse_id) for m in chunk
+                ]
+                async with lane_slot(lane):
+                    with timed("push.fcm_batch"):
+                        batch = await loop.run_in_executor(
+                            _get_fcm_executor(lane), fcm_messaging.send_each, fcm_messages
+                        )
+            except Exception as e:
+                logger.error(f"Error sending FCM batch of {len(chunk)}: {e}")
+                results.extend(PushResult(m.token, False, str(e)) for m in chunk)
+                continue
+
+            acked_at = datetime.now(timezone.utc)
+            for message, response in zip(chunk, batch.responses):
+                if response.success:
+                    results.append(PushResult(message.token, True, acked_at=acked_at))
+                    continue
+                results.append(PushResult(
+                    message.token, False, str(response.exception),
+                    _is_dead_fcm_token_error(response.exception),
+                ))
+
+            logger.info(f"FCM batch sent: {batch.success_count}/{len(chunk)} succeeded")
+
+        return results
+
+    @classmethod
+    async def send_push_messages(
+        cls,
+        messages: List[PushMessage],
+        badge: int = 1,
+        time_sensitive: bool = False,
+        lane: PushLane = PushLane.REMINDER,
+        collapse_id: Optional[str] = None,
+    ) -> Dict[str, PushResult]:
+        """
+        Send a notification to each device, possibly a different one each.
+
+        FCM messages go out together in batched send_each calls; APNs ones
+        are sent individually over the pooled HTTP/2 connections. Both are
+        bounded by the concurrency budget of `lane` (see
+        app.services.push_lanes). Pushes sharing a `collapse_id` replace each
+        other on the device instead of stacking.
+
+        Returns:
+            PushResult for each token, keyed by token
+        """
+        fcm_messages: List[PushMessage] = []
+        apns_messages: List[PushMessage] = []
+        for message in messages:
+            platform = message.platform or detect_push_platform(message.token).value
+            (fcm_messages if platform == PushPlatform.FCM.value else apns_messages).append(message)
+
+        fcm_results, apns_results = await asyncio.gather(
+            cls._send_fcm_batch(fcm_messages, lane, collapse_id),
+            asyncio.gather(*(
+                cls._send_apns_result(
+                    m.token, m.title, m.body, m.data, badge, time_sensitive, lane, collapse_id
+                )
+                for m in apns_messages
+            )),
+        )
+        return {r.token: r for r in [*fcm_results, *apns_results]}
+
+    @classmethod
+    async def send_push_notifications(
+        cls,
+        push_tokens: List[str],
+        title: str,
+        body: str,
+        data: Optional[dict] = None,
+        badge: int = 1,
+        time_sensitive: bool = False,
+        platforms: Optional[Dict[str, Optional[str]]] = None,
+        lane: PushLane = PushLane.REMINDER,
+        collapse_id: Optional[str] = None,
+    ) -> Dict[str, PushResult]:
+        """
+        Send the same notification to many devices (see send_push_messages).
+
+        `platforms` maps tokens to their stored Device.push_platform; tokens
+        without one fall back to format detection.
+
+        Returns:
+            PushResult for each token, keyed by token
+        """
+        platforms = platforms or {}
+        return await cls.send_push_messages(
+            [PushMessage(token, title, body, data, platforms.get(token)) for token in push_tokens],
+            badge, time_sensitive, lane, collapse_id,
+        )
 
     @staticmethod
+    async def prune_dead_tokens(db: AsyncSession, results: Dict[str, PushResult]) -> int:
+        """
+        Clear push_token/is_push_enabled on devices whose token the provider
+        reported as dead, in one UPDATE. A device that has since registered a
+        new token is left alone.
+
+        Returns:
+            Number of devices updated
+        """
+        dead = [token for token, result in results.items() if result.unregistered]
+        if not dead:
+            return 0
+
+        result = await db.execute(
+            update(Device)
+            .where(Device.push_token.in_(dead))
+            .values(push_token=None, push_platform=None, is_push_enabled=False)
+        )
+        await db.commit()
+        logger.info(f"Pruned {result.rowcount} dead push token(s)")
+        return result.rowcount
+
+    @classmethod
     async def create_notification(
+        cls,
         db: AsyncSession,
         device: Device,
         notification_type: NotificationType,
@@ -281,8 +502,10 @@ class NotificationService:
             parking_lot_id=parking_lot_id,
         )
         db.add(notification)
+        await cls._adjust_counts(db, Device.id == device.id, unread=1, total=1)
         await db.commit()
         await db.refresh(notification)
+        await announce_notifications([device.id])
         return notification
 
     @classmethod
@@ -291,48 +514,80 @@ class NotificationService:
         db: AsyncSession,
         parking_lot_id: int,
         parking_lot_name: str,
-        parking_lot_code: str = ""
+        parking_lot_code: str = "",
+        sighting_reported_at: Optional[datetime] = None,
+        job_id: Optional[int] = None,
     ) -> int:
-        import asyncio
+        # Stage latencies since the sighting was committed, under alert.* in /metrics
+        trace = AlertTrace(sighting_reported_at)
+        trace.mark("fanout_started")
 
-        result = await db.execute(
-            select(ParkingSession)
-            .where(
-                ParkingSession.parking_lot_id == parking_lot_id,
-                ParkingSession.checked_out_at.is_(None)
-            )
-            .options(selectinload(ParkingSession.device))
-        )
-        active_sessions = result.scalars().all()
+        targets = await get_lot_push_targets(db, parking_lot_id)
 
-        if not active_sessions:
+        if not targets:
             return 0
 
         title = "⚠️ TAPS Alert!"
         message = f"TAPS spotted at {parking_lot_name}! Tap to pay for parking."
-        checked_in_count = len(active_sessions)
+        checked_in_count = len(targets)
 
-        # Batch insert all in-app notifications in a single commit
-        db.add_all([
-            Notification(
-                device_id=session.device.id,
-                notification_type=NotificationType.TAPS_SPOTTED,
-                title=title,
-                message=message,
-                parking_lot_id=parking_lot_id,
-            )
-            for session in active_sessions
-        ])
-        await db.commit()
+        # Devices alerted about this lot within the suppression window are skipped
+        fresh, claimed_keys = await cls._claim_alert_slots(parking_lot_id, targets)
+        if len(fresh) < len(targets):
+            increment("alert.suppressed", len(targets) - len(fresh))
+        if not fresh:
+            logger.info(f"Lot {parking_lot_id} alert suppressed: every parked device was alerted recently")
+            return 0
+
+        # One broadcast row for the whole lot; each parked device sees it at read time
+        sent_at = datetime.now(timezone.utc)
+        try:
+            already_sent = job_id is not None and await db.scalar(
+                select(BroadcastNotification.id).where(BroadcastNotification.job_id == job_id)
+            ) is not None
+            if not already_sent:
+                db.add(BroadcastNotification(
+                    notification_type=NotificationType.TAPS_SPOTTED,
+                    title=title,
+                    message=message,
+                    parking_lot_id=parking_lot_id,
+                    job_id=job_id,
+                    created_at=sent_at,
+                ))
+                recipients = await db.execute(
+                    select(ParkingSession.device_id).where(
+                        ParkingSession.parking_lot_id == parking_lot_id,
+                        cls._session_active_at(sent_at),
+                    )
+                )
+                recipient_ids = list(recipients.scalars().all())
+                await cls._adjust_counts(db, Device.id.in_(recipient_ids), unread=1, total=1)
+                await db.commit()
+        except Exception:
+            # Nothing was delivered, so a retry of this alert must not be suppressed
+            await cache_delete(*claimed_keys)
+            raise
+        if already_sent:
+            # A retried job whose earlier attempt committed the broadcast: only
+            # the pushes are resent, and their collapse id replaces any that
+            # already arrived instead of stacking a second alert
+            logger.info(f"Lot {parking_lot_id} alert for job {job_id} already recorded; resending pushes")
+        else:
+            trace.mark("rows_inserted")
+            await announce_notifications(recipient_ids)
+
+        push_targets = [target for target in fresh if target.token]
 
-        # Fire all push notifications concurrently
-        push_tasks = [
-            cls.send_push_notification(
-                push_token=session.device.push_token,
+        if push_targets:
+            results = await cls.send_push_notifications(
+                push_tokens=[target.token for target in push_targets],
+                platforms={target.token: target.platform for target in push_targets},
                 title=title,
                 body=message,
                 badge=checked_in_count,
                 time_sensitive=True,
+                lane=PushLane.ALERT,
+                collapse_id=f"taps-lot-{parking_lot_id}",
                 data={
                     "type": "TAPS_SPOTTED",
                     "parking_lot_id": parking_lot_id,
@@ -341,17 +596,126 @@ class NotificationService:
                     "checked_in_count": checked_in_count,
                 }
             )
-            for session in active_sessions
-            if session.device.is_push_enabled and session.device.push_token
-        ]
+            for target in push_targets:
+                result = results.get(target.token)
+                if result is not None and result.acked_at is not None:
+                    platform = target.platform or detect_push_platform(target.token).value
+                    trace.mark(f"push_acked.{platform}", result.acked_at)
 
-        if push_tasks:
-            await asyncio.gather(*push_tasks, return_exceptions=True)
+            if await cls.prune_dead_tokens(db, results):
+                await invalidate_push_targets(parking_lot_id)
 
+        trace.mark("fanout_finished")
         return checked_in_count
 
     @staticmethod
+    async def _claim_alert_slots(
+        parking_lot_id: int, targets: List[PushTarget],
+    ) -> Tuple[List[PushTarget], List[str]]:
+        """
+        Claim each device's alert window for this lot. Returns the targets
+        not alerted about the lot within ALERT_SUPPRESSION_MINUTES, and the
+        keys claimed for them. Without Redis nothing is suppressed.
+        """
+        keys = [f"{ALERT_SENT_PREFIX}{parking_lot_id}:{target.device_id}" for target in targets]
+        claimed = await cache_claim_many(keys, settings.alert_suppression_minutes * 60)
+        if claimed is None:
+            return targets, []
+        fresh = [target for target, ok in zip(targets, claimed) if ok]
+        return fresh, [key for key, ok in zip(keys, claimed) if ok]
+
+    @staticmethod
+    def _session_active_at(ts):
+        """WHERE clause for parking sessions that were active at `ts`."""
+        return and_(
+            ParkingSession.checked_in_at <= ts,
+            or_(
+                ParkingSession.checked_out_at.is_(None),
+                ParkingSession.checked_out_at > ts,
+            ),
+        )
+
+    @classmethod
+    def _received_broadcasts(cls, device_id):
+        """
+        Broadcasts the device received: those sent to a lot while one of the
+        device's sessions there was active. Sessions don't overlap, so each
+        broadcast joins at most one session.
+
+        `device_id` may be a value or the Device.id column (for correlated
+        per-device counts).
+        """
+        return (
+            select(BroadcastNotification)
+            .join(ParkingSession, and_(
+                ParkingSession.device_id == device_id,
+                ParkingSession.parking_lot_id == BroadcastNotification.parking_lot_id,
+                cls._session_active_at(BroadcastNotification.created_at),
+            ))
+        )
+
+    @staticmethod
+    def _broadcast_unread(device_id, read_cursor):
+        """WHERE clause for received broadcasts the device hasn't read."""
+        return and_(
+            BroadcastNotification.id > read_cursor,
+            ~exists().where(
+                BroadcastRead.device_id == device_id,
+                BroadcastRead.broadcast_id == BroadcastNotification.id,
+            ).correlate_except(BroadcastRead),
+        )
+
+    @classmethod
+    async def _get_broadcasts(
+        cls,
+        db: AsyncSession,
+        device: Device,
+        limit: int,
+        unread_only: bool = False,
+        cursor: Optional[str] = None,
+    ) -> List[Notification]:
+        """
+        Newest received broadcasts as transient Notification views, in the
+        same (created_at DESC, API id DESC) order as personal notifications.
+        """
+        query = (
+            cls._received_broadcasts(device.id)
+            .add_columns(BroadcastRead.read_at)
+            .outerjoin(BroadcastRead, and_(
+                BroadcastRead.device_id == device.id,
+                BroadcastRead.broadcast_id == BroadcastNotification.id,
+            ))
+        )
+        if unread_only:
+            query = query.where(cls._broadcast_unread(device.id, device.broadcast_read_cursor))
+        if cursor is not None:
+            query = query.where(after_cursor(BroadcastNotification.created_at, -BroadcastNotification.id, cursor))
+        # API ids are negated, so API id DESC is broadcast id ASC
+        result = await db.execute(
+            query.order_by(BroadcastNotification.created_at.desc(), BroadcastNotification.id).limit(limit)
+        )
+
+        views = []
+        for broadcast, receipt_read_at in result.all():
+            read_at = receipt_read_at
+            if read_at is None and broadcast.id <= device.broadcast_read_cursor:
+                read_at = device.broadcast_read_cursor_at
+            views.append(broadcast.as_notification(device.id, read_at))
+        return views
+
+    @staticmethod
+    def _merge(personal: List[Notification], broadcasts: List[Notification]) -> List[Notification]:
+        """Merge two newest-first lists into one, in (created_at DESC, id DESC) order."""
+        def position(n: Notification) -> Tuple[datetime, int]:
+            # SQLite hands back naive datetimes; they're stored as UTC
+            ts = n.created_at
+            return (ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts), n.id
+
+        return sorted(personal + broadcasts, key=position, reverse=True)
+
+    @classmethod
     async def get_unread_notifications(
+        cls,
         db: AsyncSession,
         device: Device,
         limit: int = 50
@@ -365,7 +729,7 @@ class NotificationService:
             limit: Maximum number of notifications to return
 
         Returns:
-            List of unread Notification instances
+            List of unread Notification instances, personal and broadcast
         """
         result = await db.execute(
             select(Notification)
@@ -373,62 +737,155 @@ class NotificationService:
                 Notification.device_id == device.id,
                 Notification.read_at.is_(None)
             )
-            .order_by(Notification.created_at.desc())
+            .order_by(Notification.created_at.desc(), Notification.id.desc())
             .limit(limit)
         )
-        return list(result.scalars().all())
+        personal = list(result.scalars().all())
+        broadcasts = await cls._get_broadcasts(db, device, limit, unread_only=True)
+        return cls._merge(personal, broadcasts)[:limit]
 
-    @staticmethod
+    @classmethod
     async def get_all_notifications(
+        cls,
         db: AsyncSession,
         device: Device,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None,
     ) -> tuple[List[Notification], int, int]:
         """
         Get all notifications for a device with pagination.
 
+        Pages either by `cursor` (keyset, see app.services.pagination) or,
+        for older clients, by `offset`.
+
         Args:
             db: Database session
             device: Target device
             limit: Maximum number of notifications
-            offset: Number of notifications to skip
+            offset: Number of notifications to skip (ignored with a cursor)
+            cursor: (created_at, id) cursor of the last notification already seen
 
         Returns:
             Tuple of (notifications, unread_count, total_count)
+
+        Raises:
+            ValueError: If the cursor is malformed
         """
-        # Get notifications
+        if cursor is not None:
+            offset = 0
+
+        # Either source can contribute every row of the page, so take
+        # limit + offset from each and paginate the merged list
+        window = limit + offset
+        query = select(Notification).where(Notification.device_id == device.id)
+        if cursor is not None:
+            query = query.where(after_cursor(Notification.created_at, Notification.id, cursor))
         result = await db.execute(
-            select(Notification)
-            .where(Notification.device_id == device.id)
-            .order_by(Notification.created_at.desc())
-            .limit(limit)
-            .offset(offset)
+            query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(window)
         )
-        notifications = list(result.scalars().all())
+        personal = list(result.scalars().all())
+        broadcasts = await cls._get_broadcasts(db, device, window, cursor=cursor)
+        notifications = cls._merge(personal, broadcasts)[offset:offset + limit]
 
-        # Get unread count
-        from sqlalchemy import func
-        unread_result = await db.execute(
-            select(func.count(Notification.id))
-            .where(
-                Notification.device_id == device.id,
-                Notification.read_at.is_(None)
+        # Maintained counters; NULL only for devices never counted since the columns were added
+        if device.unread_notification_count is None or device.notification_count is None:
+            await cls._recount(db, device)
+
+        return notifications, device.unread_notification_count, device.notification_count
+
+    @classmethod
+    def _count_columns(cls, device_id, read_cursor):
+        """
+        (unread, total) notification count expressions for a device, personal
+        plus broadcast. Pass Device columns to correlate them in an UPDATE.
+        """
+        personal = select(func.count(Notification.id)).where(Notification.device_id == device_id)
+        received = cls._received_broadcasts(device_id).with_only_columns(func.count())
+        unread = (
+            personal.where(Notification.read_at.is_(None)).scalar_subquery()
+            + received.where(cls._broadcast_unread(device_id, read_cursor)).scalar_subquery()
+        )
+        total = personal.scalar_subquery() + received.scalar_subquery()
+        return unread, total
+
+    @staticmethod
+    async def _adjust_counts(db: AsyncSession, where, unread: int = 0, total: int = 0) -> None:
+        """
+        Add to the notification counters of the devices matching `where`.
+        Counters that are still NULL stay NULL until recounted.
+        """
+        await db.execute(
+            update(Device)
+            .where(where)
+            .values(
+                unread_notification_count=Device.unread_notification_count + unread,
+                notification_count=Device.notification_count + total,
+                last_seen_at=Device.last_seen_at,  # Not an API interaction
             )
         )
-        unread_count = unread_result.scalar() or 0
 
-        # Get total count
-        total_result = await db.execute(
-            select(func.count(Notification.id))
-            .where(Notification.device_id == device.id)
+    @classmethod
+    async def _recount(cls, db: AsyncSession, device: Device) -> None:
+        """Recount one device's notifications and store the counters."""
+        unread, total = cls._count_columns(device.id, device.broadcast_read_cursor)
+        result = await db.execute(select(unread, total))
+        unread_count, total_count = result.one()
+        await db.execute(
+            update(Device)
+            .where(Device.id == device.id)
+            .values(
+                unread_notification_count=unread_count,
+                notification_count=total_count,
+                last_seen_at=Device.last_seen_at,
+            )
         )
-        total_count = total_result.scalar() or 0
+        await db.commit()
 
-        return notifications, unread_count, total_count
+    @classmethod
+    async def reconcile_notification_counts(cls, db: AsyncSession, batch_size: int = 1000) -> int:
+        """
+        Recount every device's notification counters, correcting drift from
+        races between concurrent writers. Runs nightly in device-id batches
+        so each UPDATE holds row locks briefly.
 
-    @staticmethod
+        Returns:
+            Number of devices recounted
+        """
+        unread, total = cls._count_columns(Device.id, Device.broadcast_read_cursor)
+        recounted = 0
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(Device.id)
+                .where(Device.id > last_id)
+                .order_by(Device.id)
+                .limit(batch_size)
+            )
+            ids = list(result.scalars().all())
+            if not ids:
+                break
+            await db.execute(
+                update(Device)
+                .where(Device.id.in_(ids))
+                .values(
+                    unread_notification_count=unread,
+                    notification_count=total,
+                    last_seen_at=Device.last_seen_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            record_rows(scanned=len(ids), processed=len(ids))
+            recounted += len(ids)
+            last_id = ids[-1]
+
+        logger.info(f"Reconciled notification counters for {recounted} devices")
+        return recounted
+
+    @classmethod
     async def mark_notifications_read(
+        cls,
         db: AsyncSession,
         device: Device,
         notification_ids: List[int]
@@ -436,6 +893,8 @@ class NotificationService:
         """
         Mark notifications as read.
 
+        Positive ids are personal notifications; negative ids are broadcasts.
+
         Args:
             db: Database session
             device: Device making the request
@@ -444,66 +903,191 @@ class NotificationService:
         Returns:
             Number of notifications marked read
         """
+        now = datetime.now(timezone.utc)
+        personal_ids = [i for i in notification_ids if i > 0]
+        broadcast_ids = [-i for i in notification_ids if i < 0]
+        marked = 0
+
+        if personal_ids:
+            result = await db.execute(
+                update(Notification)
+                .where(
+                    Notification.id.in_(personal_ids),
+                    Notification.device_id == device.id,  # Security: only own notifications
+                    Notification.read_at.is_(None)
+                )
+                .values(read_at=now)
+            )
+            marked += result.rowcount
+
+        if broadcast_ids:
+            # Security: only broadcasts this device actually received
+            result = await db.execute(
+                cls._received_broadcasts(device.id)
+                .with_only_columns(BroadcastNotification.id)
+                .where(
+                    BroadcastNotification.id.in_(broadcast_ids),
+                    cls._broadcast_unread(device.id, device.broadcast_read_cursor),
+                )
+            )
+            unread_ids = list(result.scalars().all())
+            if unread_ids:
+                # A concurrent request (e.g. an app retry) may have marked some
+                # already; only the rows inserted here are newly read
+                inserted = await db.execute(
+                    _insert_fn(db)(BroadcastRead)
+                    .values([
+                        {"device_id": device.id, "broadcast_id": broadcast_id, "read_at": now}
+                        for broadcast_id in unread_ids
+                    ])
+                    .on_conflict_do_nothing(index_elements=["device_id", "broadcast_id"])
+                    .returning(BroadcastRead.broadcast_id)
+                )
+                marked += len(inserted.all())
+
+        if marked:
+            await cls._adjust_counts(db, Device.id == device.id, unread=-marked)
+        await db.commit()
+        return marked
+
+    @classmethod
+    async def mark_all_notifications_read(cls, db: AsyncSession, device: Device) -> int:
+        """
+        Mark every notification read: one UPDATE for personal rows, and the
+        broadcast cursor moved to the newest received broadcast.
+
+        Returns:
+            Number of notifications marked read
+        """
+        now = datetime.now(timezone.utc)
         result = await db.execute(
             update(Notification)
             .where(
-                Notification.id.in_(notification_ids),
-                Notification.device_id == device.id,  # Security: only own notifications
+                Notification.device_id == device.id,
                 Notification.read_at.is_(None)
             )
-            .values(read_at=datetime.now(timezone.utc))
+            .values(read_at=now)
+        )
+        marked = result.rowcount
+
+        unread = (
+            cls._received_broadcasts(device.id)
+            .where(cls._broadcast_unread(device.id, device.broadcast_read_cursor))
+            .subquery()
         )
+        unread_result = await db.execute(select(func.count(), func.max(unread.c.id)))
+        broadcast_unread, newest_id = unread_result.one()
+        if newest_id is not None:
+            device.broadcast_read_cursor = newest_id
+            device.broadcast_read_cursor_at = now
+            marked += broadcast_unread
+
+        if marked:
+            await cls._adjust_counts(db, Device.id == device.id, unread=-marked)
         await db.commit()
-        return result.rowcount
+        return marked
 
     @classmethod
-    async def send_checkout_reminder(
-        cls,
-        db: AsyncSession,
-        session: ParkingSession,
-        device: Device,
-        parking_lot_name: str
-    ) -> bool:
+    async def send_checkout_reminders(cls, db: AsyncSession, sessions: List[ParkingSession]) -> int:
         """
-        Send a checkout reminder notification.
+        Send checkout reminders for many sessions at once.
+
+        The reminder_sent flags, in-app notifications and counter updates are
+        written in bulk and committed together; pushes then go out on the
+        reminder lane (FCM ones in send_each batches), and tokens the
+        providers report dead are pruned. Sessions already reminded (e.g. by
+        a concurrent run) are skipped.
 
         Args:
             db: Database session
-            session: The parking session
-            device: The device to notify
-            parking_lot_name: Name of the parking lot
+            sessions: Due sessions with device and parking_lot loaded
 
         Returns:
-            True if reminder was sent
+            Number of reminders sent
         """
-        title = "🚗 Still parked?"
-        message = f"You've been parked at {parking_lot_name} for 3 hours. Don't forget to check out when you leave!"
+        if not sessions:
+            return 0
 
-        # Create in-app notification
-        await cls.create_notification(
-            db=db,
-            device=device,
-            notification_type=NotificationType.CHECKOUT_REMINDER,
-            title=title,
-            message=message,
-            parking_lot_id=session.parking_lot_id,
+        # Claim the sessions first so a concurrent run can't remind them twice
+        claimed = await db.execute(
+            update(ParkingSession)
+            .where(
+                ParkingSession.id.in_([session.id for session in sessions]),
+                ParkingSession.reminder_sent == False,  # Not already reminded
+            )
+            .values(reminder_sent=True)
+            .returning(ParkingSession.id)
         )
+        claimed_ids = set(claimed.scalars().all())
+        sessions = [session for session in sessions if session.id in claimed_ids]
+        record_rows(processed=len(sessions))
+        if not sessions:
+            await db.commit()
+            return 0
 
-        # Try push notification
-        if device.is_push_enabled and device.push_token:
-            await cls.send_push_notification(
-                push_token=device.push_token,
-                title=title,
-                body=message,
-                data={
-                    "type": "CHECKOUT_REMINDER",
-                    "parking_lot_id": session.parking_lot_id,
-                    "session_id": session.id,
-                }
+        title = "🚗 Still parked?"
+        messages = {
+            session.id: (
+                f"You've been parked at {session.parking_lot.name} for 3 hours. "
+                "Don't forget to check out when you leave!"
             )
+            for session in sessions
+        }
 
-        # Mark reminder as sent
-        session.reminder_sent = True
+        await db.execute(insert(Notification), [
+            {
+                "device_id": session.device_id,
+                "notification_type": NotificationType.CHECKOUT_REMINDER,
+                "title": title,
+                "message": messages[session.id],
+                "parking_lot_id": session.parking_lot_id,
+            }
+            for session in sessions
+        ])
+        # A device has one active session, so this is normally a single UPDATE
+        per_device = Counter(session.device_id for session in sessions)
+        for count in set(per_device.values()):
+            device_ids = [device_id for device_id, n in per_device.items() if n == count]
+            await cls._adjust_counts(db, Device.id.in_(device_ids), unread=count, total=count)
         await db.commit()
+        await announce_notifications(list(per_device))
 
-        return True
+        push_sessions = [
+            session for session in sessions
+            if session.device.is_push_enabled and session.device.push_token
+        ]
+        # The bodies differ per session, but FCM still takes them in one batch
+        results: Dict[str, PushResult] = {}
+        try:
+            if push_sessions:
+                results = await cls.send_push_messages([
+                    PushMessage(
+                        session.device.push_token,
+                        title,
+                        messages[session.id],
+                        {
+                            "type": "CHECKOUT_REMINDER",
+                            "parking_lot_id": session.parking_lot_id,
+                            "session_id": session.id,
+                        },
+                        session.device.push_platform,
+                    )
+                    for session in push_sessions
+                ], lane=PushLane.REMINDER)
+        except Exception as e:
+            logger.error(f"Checkout reminder pushes failed for {len(push_sessions)} session(s): {e}")
+        dead_tokens = {token for token, result in results.items() if result.unregistered}
+        dead_token_lots = {
+            session.parking_lot_id for session in push_sessions if session.device.push_token in dead_tokens
+        }
+        sent = sum(1 for result in results.values() if result.success)
+        record_pushes(sent=sent, failed=len(push_sessions) - sent)
+
+        # The reminders are committed; a failed prune is retried on the next dead send
+        try:
+            if await cls.prune_dead_tokens(db, results):
+                await invalidate_push_targets(*dead_token_lots)
+        except Exception as e:
+            logger.warning(f"Could not prune dead tokens after checkout reminders: {e}")
+
+        return len(sessions)
@@ -0,0 +1,128 @@
+"""
+Wake-ups for long-polling notification clients.
+
+GET /notifications/unread?wait=N parks the request on an asyncio.Event in
+this process's waiter registry. Whoever commits new notifications calls
+announce_notifications(), which wakes local waiters and publishes the
+device ids on a Redis channel so every other worker (and a separate outbox
+process) wakes its waiters too.
+
+Without Redis only waiters in the announcing process are woken; the rest
+simply time out and the client polls again, as before long-polling.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+from app.services.cache import cache_publish, cache_pubsub
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_CHANNEL = "notifications:new"
+
+
+class WaiterRegistry:
+    """Events of parked long-poll requests, keyed by device id."""
+
+    __slots__ = ("_waiters",)
+
+    def __init__(self):
+        self._waiters: Dict[int, Set[asyncio.Event]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(events) for events in self._waiters.values())
+
+    @contextmanager
+    def register(self, device_id: int) -> Iterator[asyncio.Event]:
+        """
+        Register a waiter for the duration of the block. Register before
+        checking for unread notifications so nothing committed in between
+        is missed.
+        """
+        event = asyncio.Event()
+        self._waiters.setdefault(device_id, set()).add(event)
+        try:
+            yield event
+        finally:
+            events = self._waiters.get(device_id)
+            if events is not None:
+                events.discard(event)
+                if not events:
+                    del self._waiters[device_id]
+
+    def wake(self, device_ids: Iterable[int]) -> int:
+        """Set every waiting event for these devices; returns how many were woken."""
+        woken = 0
+        for device_id in device_ids:
+            for event in self._waiters.get(device_id, ()):
+                event.set()
+                woken += 1
+        return woken
+
+
+# Process-wide registry shared by every request handler
+notification_waiters = WaiterRegistry()
+
+_listener_task: Optional[asyncio.Task] = None
+_pubsub = None
+
+
+async def wait_for_notification(event: asyncio.Event, timeout: float) -> bool:
+    """Wait until the event is set or `timeout` elapses; True if it was set."""
+    try:
+        await asyncio.wait_for(event.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+async def announce_notifications(device_ids: Iterable[int]) -> None:
+    """Wake long-polls for these devices here and in every other worker."""
+    device_ids = list(device_ids)
+    if not device_ids:
+        return
+    notification_waiters.wake(device_ids)
+    await cache_publish(NOTIFICATION_CHANNEL, {"device_ids": device_ids})
+
+
+async def _listen(pubsub) -> None:
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            notification_waiters.wake(json.loads(message["data"])["device_ids"])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Waiters still time out and clients re-poll, so this only costs latency
+        logger.error(f"Notification waiter subscriber stopped: {e}")
+
+
+async def start_notification_listener() -> None:
+    global _listener_task, _pubsub
+    _pubsub = cache_pubsub()
+    if _pubsub is None:
+        logger.warning("Redis not configured — long-polls only woken by this process")
+        return
+    try:
+        await _pubsub.subscribe(NOTIFICATION_CHANNEL)
+        _listener_task = asyncio.create_task(_listen(_pubsub))
+    except Exception as e:
+        logger.error(f"Failed to start notification listener: {e}")
+        await stop_notification_listener()
+
+
+async def stop_notification_listener() -> None:
+    global _listener_task, _pubsub
+    if _listener_task is not None:
+        _listener_task.cancel()
+        _listener_task = None
+    if _pubsub is not None:
+        try:
+            await _pubsub.aclose()
+        except Exception:
+            pass
+        _pubsub = None
@@ -0,0 +1,287 @@
+"""
+Notification outbox.
+
+Request handlers enqueue NotificationJob rows in the same transaction as the
+event that caused them; a pool of workers claims due jobs, runs them with
+their own DB sessions and retries failures with exponential backoff.
+Finished jobs are deleted by the nightly notification retention job.
+
+The pool runs inside each web process by default. To keep heavy fan-outs
+off the web workers entirely, set OUTBOX_WORKER_CONCURRENCY=0 on the web
+service and run `python -m app.services.outbox` as a separate process.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.notification_job import NotificationJob, NotificationJobType, NotificationJobStatus
+from app.services.notification import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed job stays invisible to other workers
+CLAIM_LEASE_SECONDS = 300
+
+# Retry backoff: 5s, 10s, 20s, ... capped at 5 minutes
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 300
+
+
+async def _run_lot_alert(db: AsyncSession, job: NotificationJob) -> None:
+    payload = job.payload
+    # Jobs enqueued before reported_at was added to the payload aren't traced
+    reported_at = payload.get("reported_at")
+    await NotificationService.notify_parked_users(
+        db=db,
+        parking_lot_id=payload["parking_lot_id"],
+        parking_lot_name=payload["parking_lot_name"],
+        parking_lot_code=payload.get("parking_lot_code", ""),
+        sighting_reported_at=datetime.fromisoformat(reported_at) if reported_at else None,
+        job_id=job.id,  # A retry reuses the broadcast an earlier attempt wrote
+    )
+
+
+JOB_HANDLERS: Dict[NotificationJobType, Callable[[AsyncSession, NotificationJob], Awaitable[None]]] = {
+    NotificationJobType.LOT_ALERT: _run_lot_alert,
+}
+
+
+def enqueue_job(db: AsyncSession, job_type: NotificationJobType, payload: dict) -> NotificationJob:
+    """
+    Add a job to the caller's session. Nothing is written until the caller
+    commits, so the job exists if and only if the triggering change does.
+    """
+    job = NotificationJob(
+        job_type=job_type,
+        payload=payload,
+        status=NotificationJobStatus.PENDING,
+    )
+    db.add(job)
+    return job
+
+
+def backoff_seconds(attempts: int) -> int:
+    return min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+
+
+async def claim_jobs(db: AsyncSession, limit: int = 1) -> List[NotificationJob]:
+    """
+    Claim up to `limit` due jobs, including PROCESSING jobs whose lease has
+    expired (their worker died). SKIP LOCKED lets concurrent workers claim
+    disjoint jobs without blocking each other.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(NotificationJob)
+        .where(or_(
+            and_(
+                NotificationJob.status == NotificationJobStatus.PENDING,
+                NotificationJob.available_at <= now,
+            ),
+            and_(
+                NotificationJob.status == NotificationJobStatus.PROCESSING,
+                NotificationJob.locked_until < now,
+            ),
+        ))
+        .order_by(NotificationJob.available_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = list(result.scalars().all())
+    for job in jobs:
+        job.status = NotificationJobStatus.PROCESSING
+        job.attempts += 1
+        job.locked_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    await db.commit()
+    return jobs
+
+
+async def _finish_job(
+    session_factory: async_sessionmaker,
+    job: NotificationJob,
+    error: Optional[Exception],
+) -> None:
+    now = datetime.now(timezone.utc)
+    if error is None:
+        values = {"status": NotificationJobStatus.DONE, "completed_at": now, "locked_until": None}
+    elif job.attempts >= settings.outbox_max_attempts:
+        values = {
+            "status": NotificationJobStatus.FAILED,
+            "completed_at": now,
+            "locked_until": None,
+            "last_error": str(error)[:1000],
+        }
+    else:
+        values = {
+            "status": NotificationJobStatus.PENDING,
+            "available_at": now + timedelta(seconds=backoff_seconds(job.attempts)),
+            "locked_until": None,
+            "last_error": str(error)[:1000],
+        }
+
+    async with session_factory() as db:
+        # Only while our claim is current: once the lease expires another
+        # worker may have reclaimed the job (bumping attempts)
+        result = await db.execute(
+            update(NotificationJob)
+            .where(
+                NotificationJob.id == job.id,
+                NotificationJob.status == NotificationJobStatus.PROCESSING,
+                NotificationJob.attempts == job.attempts,
+            )
+            .values(**values)
+        )
+        await db.commit()
+    if result.rowcount == 0:
+        logger.warning(f"Outbox job {job.id} attempt {job.attempts} finished after its claim was taken over")
+
+
+async def run_job(session_factory: async_sessionmaker, job: NotificationJob) -> bool:
+    """Run one claimed job in a fresh session and record the outcome."""
+    handler = JOB_HANDLERS.get(job.job_type)
+    error: Optional[Exception] = None
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job type {job.job_type}")
+        async with session_factory() as db:
+            await handler(db, job)
+    except Exception as e:
+        error = e
+        logger.error(f"Outbox job {job.id} ({job.job_type.value}) attempt {job.attempts} failed: {e}")
+
+    await _finish_job(session_factory, job, error)
+    return error is None
+
+
+async def process_due_jobs(session_factory: async_sessionmaker, limit: int = 100) -> int:
+    """Claim and run due jobs one at a time until none are left or `limit` is hit."""
+    processed = 0
+    while processed < limit:
+        async with session_factory() as db:
+            jobs = await claim_jobs(db, limit=1)
+        if not jobs:
+            break
+        await run_job(session_factory, jobs[0])
+        processed += 1
+    return processed
+
+
+class OutboxWorkerPool:
+    """
+    Fixed-size pool of asyncio workers draining the outbox.
+
+    Workers poll every `poll_interval` seconds; wake() lets a local enqueue
+    skip the wait so alerts aren't delayed by the poll interval.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        concurrency: int,
+        poll_interval: float,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"outbox-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Outbox worker pool started with {self.concurrency} worker(s)")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    jobs = await claim_jobs(db, limit=1)
+                if jobs:
+                    await run_job(self.session_factory, jobs[0])
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker {index} error: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Process-wide pool, started from the app lifespan (or main() below)
+_pool: Optional[OutboxWorkerPool] = None
+
+
+def start_outbox_workers(session_factory: async_sessionmaker, concurrency: int) -> None:
+    global _pool
+    if concurrency <= 0:
+        logger.info("Outbox workers disabled in this process")
+        return
+    _pool = OutboxWorkerPool(session_factory, concurrency, settings.outbox_poll_interval_seconds)
+    _pool.start()
+
+
+async def stop_outbox_workers() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.stop()
+        _pool = None
+
+
+def wake_outbox_workers() -> None:
+    """Nudge local workers after enqueueing; a no-op when none run here."""
+    if _pool is not None:
+        _pool.wake()
+
+
+async def main() -> None:
+    """Entry point for a dedicated outbox worker process."""
+    from app.database import AsyncSessionLocal, close_db
+    from app.services.cache import init_cache, close_cache
+    from app.services.notification import init_firebase
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    init_firebase()
+    if settings.redis_host:
+        init_cache(settings.redis_host, settings.redis_port)
+
+    start_outbox_workers(AsyncSessionLocal, settings.outbox_worker_process_concurrency)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stop_outbox_workers()
+        await close_cache()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
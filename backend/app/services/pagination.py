@@ -0,0 +1,43 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the (timestamp, id) of the last row on a page, encoded as an
+opaque URL-safe string. The next page is everything strictly after it in
+(timestamp DESC, id DESC) order, which an index on the timestamp column
+answers without scanning skipped rows the way OFFSET does.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Encode the position of a row as an opaque cursor."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def after_cursor(timestamp_col, id_col, cursor: str) -> ColumnElement:
+    """WHERE clause selecting rows after `cursor` in (timestamp DESC, id DESC) order."""
+    timestamp, row_id = decode_cursor(cursor)
+    return tuple_(timestamp_col, id_col) < tuple_(timestamp, row_id)
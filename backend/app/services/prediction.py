@@ -24,6 +24,7 @@ from sqlalchemy import select
 from app.models.taps_sighting import TapsSighting
 from app.models.parking_lot import ParkingLot
 from app.schemas.prediction import PredictionResponse
+from app.services.sighting_index import sighting_index
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +66,20 @@ class PredictionService:
                 now, "TAPS likely not ticketing right now."
             )
 
+        # Answer from the in-memory index when it covers all of today
+        if sighting_index.covers(today_start_utc):
+            latest = sighting_index.latest(today_start_utc, lot_id=lot_id)
+            if latest is None:
+                lot_name = None
+                if lot_id is not None:
+                    lot_obj = await db.get(ParkingLot, lot_id)
+                    lot_name = lot_obj.name if lot_obj else None
+                return cls._build_no_sighting_response(now, lot_name=lot_name)
+            lot = await db.get(ParkingLot, latest.parking_lot_id)
+            if lot is not None:
+                hours_ago = (now - latest.reported_at).total_seconds() / 3600
+                return cls._build_sighting_response(now, hours_ago, latest, lot)
+
         # Find the most recent sighting from today, filtered by lot if provided
         query = (
             select(TapsSighting, ParkingLot)
@@ -0,0 +1,103 @@
+"""
+Priority lanes for push delivery.
+
+TAPS alerts and checkout reminders share the APNs connections and the
+Firebase credentials. Every send holds a slot of one process-wide cap
+(apns_max_concurrent_sends) and runs in a lane; the reminder lane also has
+a smaller budget of its own, and yields to the alert lane: a reminder send
+doesn't start while any alert send is waiting or in flight. Reminders
+already in flight finish normally; they are never preempted, and their
+slots count against the cap.
+
+Budgets are per process, like the APNs client pool they protect.
+"""
+
+import asyncio
+import enum
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from app.config import settings
+from app.services.metrics import latency
+
+
+class PushLane(str, enum.Enum):
+    """Delivery priority of a push send."""
+    ALERT = "alert"  # Time-sensitive TAPS alerts
+    REMINDER = "reminder"  # Checkout reminders and other background pushes
+
+
+class LaneGate:
+    """
+    A shared send cap, optional per-lane budgets under it, and the rule that
+    reminders wait for alerts.
+    """
+
+    def __init__(self, max_sends: int, budgets: Dict[PushLane, int]):
+        self._shared = asyncio.Semaphore(max_sends)
+        self._semaphores = {lane: asyncio.Semaphore(n) for lane, n in budgets.items()}
+        self._alerts_pending = 0
+        self._alerts_idle = asyncio.Event()
+        self._alerts_idle.set()
+
+    @property
+    def alerts_pending(self) -> int:
+        return self._alerts_pending
+
+    @asynccontextmanager
+    async def slot(self, lane: PushLane) -> AsyncIterator[None]:
+        """Hold one send slot in `lane` for the duration of the block."""
+        start = time.perf_counter()
+        semaphore = self._semaphores.get(lane)
+
+        if lane is PushLane.ALERT:
+            # Counted from the moment it queues, so new reminders hold off immediately
+            self._alerts_pending += 1
+            self._alerts_idle.clear()
+            try:
+                async with self._shared:
+                    latency("push.lane_wait.alert").observe(time.perf_counter() - start)
+                    yield
+            finally:
+                self._alerts_pending -= 1
+                if self._alerts_pending == 0:
+                    self._alerts_idle.set()
+            return
+
+        while True:
+            await self._alerts_idle.wait()
+            if semaphore is not None:
+                await semaphore.acquire()
+            await self._shared.acquire()
+            # An alert may have queued while this waited for the semaphores
+            if self._alerts_idle.is_set():
+                break
+            self._shared.release()
+            if semaphore is not None:
+                semaphore.release()
+        try:
+            latency(f"push.lane_wait.{lane.value}").observe(time.perf_counter() - start)
+            yield
+        finally:
+            self._shared.release()
+            if semaphore is not None:
+                semaphore.release()
+
+
+# Created lazily so the semaphores bind to the running loop
+_gate: Optional[LaneGate] = None
+
+
+def get_lane_gate() -> LaneGate:
+    global _gate
+    if _gate is None:
+        _gate = LaneGate(settings.apns_max_concurrent_sends, {
+            PushLane.REMINDER: settings.push_reminder_max_concurrent_sends,
+        })
+    return _gate
+
+
+def lane_slot(lane: PushLane):
+    """Shortcut for get_lane_gate().slot(lane)."""
+    return get_lane_gate().slot(lane)
@@ -0,0 +1,154 @@
+"""
+Per-lot push target index.
+
+For each lot, a Redis set holds one member per device with an active
+parking session: "<device_id>:<platform>:<token>". Devices with push
+disabled have empty platform and token; they still get in-app alerts.
+notify_parked_users reads the set with a single SMEMBERS instead of
+joining sessions to devices.
+
+Check-in/out and push-token changes apply SADD/SREM deltas, each
+refreshing the set's TTL, so a lot with any parking activity stays cached.
+Deltas only apply to a set that exists: one landing on an expired key is
+dropped rather than leaving a partial set behind. A set is only trusted
+once a rebuild from the DB has added the COMPLETE marker.
+
+A rebuild registers a token in the lot's building set and creates the key
+(with the BUILDING marker) before reading the DB, then unions its rows
+into the key, so a check-in committed while it runs is never lost. A
+check-out or token change can't remove a member the rebuild hasn't added
+yet, so a removal while any rebuild is registered drops the key and the
+building set instead; the rebuild then finds its token gone and caches
+nothing, and the next read rebuilds from a DB that reflects the removal.
+Without Redis every read goes to the DB.
+"""
+
+import uuid
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.device import Device
+from app.models.parking_session import ParkingSession
+from app.services.cache import (
+    TTL_PUSH_TARGETS,
+    cache_delete,
+    cache_delete_pattern,
+    cache_set_add,
+    cache_set_add_existing,
+    cache_set_add_guarded,
+    cache_set_members,
+    cache_set_remove,
+)
+
+COMPLETE = "*"
+BUILDING = "+"
+MARKERS = (COMPLETE, BUILDING)
+
+
+KEY_PREFIX = "lot_push_targets:"
+
+# Tokens of rebuilds in progress; outlives any DB read, but lets the lot be
+# cached again soon after a rebuild that died
+BUILDING_TTL = 60
+
+
+def _key(lot_id: int) -> str:
+    return f"{KEY_PREFIX}{lot_id}"
+
+
+def _building_key(lot_id: int) -> str:
+    return f"{KEY_PREFIX}{lot_id}:building"
+
+
+class PushTarget(NamedTuple):
+    """A device parked at a lot and where (if anywhere) to push it."""
+    device_id: int
+    platform: Optional[str]
+    token: Optional[str]
+
+    def to_member(self) -> str:
+        return f"{self.device_id}:{self.platform or ''}:{self.token or ''}"
+
+    @classmethod
+    def from_member(cls, member: str) -> "PushTarget":
+        device_id, platform, token = member.split(":", 2)  # FCM tokens contain colons
+        return cls(int(device_id), platform or None, token or None)
+
+    @classmethod
+    def for_device(cls, device_id: int, push_token: Optional[str], push_platform: Optional[str],
+                   is_push_enabled: bool) -> "PushTarget":
+        if is_push_enabled and push_token:
+            return cls(device_id, push_platform, push_token)
+        return cls(device_id, None, None)
+
+
+def device_push_target(device: Device) -> PushTarget:
+    return PushTarget.for_device(device.id, device.push_token, device.push_platform, device.is_push_enabled)
+
+
+async def get_lot_push_targets(db: AsyncSession, lot_id: int) -> List[PushTarget]:
+    """Everyone with an active session at the lot, from Redis when the set is complete."""
+    members = await cache_set_members(_key(lot_id))
+    if members and COMPLETE in members:
+        return [PushTarget.from_member(m) for m in members if m not in MARKERS]
+
+    # Register first so a removal racing the DB read voids this rebuild, then
+    # create the key so check-in deltas racing it land in the set
+    token = uuid.uuid4().hex
+    await cache_set_add(_building_key(lot_id), [token], ttl=BUILDING_TTL)
+    await cache_set_add(_key(lot_id), [BUILDING], ttl=TTL_PUSH_TARGETS)
+    result = await db.execute(
+        select(Device.id, Device.push_token, Device.push_platform, Device.is_push_enabled)
+        .join(ParkingSession, ParkingSession.device_id == Device.id)
+        .where(
+            ParkingSession.parking_lot_id == lot_id,
+            ParkingSession.checked_out_at.is_(None),
+        )
+    )
+    targets = [PushTarget.for_device(*row) for row in result.all()]
+    await cache_set_add_guarded(
+        _key(lot_id), [t.to_member() for t in targets] + [COMPLETE],
+        _building_key(lot_id), token, TTL_PUSH_TARGETS,
+    )
+    return targets
+
+
+async def add_push_target(lot_id: int, device: Device) -> None:
+    """Call after a check-in commits."""
+    await cache_set_add_existing(_key(lot_id), [device_push_target(device).to_member()], TTL_PUSH_TARGETS)
+
+
+async def remove_push_target(lot_id: int, device: Device) -> None:
+    """Call after a check-out commits."""
+    await cache_set_remove(
+        _key(lot_id), [device_push_target(device).to_member()], _building_key(lot_id), TTL_PUSH_TARGETS,
+    )
+
+
+async def replace_push_target(db: AsyncSession, device: Device, old: PushTarget) -> None:
+    """Call after a device's push settings change; updates the lot it is parked at, if any."""
+    new = device_push_target(device)
+    if new == old:
+        return
+    result = await db.execute(
+        select(ParkingSession.parking_lot_id).where(
+            ParkingSession.device_id == device.id,
+            ParkingSession.checked_out_at.is_(None),
+        )
+    )
+    for lot_id in result.scalars().all():
+        await cache_set_remove(_key(lot_id), [old.to_member()], _building_key(lot_id), TTL_PUSH_TARGETS)
+        await cache_set_add_existing(_key(lot_id), [new.to_member()], TTL_PUSH_TARGETS)
+
+
+async def invalidate_push_targets(*lot_ids: int) -> None:
+    """
+    Drop lot sets, voiding rebuilds in progress, so the next read rebuilds
+    them; no ids drops every lot.
+    """
+    if lot_ids:
+        await cache_delete(*(key for lot_id in lot_ids for key in (_key(lot_id), _building_key(lot_id))))
+    else:
+        await cache_delete_pattern(f"{KEY_PREFIX}*")
@@ -6,6 +6,7 @@ parked for more than 3 hours and sends them a reminder to check out.
 """
 
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,7 +16,12 @@ from sqlalchemy.orm import selectinload
 from app.config import settings
 from app.models.parking_session import ParkingSession
 from app.models.parking_lot import ParkingLot
+from app.services.cache import cache_delete
+from app.services.job_metrics import record_error, record_rows
+from app.services.metrics import increment, latency
 from app.services.notification import NotificationService
+from app.services.push_targets import invalidate_push_targets
+from app.services.reminder_queue import cancel_reminder, enqueue_pending_reminders
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +34,7 @@ class ReminderService:
     @staticmethod
     async def process_pending_reminders(db: AsyncSession) -> int:
         """
-        Find sessions that need reminders and send them.
+        Find sessions that need reminders and send them in one batch.
 
         Criteria:
         - Session is active (not checked out)
@@ -59,25 +65,20 @@ class ReminderService:
             )
         )
         sessions = result.scalars().all()
-
-        reminders_sent = 0
-
-        for session in sessions:
-            try:
-                await NotificationService.send_checkout_reminder(
-                    db=db,
-                    session=session,
-                    device=session.device,
-                    parking_lot_name=session.parking_lot.name,
-                )
-                reminders_sent += 1
-                logger.info(
-                    f"Sent checkout reminder for session {session.id} "
-                    f"at {session.parking_lot.name}"
-                )
-            except Exception as e:
-                logger.error(f"Failed to send reminder for session {session.id}: {e}")
-
+        record_rows(scanned=len(sessions))
+        if not sessions:
+            return 0
+
+        try:
+            reminders_sent = await NotificationService.send_checkout_reminders(db, list(sessions))
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to send {len(sessions)} checkout reminder(s): {e}")
+            record_error(e)
+            return 0
+
+        if reminders_sent:
+            logger.info(f"Sent {reminders_sent} checkout reminder(s)")
         return reminders_sent
 
     @staticmethod
@@ -88,19 +89,62 @@ class ReminderService:
         Called nightly at 10 PM PT to close sessions where users forgot to
         check out, preventing stale counts in active_parkers.
 
+        Sessions are closed in batches of settings.auto_checkout_batch_size,
+        one transaction each. After every batch the lot stats and push
+        targets of just the lots it touched are invalidated. Each batch is
+        logged with its duration and row count, and exported as the
+        auto_checkout.batch latency and auto_checkout.sessions_closed
+        counter in GET /metrics.
+
         Args:
             db: Database session
 
         Returns:
             Number of sessions closed
         """
-        result = await db.execute(
-            update(ParkingSession)
-            .where(ParkingSession.checked_out_at.is_(None))
-            .values(checked_out_at=datetime.now(timezone.utc))
-        )
-        await db.commit()
-        closed = result.rowcount
+        checkout_time = datetime.now(timezone.utc)
+        batch_size = settings.auto_checkout_batch_size
+        closed = 0
+
+        while True:
+            start = time.perf_counter()
+            batch = (
+                select(ParkingSession.id)
+                .where(ParkingSession.checked_out_at.is_(None))
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await db.execute(
+                update(ParkingSession)
+                .where(
+                    ParkingSession.id.in_(batch),
+                    ParkingSession.checked_out_at.is_(None),  # Checked out since the subquery ran
+                )
+                .values(checked_out_at=checkout_time)
+                .returning(ParkingSession.id, ParkingSession.parking_lot_id)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await db.commit()
+            elapsed = time.perf_counter() - start
+            latency("auto_checkout.batch").observe(elapsed)
+            increment("auto_checkout.sessions_closed", len(rows))
+            record_rows(scanned=len(rows), processed=len(rows))
+            if not rows:
+                break
+
+            lot_ids = sorted({lot_id for _, lot_id in rows})
+            await cache_delete(*(f"lot_stats:{lot_id}" for lot_id in lot_ids))
+            await invalidate_push_targets(*lot_ids)
+            await cancel_reminder(*(session_id for session_id, _ in rows))
+            closed += len(rows)
+            logger.info(
+                f"Auto-checkout batch closed {len(rows)} session(s) "
+                f"at {len(lot_ids)} lot(s) in {elapsed * 1000:.0f}ms"
+            )
+            if len(rows) < batch_size:
+                break
+
         logger.info(f"Auto-checkout closed {closed} expired session(s)")
         return closed
 
@@ -116,5 +160,8 @@ async def run_reminder_job(db: AsyncSession):
     try:
         count = await ReminderService.process_pending_reminders(db)
         logger.info(f"Checkout reminder job completed: {count} reminders sent")
+        # Re-queue sessions whose queued reminder was lost (no-op without Redis)
+        await enqueue_pending_reminders(db)
     except Exception as e:
         logger.error(f"Checkout reminder job failed: {e}")
+        record_error(e)
@@ -0,0 +1,161 @@
+"""
+Delayed checkout reminders.
+
+Check-in schedules the session's reminder in a Redis sorted set scored by
+its due time, and check-out removes it. A poller in each process pops due
+entries and sends them as one batch. Each entry is popped by exactly one
+process. Reminders go out within REMINDER_QUEUE_POLL_SECONDS of being due,
+and parking_sessions is only queried when something is actually due.
+
+Without Redis the scheduler's 5-minute scan sends reminders as before. With
+Redis the scan runs hourly as a backstop and re-seeds the queue, in case
+entries were lost (e.g. Redis restarted).
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models.parking_session import ParkingSession
+from app.services.cache import cache_available, cache_zadd, cache_zpop_due, cache_zrem
+from app.services.job_metrics import job_run, record_error, record_rows
+from app.services.notification import NotificationService
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "reminders:due"
+
+# Each poll is instrumented as a run of this job (see job_metrics)
+POLLER_JOB_ID = "reminder_queue"
+
+# Sessions popped and reminded per poll
+BATCH_SIZE = 500
+
+# A batch that failed to send is retried this long after
+RETRY_DELAY_SECONDS = 60
+
+_poller_task: Optional[asyncio.Task] = None
+
+
+def reminder_due_at(checked_in_at: datetime) -> datetime:
+    """When a session checked in at `checked_in_at` is due its reminder."""
+    if checked_in_at.tzinfo is None:
+        checked_in_at = checked_in_at.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+    return checked_in_at + timedelta(hours=settings.parking_reminder_hours)
+
+
+async def schedule_reminder(session: ParkingSession) -> None:
+    """Queue the checkout reminder for a new session; a no-op without Redis."""
+    due_at = reminder_due_at(session.checked_in_at)
+    await cache_zadd(QUEUE_KEY, {str(session.id): due_at.timestamp()})
+
+
+async def cancel_reminder(*session_ids: int) -> None:
+    """Call after sessions are checked out."""
+    await cache_zrem(QUEUE_KEY, [str(session_id) for session_id in session_ids])
+
+
+async def enqueue_pending_reminders(db: AsyncSession) -> int:
+    """
+    Queue every active session that hasn't been reminded yet. Sessions
+    already queued keep their due time. Returns how many were found.
+    """
+    if not cache_available():
+        return 0
+    result = await db.execute(
+        select(ParkingSession.id, ParkingSession.checked_in_at).where(
+            ParkingSession.checked_out_at.is_(None),
+            ParkingSession.reminder_sent == False,  # Reminder not yet sent
+        )
+    )
+    rows = result.all()
+    record_rows(scanned=len(rows))
+    await cache_zadd(
+        QUEUE_KEY,
+        {str(session_id): reminder_due_at(checked_in_at).timestamp() for session_id, checked_in_at in rows},
+        nx=True,
+    )
+    return len(rows)
+
+
+async def process_due_reminders(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """Pop reminders that are due and send them. Returns the number sent."""
+    now = now or datetime.now(timezone.utc)
+    popped = await cache_zpop_due(QUEUE_KEY, now.timestamp(), BATCH_SIZE)
+    if not popped:
+        return 0
+
+    session_ids: List[int] = [int(member) for member in popped]
+    try:
+        result = await db.execute(
+            select(ParkingSession)
+            .where(
+                ParkingSession.id.in_(session_ids),
+                ParkingSession.checked_out_at.is_(None),  # Auto-checkout doesn't dequeue
+                ParkingSession.reminder_sent == False,  # Reminder not yet sent
+            )
+            .options(
+                selectinload(ParkingSession.device),
+                selectinload(ParkingSession.parking_lot),
+            )
+        )
+        sessions = list(result.scalars().all())
+        record_rows(scanned=len(sessions))
+        return await NotificationService.send_checkout_reminders(db, sessions)
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Failed to send {len(session_ids)} queued checkout reminder(s): {e}")
+        record_error(e)
+        # Requeue everything popped; ones already sent or checked out are
+        # filtered out again on the retry
+        retry_at = (now + timedelta(seconds=RETRY_DELAY_SECONDS)).timestamp()
+        await cache_zadd(QUEUE_KEY, {str(session_id): retry_at for session_id in session_ids})
+        return 0
+
+
+async def _poll(session_factory: async_sessionmaker) -> None:
+    while True:
+        sent = 0
+        try:
+            async with job_run(POLLER_JOB_ID), session_factory() as db:
+                sent = await process_due_reminders(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Reminder queue poll failed: {e}")
+        if sent:
+            logger.info(f"Sent {sent} queued checkout reminder(s)")
+        # A full batch means more may be due already
+        if sent < BATCH_SIZE:
+            await asyncio.sleep(settings.reminder_queue_poll_seconds)
+
+
+async def start_reminder_queue(session_factory: async_sessionmaker) -> None:
+    global _poller_task
+    if not cache_available():
+        logger.warning("Redis not configured — checkout reminders sent by the periodic scan")
+        return
+    try:
+        async with session_factory() as db:
+            await enqueue_pending_reminders(db)
+    except Exception as e:
+        # The hourly backstop scan re-seeds the queue
+        logger.error(f"Failed to seed reminder queue: {e}")
+    _poller_task = asyncio.create_task(_poll(session_factory))
+
+
+async def stop_reminder_queue() -> None:
+    global _poller_task
+    if _poller_task is not None:
+        _poller_task.cancel()
+        try:
+            await _poller_task
+        except asyncio.CancelledError:
+            pass
+        _poller_task = None
@@ -0,0 +1,252 @@
+"""
+Retention service for keeping hot tables small.
+
+The feed, rate limit and predictions only read the last few hours of
+taps_sightings and votes. Rows older than the retention window are folded
+into per-lot hourly rollups and deleted, in batches, so those tables (and
+their indexes) stay bounded while long-range analytics read the rollups.
+
+Notifications are only useful for a few days: read ones and lot-wide
+broadcasts past their retention window are deleted outright.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, delete, update, func, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.taps_sighting import TapsSighting
+from app.models.vote import Vote, VoteType
+from app.models.sighting_rollup import SightingHourlyRollup
+from app.models.device import Device
+from app.models.notification import Notification
+from app.models.broadcast_notification import BroadcastNotification, BroadcastRead
+from app.models.notification_job import NotificationJob, NotificationJobStatus
+from app.services.job_metrics import record_rows
+from app.services.metrics import increment, timed
+
+logger = logging.getLogger(__name__)
+
+
+def _insert_fn(db: AsyncSession):
+    """Return dialect-appropriate insert (PostgreSQL in prod, SQLite in tests)."""
+    try:
+        dialect = db.get_bind().dialect.name
+    except Exception:
+        dialect = "postgresql"
+    return sqlite_insert if dialect == "sqlite" else pg_insert
+
+
+def _hour_start(reported_at: datetime) -> datetime:
+    """Truncate to the UTC hour (SQLite returns naive UTC datetimes)."""
+    if reported_at.tzinfo is None:
+        reported_at = reported_at.replace(tzinfo=timezone.utc)
+    return reported_at.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class RetentionService:
+    """
+    Service for rolling up and pruning old rows.
+    """
+
+    @staticmethod
+    async def _archive_sighting_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+        """Roll up and delete one batch of sightings older than cutoff. Commits."""
+        result = await db.execute(
+            select(TapsSighting.id, TapsSighting.parking_lot_id, TapsSighting.reported_at)
+            .where(TapsSighting.reported_at < cutoff)
+            .order_by(TapsSighting.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        sighting_ids = [row.id for row in rows]
+        bucket_of = {row.id: (row.parking_lot_id, _hour_start(row.reported_at)) for row in rows}
+
+        # [sightings, upvotes, downvotes] per (lot, hour)
+        counts: Dict[Tuple[int, datetime], List[int]] = defaultdict(lambda: [0, 0, 0])
+        for sighting_id in sighting_ids:
+            counts[bucket_of[sighting_id]][0] += 1
+
+        vote_result = await db.execute(
+            select(Vote.sighting_id, Vote.vote_type, func.count(Vote.id))
+            .where(Vote.sighting_id.in_(sighting_ids))
+            .group_by(Vote.sighting_id, Vote.vote_type)
+        )
+        for sighting_id, vote_type, n in vote_result.all():
+            counts[bucket_of[sighting_id]][1 if vote_type == VoteType.UPVOTE else 2] += n
+
+        # Additive upsert: an hour split across batches or runs accumulates
+        stmt = _insert_fn(db)(SightingHourlyRollup).values([
+            {
+                "parking_lot_id": lot_id,
+                "hour_start": hour_start,
+                "sighting_count": c[0],
+                "upvote_count": c[1],
+                "downvote_count": c[2],
+            }
+            for (lot_id, hour_start), c in counts.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["parking_lot_id", "hour_start"],
+            set_={
+                "sighting_count": SightingHourlyRollup.sighting_count + stmt.excluded.sighting_count,
+                "upvote_count": SightingHourlyRollup.upvote_count + stmt.excluded.upvote_count,
+                "downvote_count": SightingHourlyRollup.downvote_count + stmt.excluded.downvote_count,
+            },
+        )
+        await db.execute(stmt)
+
+        await db.execute(delete(Vote).where(Vote.sighting_id.in_(sighting_ids)))
+        await db.execute(delete(TapsSighting).where(TapsSighting.id.in_(sighting_ids)))
+        await db.commit()
+        return len(sighting_ids)
+
+    @staticmethod
+    async def archive_old_sightings(db: AsyncSession) -> int:
+        """
+        Roll up sightings and votes older than settings.sighting_retention_days
+        into SightingHourlyRollup and delete the raw rows.
+
+        Each batch is rolled up and deleted in its own transaction, so an
+        interrupted run never double-counts and the next run resumes.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of sightings archived
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.sighting_retention_days)
+        total = 0
+        while True:
+            archived = await RetentionService._archive_sighting_batch(
+                db, cutoff, settings.retention_batch_size
+            )
+            record_rows(scanned=archived, processed=archived)
+            total += archived
+            if archived < settings.retention_batch_size:
+                break
+
+        if total:
+            logger.info(f"Archived {total} sighting(s) older than {cutoff.isoformat()}")
+        return total
+
+    @staticmethod
+    async def _delete_notification_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+        """Delete one batch of read notifications older than cutoff. Commits."""
+        result = await db.execute(
+            select(Notification.id, Notification.device_id)
+            .where(Notification.created_at < cutoff, Notification.read_at.is_not(None))
+            .order_by(Notification.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        per_device: Dict[int, int] = defaultdict(int)
+        for row in rows:
+            per_device[row.device_id] += 1
+
+        await db.execute(delete(Notification).where(Notification.id.in_([row.id for row in rows])))
+        # Keep the maintained totals in step (the rows were read, so unread counts are unaffected)
+        await db.execute(
+            update(Device)
+            .where(Device.id.in_(per_device))
+            .values(
+                notification_count=Device.notification_count - case(per_device, value=Device.id, else_=0),
+                last_seen_at=Device.last_seen_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return len(rows)
+
+    @staticmethod
+    async def _delete_broadcast_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+        """Delete one batch of broadcasts older than cutoff, with their read receipts. Commits."""
+        result = await db.execute(
+            select(BroadcastNotification.id)
+            .where(BroadcastNotification.created_at < cutoff)
+            .order_by(BroadcastNotification.id)
+            .limit(batch_size)
+        )
+        broadcast_ids = list(result.scalars().all())
+        if not broadcast_ids:
+            return 0
+
+        await db.execute(delete(BroadcastRead).where(BroadcastRead.broadcast_id.in_(broadcast_ids)))
+        await db.execute(delete(BroadcastNotification).where(BroadcastNotification.id.in_(broadcast_ids)))
+        await db.commit()
+        return len(broadcast_ids)
+
+    @staticmethod
+    async def _delete_job_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+        """Delete one batch of outbox jobs that finished before cutoff. Commits."""
+        result = await db.execute(
+            select(NotificationJob.id)
+            .where(
+                NotificationJob.status.in_([NotificationJobStatus.DONE, NotificationJobStatus.FAILED]),
+                NotificationJob.completed_at < cutoff,
+            )
+            .order_by(NotificationJob.id)
+            .limit(batch_size)
+        )
+        job_ids = list(result.scalars().all())
+        if not job_ids:
+            return 0
+
+        await db.execute(delete(NotificationJob).where(NotificationJob.id.in_(job_ids)))
+        await db.commit()
+        return len(job_ids)
+
+    @staticmethod
+    async def prune_old_notifications(db: AsyncSession) -> int:
+        """
+        Delete read notifications, broadcasts and finished outbox jobs older
+        than settings.notification_retention_days, one batch per transaction.
+
+        Unread personal notifications are kept. Device counters for deleted
+        broadcasts are left to the nightly counter reconciliation, which is
+        scheduled after this job.
+
+        Progress is exported as the retention.notifications_deleted,
+        retention.broadcasts_deleted and retention.jobs_deleted counters and
+        retention.notification_batch latency in GET /metrics.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of notifications, broadcasts and jobs deleted
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.notification_retention_days)
+        batch_size = settings.retention_batch_size
+        total = 0
+
+        for delete_batch, counter in (
+            (RetentionService._delete_notification_batch, "retention.notifications_deleted"),
+            (RetentionService._delete_broadcast_batch, "retention.broadcasts_deleted"),
+            (RetentionService._delete_job_batch, "retention.jobs_deleted"),
+        ):
+            while True:
+                with timed("retention.notification_batch"):
+                    deleted = await delete_batch(db, cutoff, batch_size)
+                increment(counter, deleted)
+                record_rows(scanned=deleted, processed=deleted)
+                total += deleted
+                if deleted < batch_size:
+                    break
+
+        if total:
+            logger.info(f"Deleted {total} notification(s) older than {cutoff.isoformat()}")
+        return total
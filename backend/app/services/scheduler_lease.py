@@ -0,0 +1,213 @@
+"""
+Cluster-wide single execution for scheduled jobs.
+
+Every web process (each gunicorn worker on each instance) starts the same
+APScheduler jobs. Before a tick runs, the process acquires the job's row in
+scheduler_leases with one conditional UPDATE: it wins only if the previous
+run started at least `min_interval` ago and no live lease is held. Every
+other process's UPDATE matches nothing and it skips the tick.
+
+The winner renews the lease while the job runs. Each acquisition bumps a
+token, and renewals and releases only apply while that token is current.
+So a holder that stalls past its lease and is superseded finds out at its
+next renewal, and its job is cancelled. The token does not guard the job's
+own writes: until that renewal the stalled holder may still write
+alongside its successor, so jobs must be safe to run twice (they work in
+conditional, committed batches).
+
+If the holder dies, the lease lapses after SCHEDULER_LEASE_SECONDS. A run
+that finishes records completed_at; one that never did can be taken over
+by acquiring with `resume_within`, which keeps the run's started_at. Jobs
+that tick once a day use this (see main.resume_nightly_jobs) so a dead
+holder doesn't skip them until the next day.
+
+Runs are instrumented by job_metrics: lag, duration, rows and pushes for
+the runs that happen here, and a skipped count for ticks run elsewhere.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import select, update, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.scheduler_lease import SchedulerLease
+from app.services.job_metrics import job_run, record_skipped
+
+logger = logging.getLogger(__name__)
+
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _insert_fn(db: AsyncSession):
+    """Return dialect-appropriate insert (PostgreSQL in prod, SQLite in tests)."""
+    try:
+        dialect = db.get_bind().dialect.name
+    except Exception:
+        dialect = "postgresql"
+    return sqlite_insert if dialect == "sqlite" else pg_insert
+
+
+def _lease_free(now: datetime):
+    return or_(SchedulerLease.locked_until.is_(None), SchedulerLease.locked_until < now)
+
+
+async def acquire_lease(
+    db: AsyncSession,
+    job_id: str,
+    min_interval: timedelta,
+    resume_within: Optional[timedelta] = None,
+) -> Optional[int]:
+    """
+    Try to become the runner of `job_id` for this tick.
+
+    With `resume_within`, only take over a run that started within that
+    window and never completed (its holder died or was cancelled).
+
+    Returns the fencing token when acquired, None when another process
+    holds the lease or already ran the job within `min_interval`.
+    """
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        _insert_fn(db)(SchedulerLease)
+        .values(job_id=job_id, fencing_token=0)
+        .on_conflict_do_nothing(index_elements=["job_id"])
+    )
+    if resume_within is None:
+        due = or_(SchedulerLease.started_at.is_(None), SchedulerLease.started_at <= now - min_interval)
+        new_run = {"started_at": now, "completed_at": None}
+    else:
+        due = and_(SchedulerLease.completed_at.is_(None), SchedulerLease.started_at > now - resume_within)
+        new_run = {}
+    result = await db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.job_id == job_id, due, _lease_free(now))
+        .values(
+            holder=HOLDER_ID,
+            fencing_token=SchedulerLease.fencing_token + 1,
+            locked_until=now + timedelta(seconds=settings.scheduler_lease_seconds),
+            **new_run,
+        )
+        .returning(SchedulerLease.fencing_token)
+    )
+    token = result.scalar_one_or_none()
+    await db.commit()
+    return token
+
+
+async def unfinished_jobs(db: AsyncSession, job_ids: List[str], within: timedelta) -> List[str]:
+    """Jobs whose run started within `within` but never completed, and whose lease has lapsed."""
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(SchedulerLease.job_id).where(
+            SchedulerLease.job_id.in_(job_ids),
+            SchedulerLease.completed_at.is_(None),
+            SchedulerLease.started_at > now - within,
+            _lease_free(now),
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def renew_lease(db: AsyncSession, job_id: str, token: int) -> bool:
+    """Extend a held lease; False if `token` has been superseded."""
+    result = await db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.job_id == job_id, SchedulerLease.fencing_token == token)
+        .values(locked_until=datetime.now(timezone.utc) + timedelta(seconds=settings.scheduler_lease_seconds))
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def release_lease(db: AsyncSession, job_id: str, token: int, completed: bool = True) -> None:
+    """
+    Release the lease, unless a newer holder has taken over. `completed` is
+    False when the run was cancelled, leaving it open to resume.
+    """
+    values = {"locked_until": None}
+    if completed:
+        values["completed_at"] = datetime.now(timezone.utc)
+    await db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.job_id == job_id, SchedulerLease.fencing_token == token)
+        .values(**values)
+    )
+    await db.commit()
+
+
+async def run_exclusive(
+    session_factory: async_sessionmaker,
+    job_id: str,
+    job: Callable[[AsyncSession], Awaitable[object]],
+    min_interval: timedelta,
+    slow_after: Optional[float] = None,
+    resume_within: Optional[timedelta] = None,
+) -> bool:
+    """
+    Run `job` with its own DB session if this process wins the lease for
+    the tick. Returns whether the job ran here.
+
+    `slow_after` (seconds, default SCHEDULER_SLOW_JOB_SECONDS) is when
+    /health starts flagging the run as slow. `resume_within` is passed to
+    acquire_lease.
+    """
+    try:
+        async with session_factory() as db:
+            token = await acquire_lease(db, job_id, min_interval, resume_within)
+    except Exception as e:
+        logger.error(f"Could not acquire lease for {job_id}: {e}")
+        return False
+    if token is None:
+        logger.debug(f"Skipping {job_id}: running or recently run elsewhere")
+        record_skipped(job_id)
+        return False
+
+    async def run() -> None:
+        async with job_run(job_id, slow_after), session_factory() as db:
+            await job(db)
+
+    task = asyncio.create_task(run())
+    renew_every = settings.scheduler_lease_seconds / 3
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=renew_every)
+            if task.done():
+                break
+            try:
+                async with session_factory() as db:
+                    still_held = await renew_lease(db, job_id, token)
+            except Exception as e:
+                # Keep running; the lease is still good until it expires
+                logger.warning(f"Could not renew lease for {job_id}: {e}")
+                continue
+            if not still_held:
+                logger.error(f"Lost lease for {job_id} (token {token}); cancelling this run")
+                task.cancel()
+                break
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        except Exception as e:
+            logger.error(f"Scheduled job {job_id} failed: {e}")
+    finally:
+        if not task.done():
+            task.cancel()
+        # A job that raised still completed; a cancelled one can be resumed
+        completed = task.done() and not task.cancelled()
+        try:
+            async with session_factory() as db:
+                await release_lease(db, job_id, token, completed)
+        except Exception as e:
+            # The lease lapses on its own after SCHEDULER_LEASE_SECONDS
+            logger.warning(f"Could not release lease for {job_id}: {e}")
+    return True
@@ -0,0 +1,264 @@
+"""
+In-memory index of recent TAPS sightings.
+
+Keeps a rolling window of sightings per lot so the feed, predictions, lot
+stats and the report rate-limit check can answer without touching
+taps_sightings. The index is loaded from the DB at startup and kept current
+through a Redis pub/sub channel that every worker publishes to on insert.
+Pub/sub drops messages (subscriber reconnects, buffer overflows), so each
+process also checks the index against the DB every few minutes and reloads
+any sightings it missed.
+
+While the index is not live (Redis not configured, load failed, subscriber
+dropped) every lookup returns None and callers fall back to the DB.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.taps_sighting import TapsSighting
+from app.services.cache import cache_publish, cache_pubsub
+from app.services.metrics import increment
+
+logger = logging.getLogger(__name__)
+
+# Long enough to cover "today" for predictions (TAPS runs until 10 PM PT)
+INDEX_WINDOW_HOURS = 24
+
+SIGHTING_CHANNEL = "sightings:inserted"
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite (tests) hands back naive datetimes
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+class IndexedSighting:
+    """Slim, read-only copy of a TapsSighting row."""
+
+    __slots__ = ("id", "parking_lot_id", "reported_at", "notes")
+
+    def __init__(self, id: int, parking_lot_id: int, reported_at: datetime, notes: Optional[str]):
+        self.id = id
+        self.parking_lot_id = parking_lot_id
+        self.reported_at = _as_utc(reported_at)
+        self.notes = notes
+
+    @classmethod
+    def from_model(cls, sighting: TapsSighting) -> "IndexedSighting":
+        return cls(sighting.id, sighting.parking_lot_id, sighting.reported_at, sighting.notes)
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "IndexedSighting":
+        return cls(
+            payload["id"],
+            payload["parking_lot_id"],
+            datetime.fromisoformat(payload["reported_at"]),
+            payload.get("notes"),
+        )
+
+    def to_payload(self) -> dict:
+        return {
+            "id": self.id,
+            "parking_lot_id": self.parking_lot_id,
+            "reported_at": self.reported_at.isoformat(),
+            "notes": self.notes,
+        }
+
+    def __repr__(self):
+        return f"<IndexedSighting(id={self.id}, lot_id={self.parking_lot_id}, at={self.reported_at})>"
+
+
+class SightingIndex:
+    """
+    Per-lot lists of IndexedSighting, oldest first.
+
+    Lookups return None (not an empty result) whenever the index cannot
+    vouch for the requested range, so callers know to query the DB.
+    """
+
+    __slots__ = ("window", "live", "_by_lot", "_ids")
+
+    def __init__(self, window_hours: int = INDEX_WINDOW_HOURS):
+        self.window = timedelta(hours=window_hours)
+        self.live = False
+        self._by_lot: dict[int, List[IndexedSighting]] = {}
+        self._ids: set[int] = set()
+
+    def clear(self) -> None:
+        self.live = False
+        self._by_lot.clear()
+        self._ids.clear()
+
+    def add(self, sighting: IndexedSighting) -> bool:
+        """Insert a sighting; returns False if it was already indexed."""
+        if sighting.id in self._ids:
+            return False
+        rows = self._by_lot.setdefault(sighting.parking_lot_id, [])
+        bisect.insort(rows, sighting, key=lambda s: s.reported_at)
+        self._ids.add(sighting.id)
+        return True
+
+    def covers(self, since: datetime) -> bool:
+        return self.live and _as_utc(since) >= datetime.now(timezone.utc) - self.window
+
+    def _prune(self) -> None:
+        horizon = datetime.now(timezone.utc) - self.window
+        for rows in self._by_lot.values():
+            cut = bisect.bisect_left(rows, horizon, key=lambda s: s.reported_at)
+            if cut:
+                for s in rows[:cut]:
+                    self._ids.discard(s.id)
+                del rows[:cut]
+
+    def _since(self, lot_id: int, since: datetime) -> List[IndexedSighting]:
+        rows = self._by_lot.get(lot_id, [])
+        return rows[bisect.bisect_left(rows, since, key=lambda s: s.reported_at):]
+
+    def recent(
+        self, since: datetime, lot_ids: Optional[Iterable[int]] = None
+    ) -> Optional[List[IndexedSighting]]:
+        """Sightings reported at or after `since`, newest first."""
+        if not self.covers(since):
+            return None
+        self._prune()
+        since = _as_utc(since)
+        lots = self._by_lot.keys() if lot_ids is None else lot_ids
+        found = [s for lot_id in lots for s in self._since(lot_id, since)]
+        found.sort(key=lambda s: s.reported_at, reverse=True)
+        return found
+
+    def latest(self, since: datetime, lot_id: Optional[int] = None) -> Optional[IndexedSighting]:
+        """
+        Most recent sighting at or after `since`.
+
+        Unlike the other lookups this cannot distinguish "no sighting" from
+        "not covered", so check covers() before trusting a None result.
+        """
+        rows = self.recent(since, None if lot_id is None else [lot_id])
+        return rows[0] if rows else None
+
+    def count(self, since: datetime, lot_id: int) -> Optional[int]:
+        rows = self.recent(since, [lot_id])
+        return None if rows is None else len(rows)
+
+    def indexed_since(self, since: datetime) -> int:
+        """Number of indexed sightings at or after `since`, live or not."""
+        since = _as_utc(since)
+        return sum(len(self._since(lot_id, since)) for lot_id in self._by_lot)
+
+
+# Process-wide instance shared by every read path
+sighting_index = SightingIndex()
+
+_listener_task: Optional[asyncio.Task] = None
+_pubsub = None
+
+
+async def load_sighting_index(db: AsyncSession) -> None:
+    """Populate the index with the last INDEX_WINDOW_HOURS of sightings."""
+    cutoff = datetime.now(timezone.utc) - sighting_index.window
+    result = await db.execute(
+        select(TapsSighting).where(TapsSighting.reported_at >= cutoff)
+    )
+    for sighting in result.scalars().all():
+        sighting_index.add(IndexedSighting.from_model(sighting))
+    sighting_index.live = True
+
+
+async def resync_sighting_index(db: AsyncSession) -> int:
+    """
+    Reload sightings the pub/sub feed missed.
+
+    Sightings are only deleted long after they leave the window, so the
+    index is complete when it holds as many rows in the window as the DB
+    and has the newest one. Returns the number of sightings added.
+    """
+    if not sighting_index.live:
+        return 0
+    cutoff = datetime.now(timezone.utc) - sighting_index.window
+    db_count, max_id = (await db.execute(
+        select(func.count(TapsSighting.id), func.max(TapsSighting.id))
+        .where(TapsSighting.reported_at >= cutoff)
+    )).one()
+    if db_count <= sighting_index.indexed_since(cutoff) and (
+        max_id is None or max_id in sighting_index._ids
+    ):
+        return 0
+
+    result = await db.execute(
+        select(TapsSighting).where(TapsSighting.reported_at >= cutoff)
+    )
+    added = sum(
+        sighting_index.add(IndexedSighting.from_model(sighting))
+        for sighting in result.scalars().all()
+    )
+    if added:
+        logger.warning(f"Sighting index missed {added} inserts, reloaded from DB")
+        increment("sighting_index.resynced", added)
+    return added
+
+
+async def _listen(pubsub) -> None:
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            sighting_index.add(IndexedSighting.from_payload(json.loads(message["data"])))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Without the feed of inserts the index silently goes stale — stop serving it
+        logger.error(f"Sighting index subscriber stopped, falling back to DB: {e}")
+        sighting_index.live = False
+
+
+async def start_sighting_index(db: AsyncSession) -> None:
+    """
+    Subscribe to insert events, then load from the DB.
+
+    Subscribing first means no insert can fall between the load and the
+    subscription; duplicates are dropped by id.
+    """
+    global _listener_task, _pubsub
+    _pubsub = cache_pubsub()
+    if _pubsub is None:
+        logger.warning("Redis not configured — sighting index disabled")
+        return
+    try:
+        await _pubsub.subscribe(SIGHTING_CHANNEL)
+        _listener_task = asyncio.create_task(_listen(_pubsub))
+        await load_sighting_index(db)
+        logger.info("Sighting index loaded")
+    except Exception as e:
+        logger.error(f"Failed to start sighting index: {e}")
+        await stop_sighting_index()
+
+
+async def stop_sighting_index() -> None:
+    global _listener_task, _pubsub
+    sighting_index.clear()
+    if _listener_task is not None:
+        _listener_task.cancel()
+        _listener_task = None
+    if _pubsub is not None:
+        try:
+            await _pubsub.aclose()
+        except Exception:
+            pass
+        _pubsub = None
+
+
+async def publish_sighting(sighting: TapsSighting) -> None:
+    """Record a newly committed sighting locally and announce it to other workers."""
+    indexed = IndexedSighting.from_model(sighting)
+    if sighting_index.live:
+        sighting_index.add(indexed)
+    await cache_publish(SIGHTING_CHANNEL, indexed.to_payload())
@@ -22,8 +22,11 @@ from app.models.device import Device
 from app.models.parking_session import ParkingSession
 from app.models.taps_sighting import TapsSighting
 from app.models.notification import Notification
+from app.models.broadcast_notification import BroadcastNotification, BroadcastRead
 from app.models.vote import Vote
 from app.models.email_otp import EmailOTP
+from app.models.notification_job import NotificationJob
+from app.models.sighting_rollup import SightingHourlyRollup
 from app.services.auth import AuthService
 
 # Use SQLite for tests (in-memory)
@@ -168,3 +171,20 @@ async def active_session(db_session: AsyncSession, verified_device: Device, test
     await db_session.commit()
     await db_session.refresh(session)
     return session
+
+
+@pytest_asyncio.fixture
+async def session_factory(test_engine):
+    """Session factory on the test database, for code that opens its own sessions."""
+    return async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def drain_outbox(session_factory):
+    """Run queued notification outbox jobs against the test database, as the worker pool would."""
+    from app.services.outbox import process_due_jobs
+
+    async def _drain() -> int:
+        return await process_due_jobs(session_factory)
+
+    return _drain
@@ -532,6 +532,58 @@ class TestVotingEndpoints:
 
         assert response.status_code == 404
 
+    @pytest.mark.asyncio
+    async def test_get_votes_batch(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        auth_headers: dict,
+        verified_device: Device,
+        test_parking_lot: ParkingLot
+    ):
+        """Batch lookup returns counts and own vote for every existing sighting."""
+        voted = TapsSighting(parking_lot_id=test_parking_lot.id)
+        unvoted = TapsSighting(parking_lot_id=test_parking_lot.id)
+        db_session.add_all([voted, unvoted])
+        await db_session.commit()
+
+        db_session.add(Vote(
+            device_id=verified_device.id,
+            sighting_id=voted.id,
+            vote_type=VoteType.DOWNVOTE
+        ))
+        await db_session.commit()
+
+        response = await client.post(
+            "/api/v1/feed/votes:batch",
+            headers=auth_headers,
+            json={"sighting_ids": [voted.id, unvoted.id, 99999, voted.id]},
+        )
+
+        assert response.status_code == 200
+        votes = response.json()["votes"]
+        assert [v["sighting_id"] for v in votes] == [voted.id, unvoted.id]
+        assert votes[0]["downvotes"] == 1
+        assert votes[0]["net_score"] == -1
+        assert votes[0]["user_vote"] == "downvote"
+        assert votes[1]["upvotes"] == 0
+        assert votes[1]["user_vote"] is None
+
+    @pytest.mark.asyncio
+    async def test_get_votes_batch_rejects_empty(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+    ):
+        """Empty id list → 422."""
+        response = await client.post(
+            "/api/v1/feed/votes:batch",
+            headers=auth_headers,
+            json={"sighting_ids": []},
+        )
+
+        assert response.status_code == 422
+
     @pytest.mark.asyncio
     async def test_vote_requires_auth(
         self,
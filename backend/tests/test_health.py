@@ -5,6 +5,17 @@ Tests for health check endpoints.
 import pytest
 from httpx import AsyncClient
 
+from app.config import settings
+from app.services.metrics import ALERT_LATENCY_BUCKETS, latency, reset_metrics
+
+
+METRICS_HEADERS = {"Authorization": "Bearer metrics-test-token"}
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "metrics-test-token")
+
 
 class TestHealthEndpoints:
     """Tests for health check endpoints."""
@@ -29,3 +40,46 @@ class TestHealthEndpoints:
         data = response.json()
         assert data["status"] == "healthy"
         assert "database" in data
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, client: AsyncClient, metrics_token):
+        """Recorded latencies are exposed with percentiles."""
+        reset_metrics()
+        latency("push.apns").observe(0.05)
+        latency("push.apns").observe(0.2, "timeout")
+
+        response = await client.get("/metrics", headers=METRICS_HEADERS)
+
+        assert response.status_code == 200
+        assert response.json()["scope"] == "process"
+        apns = response.json()["latency"]["push.apns"]
+        assert apns["count"] == 2
+        assert apns["timeouts"] == 1
+        assert apns["p99_ms"] == 200.0
+
+    @pytest.mark.asyncio
+    async def test_metrics_histogram_buckets(self, client: AsyncClient, metrics_token):
+        """Bucketed latencies report cumulative counts per bound."""
+        reset_metrics()
+        stats = latency("alert.push_acked.fcm", ALERT_LATENCY_BUCKETS)
+        for seconds in (0.3, 1.0, 4.0, 400.0):
+            stats.observe(seconds)
+
+        response = await client.get("/metrics", headers=METRICS_HEADERS)
+
+        buckets = response.json()["latency"]["alert.push_acked.fcm"]["buckets_s"]
+        assert buckets["0.5"] == 1
+        assert buckets["1.0"] == 2
+        assert buckets["5.0"] == 3
+        assert buckets["300.0"] == 3
+        assert buckets["+Inf"] == 4
+
+    @pytest.mark.asyncio
+    async def test_metrics_requires_token(self, client: AsyncClient, metrics_token):
+        assert (await client.get("/metrics")).status_code == 404
+        wrong = {"Authorization": "Bearer nope"}
+        assert (await client.get("/metrics", headers=wrong)).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_metrics_hidden_without_configured_token(self, client: AsyncClient):
+        assert (await client.get("/metrics", headers=METRICS_HEADERS)).status_code == 404
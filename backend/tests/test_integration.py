@@ -180,7 +180,7 @@ class TestSightingPredictionLotStats:
         self, client: AsyncClient, db_session: AsyncSession,
         test_parking_lot: ParkingLot, auth_headers: dict,
     ):
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             r = await client.post(
                 f"{API}/sightings",
                 json={"parking_lot_id": test_parking_lot.id},
@@ -196,7 +196,7 @@ class TestSightingPredictionLotStats:
         self, client: AsyncClient, db_session: AsyncSession,
         test_parking_lot: ParkingLot, auth_headers: dict,
     ):
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(
                 f"{API}/sightings",
                 json={"parking_lot_id": test_parking_lot.id},
@@ -212,7 +212,7 @@ class TestSightingPredictionLotStats:
     ):
         devs = [await create_verified_device_with_headers(db_session) for _ in range(2)]
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             r = await client.post(
                 f"{API}/sightings",
                 json={"parking_lot_id": test_parking_lot.id},
@@ -234,7 +234,7 @@ class TestSightingPredictionLotStats:
         lot_b = await _create_lot(db_session, "Lot B", "LOTB")
         _, hdrs = await create_verified_device_with_headers(db_session)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot_a.id}, headers=hdrs)
 
         r = await client.get(f"{API}/predictions/{lot_a.id}", headers=hdrs)
@@ -297,7 +297,7 @@ class TestSightingPredictionLotStats:
         r = await client.get(f"{API}/predictions/{lot.id}", headers=hdrs)
         assert r.json()["risk_level"] == "MEDIUM"
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=hdrs)
 
         r = await client.get(f"{API}/predictions/{lot.id}", headers=hdrs)
@@ -322,7 +322,7 @@ class TestSightingPredictionLotStats:
 class TestSightingNotificationFlow:
 
     async def test_sighting_creates_notifications_for_parked_users(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         lot = await _create_lot(db_session, "Notif Lot", "NTF1")
         d1, h1 = await create_verified_device_with_headers(db_session)
@@ -332,8 +332,9 @@ class TestSightingNotificationFlow:
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=h1)
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=h2)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=reporter_h)
+            await drain_outbox()
 
         r1 = await client.get(f"{API}/notifications/unread", headers=h1)
         r2 = await client.get(f"{API}/notifications/unread", headers=h2)
@@ -341,7 +342,7 @@ class TestSightingNotificationFlow:
         assert r2.json()["unread_count"] >= 1
 
     async def test_reporter_also_gets_notified(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         """Reporter who is also parked DOES receive a notification (actual behavior)."""
         lot = await _create_lot(db_session, "Reporter Lot", "RPT1")
@@ -349,14 +350,15 @@ class TestSightingNotificationFlow:
 
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=hdrs)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=hdrs)
+            await drain_outbox()
 
         r = await client.get(f"{API}/notifications/unread", headers=hdrs)
         assert r.json()["unread_count"] >= 1
 
     async def test_checked_out_user_not_notified(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         lot = await _create_lot(db_session, "Checkout Lot", "CKO1")
         d_a, h_a = await create_verified_device_with_headers(db_session)
@@ -365,14 +367,15 @@ class TestSightingNotificationFlow:
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=h_a)
         await client.post(f"{API}/sessions/checkout", headers=h_a)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_b)
+            await drain_outbox()
 
         r = await client.get(f"{API}/notifications/unread", headers=h_a)
         assert r.json()["unread_count"] == 0
 
     async def test_checkin_sighting_checkout_sighting_sequence(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         lot = await _create_lot(db_session, "Seq Lot", "SEQ1")
         d_a, h_a = await create_verified_device_with_headers(db_session)
@@ -381,22 +384,24 @@ class TestSightingNotificationFlow:
 
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=h_a)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_r1)
+            await drain_outbox()
 
         r = await client.get(f"{API}/notifications/unread", headers=h_a)
         assert r.json()["unread_count"] == 1
 
         await client.post(f"{API}/sessions/checkout", headers=h_a)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_r2)
+            await drain_outbox()
 
         r = await client.get(f"{API}/notifications/unread", headers=h_a)
         assert r.json()["unread_count"] == 1  # still 1, not 2
 
     async def test_notification_targets_only_users_at_sighted_lot(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         lot1 = await _create_lot(db_session, "Target 1", "TGT1")
         lot2 = await _create_lot(db_session, "Target 2", "TGT2")
@@ -407,8 +412,9 @@ class TestSightingNotificationFlow:
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot1.id}, headers=h_a)
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot2.id}, headers=h_b)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot1.id}, headers=h_r)
+            await drain_outbox()
 
         r_a = await client.get(f"{API}/notifications/unread", headers=h_a)
         r_b = await client.get(f"{API}/notifications/unread", headers=h_b)
@@ -429,7 +435,7 @@ class TestSightingNotificationFlow:
         await client.post(f"{API}/sessions/checkout", headers=devs[0][1])
         await client.post(f"{API}/sessions/checkout", headers=devs[1][1])
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             r = await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_reporter)
 
         assert r.status_code == 201
@@ -459,7 +465,7 @@ class TestCheckinReminderNotification:
         db_session.add(session)
         await db_session.commit()
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             count = await ReminderService.process_pending_reminders(db_session)
         assert count == 1
 
@@ -470,7 +476,7 @@ class TestCheckinReminderNotification:
         assert session.reminder_sent is True
 
         # Process again → no duplicate
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             count = await ReminderService.process_pending_reminders(db_session)
         assert count == 0
 
@@ -490,7 +496,7 @@ class TestCheckinReminderNotification:
         db_session.add(session)
         await db_session.commit()
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             count = await ReminderService.process_pending_reminders(db_session)
         assert count == 0
 
@@ -509,7 +515,7 @@ class TestCheckinReminderNotification:
         db_session.add(session)
         await db_session.commit()
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             count = await ReminderService.process_pending_reminders(db_session)
         assert count == 0
 
@@ -531,7 +537,7 @@ class TestCheckinReminderNotification:
             db_session.add(s)
         await db_session.commit()
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             count = await ReminderService.process_pending_reminders(db_session)
         assert count == 2
 
@@ -546,7 +552,7 @@ class TestVotingFeedDisplay:
 
     async def _create_sighting_at(self, client, db_session, lot_id, headers):
         """Helper: report a sighting and return its id."""
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             r = await client.post(
                 f"{API}/sightings",
                 json={"parking_lot_id": lot_id},
@@ -670,7 +676,7 @@ class TestSightingFeed:
         lot = await _create_lot(db_session, "Feed Lot", "FD01")
         _, hdrs = await create_verified_device_with_headers(db_session)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=hdrs)
 
         r = await client.get(f"{API}/feed/{lot.id}", headers=hdrs)
@@ -700,7 +706,7 @@ class TestSightingFeed:
         lot_b = await _create_lot(db_session, "Feed B", "FDB1")
         _, hdrs = await create_verified_device_with_headers(db_session)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot_a.id}, headers=hdrs)
 
         r = await client.get(f"{API}/feed/{lot_a.id}", headers=hdrs)
@@ -716,7 +722,7 @@ class TestSightingFeed:
         lot_b = await _create_lot(db_session, "Group B", "GRB1")
         devs = [await create_verified_device_with_headers(db_session) for _ in range(3)]
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot_a.id}, headers=devs[0][1])
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot_b.id}, headers=devs[1][1])
         # Third sighting inserted directly to bypass the 10-min rate limit
@@ -777,7 +783,7 @@ class TestAuthFlowProtectedEndpoints:
         await client.post(f"{API}/sessions/checkout", headers=hdrs)
 
         # Sighting works
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             r = await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=hdrs)
         assert r.status_code == 201
 
@@ -809,7 +815,7 @@ class TestAuthFlowProtectedEndpoints:
 class TestNotificationLifecycle:
 
     async def test_notification_lifecycle(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         lot = await _create_lot(db_session, "NLC Lot", "NLC1")
         d_parker, h_parker = await create_verified_device_with_headers(db_session)
@@ -817,8 +823,9 @@ class TestNotificationLifecycle:
 
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=h_parker)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_reporter)
+            await drain_outbox()
 
         # Unread = 1
         r = await client.get(f"{API}/notifications/unread", headers=h_parker)
@@ -862,7 +869,7 @@ class TestNotificationLifecycle:
         assert r.json()["unread_count"] == 0
 
     async def test_new_notification_after_mark_read(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         lot = await _create_lot(db_session, "NNew Lot", "NNW1")
         d_parker, h_parker = await create_verified_device_with_headers(db_session)
@@ -871,14 +878,15 @@ class TestNotificationLifecycle:
 
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=h_parker)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_r1)
+            await drain_outbox()
 
         await client.post(f"{API}/notifications/read/all", headers=h_parker)
 
         # Second sighting inserted directly (bypasses rate limit) + manually fire notifications
         await _direct_sighting(db_session, lot, d_r2)
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             await NotificationService.notify_parked_users(
                 db=db_session, parking_lot_id=lot.id,
                 parking_lot_name=lot.name, parking_lot_code=lot.code,
@@ -897,7 +905,7 @@ class TestNotificationLifecycle:
 class TestPushTokenNotificationDelivery:
 
     async def test_push_token_update_affects_notification_delivery(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         # Device without push token
         dev, hdrs = await create_verified_device_with_headers(db_session)
@@ -907,8 +915,9 @@ class TestPushTokenNotificationDelivery:
 
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=hdrs)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True) as mock_push:
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}) as mock_push:
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_r1)
+            await drain_outbox()
             mock_push.assert_not_called()
 
         # Add push token
@@ -922,15 +931,16 @@ class TestPushTokenNotificationDelivery:
 
         # Second sighting inserted directly (bypasses rate limit) + manually fire notifications
         await _direct_sighting(db_session, lot, d_r2)
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True) as mock_push:
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}) as mock_push:
             await NotificationService.notify_parked_users(
                 db=db_session, parking_lot_id=lot.id,
                 parking_lot_name=lot.name, parking_lot_code=lot.code,
             )
-            mock_push.assert_called()
+            mock_push.assert_called_once()
+            assert mock_push.call_args.kwargs["push_tokens"] == ["fake-fcm-token:abc123"]
 
     async def test_push_disabled_skips_push_but_creates_in_app(
-        self, client: AsyncClient, db_session: AsyncSession,
+        self, client: AsyncClient, db_session: AsyncSession, drain_outbox,
     ):
         dev, hdrs = await create_verified_device_with_headers(
             db_session, push_token="fake-token:xyz", is_push_enabled=False,
@@ -940,8 +950,9 @@ class TestPushTokenNotificationDelivery:
 
         await client.post(f"{API}/sessions/checkin", json={"parking_lot_id": lot.id}, headers=hdrs)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True) as mock_push:
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}) as mock_push:
             await client.post(f"{API}/sightings", json={"parking_lot_id": lot.id}, headers=h_reporter)
+            await drain_outbox()
             mock_push.assert_not_called()
 
         r = await client.get(f"{API}/notifications/unread", headers=hdrs)
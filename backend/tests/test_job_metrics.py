@@ -0,0 +1,237 @@
+"""
+Tests for scheduled-job instrumentation.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_SUBMITTED
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.device import Device
+from app.models.parking_session import ParkingSession
+from app.services.job_metrics import (
+    job_run,
+    jobs_health,
+    record_error,
+    record_pushes,
+    record_rows,
+    reset_job_metrics,
+    scheduler_listener,
+)
+from app.services.metrics import metrics_snapshot, reset_metrics
+from app.services.notification import NotificationService, PushResult
+from app.services.reminder import ReminderService, run_reminder_job
+from app.services.reminder_queue import POLLER_JOB_ID, process_due_reminders
+from app.services.scheduler_lease import run_exclusive
+
+INTERVAL = timedelta(minutes=4)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    reset_job_metrics()
+    yield
+    reset_job_metrics()
+
+
+def _submitted(job_id: str, scheduled_at: datetime) -> SimpleNamespace:
+    return SimpleNamespace(code=EVENT_JOB_SUBMITTED, job_id=job_id, scheduled_run_times=[scheduled_at])
+
+
+class TestJobRun:
+    """Tests for the per-run instrumentation."""
+
+    @pytest.mark.asyncio
+    async def test_records_lag_duration_and_counts(self):
+        scheduler_listener(_submitted("job", datetime.now(timezone.utc) - timedelta(seconds=2)))
+
+        async def push() -> None:
+            record_pushes(sent=3, failed=1)
+
+        async with job_run("job"):
+            record_rows(scanned=10, processed=4)
+            # Tasks started by the job report into the same run
+            await asyncio.create_task(push())
+
+        snapshot = metrics_snapshot()
+        assert 2.0 <= snapshot["latency"]["scheduler.job.lag"]["p50_ms"] / 1000 < 5.0
+        assert snapshot["latency"]["scheduler.job.duration"]["count"] == 1
+        counters = snapshot["counters"]
+        assert counters["scheduler.job.runs"] == 1
+        assert counters["scheduler.job.rows_scanned"] == 10
+        assert counters["scheduler.job.rows_processed"] == 4
+        assert counters["scheduler.job.pushes_sent"] == 3
+        assert counters["scheduler.job.pushes_failed"] == 1
+
+        job = jobs_health()["job"]
+        assert job["running"] is False
+        assert job["outcome"] == "ok"
+        assert job["rows_processed"] == 4
+        assert job["lag_s"] >= 2.0
+        assert job["slow"] is False
+
+    @pytest.mark.asyncio
+    async def test_failure_recorded_and_reraised(self):
+        with pytest.raises(RuntimeError):
+            async with job_run("job"):
+                raise RuntimeError("db blip")
+
+        assert metrics_snapshot()["counters"]["scheduler.job.failures"] == 1
+        assert metrics_snapshot()["latency"]["scheduler.job.duration"]["errors"] == 1
+        job = jobs_health()["job"]
+        assert job["outcome"] == "error"
+        assert job["error"] == "RuntimeError"  # The message stays out of /health
+        assert job["consecutive_failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_long_running_job_flagged_slow(self):
+        async with job_run("job", slow_after=0.01):
+            await asyncio.sleep(0.02)
+            job = jobs_health()["job"]
+            assert job["running"] is True
+            assert job["slow"] is True
+
+    @pytest.mark.asyncio
+    async def test_handled_error_counts_as_failure(self):
+        async with job_run("job"):
+            record_error(RuntimeError("db blip"))
+
+        assert metrics_snapshot()["counters"]["scheduler.job.failures"] == 1
+        assert jobs_health()["job"]["outcome"] == "error"
+
+    def test_reporting_outside_a_job_is_a_no_op(self):
+        record_rows(scanned=5)
+        record_pushes(sent=1)
+        record_error(RuntimeError("db blip"))
+        assert metrics_snapshot()["counters"] == {}
+
+    def test_overlapping_tick_counted(self):
+        scheduler_listener(SimpleNamespace(code=EVENT_JOB_MAX_INSTANCES, job_id="job"))
+        assert metrics_snapshot()["counters"]["scheduler.job.overlaps"] == 1
+
+
+class TestRunExclusive:
+    """Scheduled jobs are instrumented through run_exclusive."""
+
+    @pytest.mark.asyncio
+    async def test_skipped_tick_counted(self, session_factory):
+        await run_exclusive(session_factory, "job", AsyncMock(), INTERVAL)
+        assert await run_exclusive(session_factory, "job", AsyncMock(), INTERVAL) is False
+
+        counters = metrics_snapshot()["counters"]
+        assert counters["scheduler.job.runs"] == 1
+        assert counters["scheduler.job.skipped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_reminder_job_reports_rows_and_pushes(
+        self, session_factory, active_session: ParkingSession, verified_device: Device, db_session: AsyncSession,
+    ):
+        verified_device.is_push_enabled = True
+        verified_device.push_token = "fcm-token"
+        await db_session.commit()
+
+        with patch.object(
+            NotificationService, "send_push_messages", new_callable=AsyncMock,
+            return_value={"fcm-token": PushResult("fcm-token", False, "FCM unavailable")},
+        ):
+            assert await run_exclusive(session_factory, "checkout_reminder", run_reminder_job, INTERVAL)
+
+        job = jobs_health()["checkout_reminder"]
+        assert job["rows_scanned"] == 1
+        assert job["rows_processed"] == 1
+        assert job["pushes_failed"] == 1
+
+
+    @pytest.mark.asyncio
+    async def test_reminder_job_failure_recorded(self, session_factory):
+        """run_reminder_job keeps the scheduler running but the run still fails."""
+        with patch.object(
+            ReminderService, "process_pending_reminders",
+            new_callable=AsyncMock, side_effect=RuntimeError("db blip"),
+        ):
+            await run_exclusive(session_factory, "checkout_reminder", run_reminder_job, INTERVAL)
+
+        job = jobs_health()["checkout_reminder"]
+        assert job["outcome"] == "error"
+        assert job["consecutive_failures"] == 1
+
+
+class TestReminderQueuePoller:
+    """Reminder-queue polls are instrumented like scheduler jobs."""
+
+    @pytest.mark.asyncio
+    async def test_poll_reports_rows_and_pushes(
+        self, active_session: ParkingSession, verified_device: Device, db_session: AsyncSession,
+    ):
+        verified_device.is_push_enabled = True
+        verified_device.push_token = "fcm-token"
+        await db_session.commit()
+
+        with patch(
+            "app.services.reminder_queue.cache_zpop_due", new_callable=AsyncMock,
+            return_value=[str(active_session.id)],
+        ), patch.object(
+            NotificationService, "send_push_messages", new_callable=AsyncMock,
+            return_value={"fcm-token": PushResult("fcm-token", True)},
+        ):
+            async with job_run(POLLER_JOB_ID):
+                assert await process_due_reminders(db_session) == 1
+
+        counters = metrics_snapshot()["counters"]
+        assert counters["scheduler.reminder_queue.rows_scanned"] == 1
+        assert counters["scheduler.reminder_queue.rows_processed"] == 1
+        assert counters["scheduler.reminder_queue.pushes_sent"] == 1
+
+
+class TestPerProcessJobs:
+    """Jobs that run on every process are instrumented without run_exclusive."""
+
+    @pytest.mark.asyncio
+    async def test_sighting_index_resync_reported(self):
+        from app.main import run_sighting_index_resync
+
+        with patch("app.main.resync_sighting_index", new_callable=AsyncMock, return_value=2):
+            await run_sighting_index_resync()
+        assert jobs_health()["sighting_index_resync"]["rows_processed"] == 2
+
+        with patch(
+            "app.main.resync_sighting_index", new_callable=AsyncMock, side_effect=RuntimeError("db blip"),
+        ):
+            await run_sighting_index_resync()
+        job = jobs_health()["sighting_index_resync"]
+        assert job["outcome"] == "error"
+        assert job["consecutive_failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_resume_check_reported(self):
+        from app.main import resume_nightly_jobs
+
+        with patch("app.main.unfinished_jobs", new_callable=AsyncMock, return_value=[]):
+            await resume_nightly_jobs()
+
+        job = jobs_health()["resume_nightly_jobs"]
+        assert job["outcome"] == "ok"
+        assert job["rows_processed"] == 0
+
+
+class TestHealthJobs:
+    """Job status in GET /health."""
+
+    @pytest.mark.asyncio
+    async def test_health_lists_slow_jobs(self, client: AsyncClient):
+        async with job_run("checkout_reminder", slow_after=0.01):
+            await asyncio.sleep(0.02)
+        async with job_run("auto_checkout"):
+            pass
+
+        data = (await client.get("/health")).json()
+
+        assert data["slow_jobs"] == ["checkout_reminder"]
+        assert data["jobs"]["checkout_reminder"]["duration_s"] >= 0.02
+        assert data["jobs"]["auto_checkout"]["slow"] is False
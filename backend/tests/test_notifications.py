@@ -2,14 +2,23 @@
 Tests for notification endpoints and services.
 """
 
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from unittest.mock import patch, AsyncMock
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.parking_lot import ParkingLot
+from app.models.parking_session import ParkingSession
 from app.models.device import Device
 from app.models.notification import Notification, NotificationType
+from app.models.broadcast_notification import BroadcastNotification, BroadcastRead
 from app.services.notification import NotificationService
+from app.services.notification_waiters import notification_waiters, wait_for_notification
 
 
 class TestNotificationService:
@@ -187,6 +196,204 @@ class TestNotificationService:
         assert len(unread) == 0
 
 
+async def _broadcast(db: AsyncSession, lot: ParkingLot) -> BroadcastNotification:
+    with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
+        await NotificationService.notify_parked_users(db, lot.id, lot.name, lot.code)
+    result = await db.execute(
+        select(BroadcastNotification).order_by(BroadcastNotification.id.desc()).limit(1)
+    )
+    return result.scalar_one()
+
+
+class TestBroadcastNotifications:
+    """Lot-wide alerts stored once and read through parking sessions."""
+
+    @pytest.mark.asyncio
+    async def test_parked_device_sees_broadcast(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        broadcast = await _broadcast(db_session, test_parking_lot)
+
+        unread = await NotificationService.get_unread_notifications(db_session, verified_device)
+
+        assert [n.id for n in unread] == [-broadcast.id]
+        assert unread[0].parking_lot_id == test_parking_lot.id
+        assert unread[0].is_read is False
+
+    @pytest.mark.asyncio
+    async def test_broadcast_outside_session_not_visible(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_device: Device, test_parking_lot: ParkingLot,
+    ):
+        """Sent before check-in or after checkout → not received."""
+        db_session.add(ParkingSession(
+            device_id=test_device.id,
+            parking_lot_id=test_parking_lot.id,
+            checked_in_at=datetime.now(timezone.utc) - timedelta(hours=3),
+            checked_out_at=datetime.now(timezone.utc) - timedelta(hours=1),
+        ))
+        await db_session.commit()
+        await _broadcast(db_session, test_parking_lot)
+
+        notifications, unread_count, total = await NotificationService.get_all_notifications(
+            db_session, test_device
+        )
+
+        assert notifications == []
+        assert (unread_count, total) == (0, 0)
+
+    @pytest.mark.asyncio
+    async def test_broadcast_merged_with_personal(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        await NotificationService.create_notification(
+            db=db_session,
+            device=verified_device,
+            notification_type=NotificationType.CHECKOUT_REMINDER,
+            title="Still parked?",
+            message="Check out when you leave",
+        )
+        broadcast = await _broadcast(db_session, test_parking_lot)
+
+        notifications, unread_count, total = await NotificationService.get_all_notifications(
+            db_session, verified_device, limit=1
+        )
+
+        assert [n.id for n in notifications] == [-broadcast.id]
+        assert (unread_count, total) == (2, 2)
+
+    @pytest.mark.asyncio
+    async def test_mark_broadcast_read(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_device: Device, test_parking_lot: ParkingLot,
+    ):
+        broadcast = await _broadcast(db_session, test_parking_lot)
+
+        # A device that never received it can't mark it
+        assert await NotificationService.mark_notifications_read(
+            db_session, test_device, [-broadcast.id]
+        ) == 0
+        assert await NotificationService.mark_notifications_read(
+            db_session, verified_device, [-broadcast.id]
+        ) == 1
+        assert await NotificationService.mark_notifications_read(
+            db_session, verified_device, [-broadcast.id]
+        ) == 0
+
+        notifications, unread_count, _ = await NotificationService.get_all_notifications(
+            db_session, verified_device
+        )
+        assert unread_count == 0
+        assert notifications[0].is_read is True
+
+    @pytest.mark.asyncio
+    async def test_concurrent_mark_broadcast_read(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        """A racing request that already inserted the read receipt doesn't cause an error or a double decrement."""
+        broadcast = await _broadcast(db_session, test_parking_lot)
+        verified_device.unread_notification_count = 1
+        await db_session.commit()
+        db_session.add(BroadcastRead(device_id=verified_device.id, broadcast_id=broadcast.id))
+        await db_session.commit()
+
+        # Both requests read the broadcast as unread before either inserted
+        with patch.object(NotificationService, "_broadcast_unread", return_value=true()):
+            assert await NotificationService.mark_notifications_read(
+                db_session, verified_device, [-broadcast.id]
+            ) == 0
+
+        await db_session.refresh(verified_device)
+        assert verified_device.unread_notification_count == 1
+
+    @pytest.mark.asyncio
+    async def test_mark_all_read_moves_cursor(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        first = await _broadcast(db_session, test_parking_lot)
+        await _broadcast(db_session, test_parking_lot)
+        await NotificationService.mark_notifications_read(db_session, verified_device, [-first.id])
+
+        marked = await NotificationService.mark_all_notifications_read(db_session, verified_device)
+
+        assert marked == 1
+        assert await NotificationService.get_unread_notifications(db_session, verified_device) == []
+
+        # Later broadcasts are unread again
+        third = await _broadcast(db_session, test_parking_lot)
+        unread = await NotificationService.get_unread_notifications(db_session, verified_device)
+        assert [n.id for n in unread] == [-third.id]
+
+
+class TestNotificationCounters:
+    """Maintained per-device unread/total counters."""
+
+    @pytest.mark.asyncio
+    async def test_counters_follow_writes(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        notification = await NotificationService.create_notification(
+            db=db_session,
+            device=verified_device,
+            notification_type=NotificationType.CHECKOUT_REMINDER,
+            title="Still parked?",
+            message="Check out when you leave",
+        )
+        await _broadcast(db_session, test_parking_lot)
+        await db_session.refresh(verified_device)
+        assert (verified_device.unread_notification_count, verified_device.notification_count) == (2, 2)
+
+        await NotificationService.mark_notifications_read(db_session, verified_device, [notification.id])
+        await db_session.refresh(verified_device)
+        assert (verified_device.unread_notification_count, verified_device.notification_count) == (1, 2)
+
+        await NotificationService.mark_all_notifications_read(db_session, verified_device)
+        await db_session.refresh(verified_device)
+        assert (verified_device.unread_notification_count, verified_device.notification_count) == (0, 2)
+
+    @pytest.mark.asyncio
+    async def test_uncounted_device_recounted_on_listing(
+        self, db_session: AsyncSession, verified_device: Device,
+    ):
+        db_session.add(Notification(
+            device_id=verified_device.id,
+            notification_type=NotificationType.TAPS_SPOTTED,
+            title="Legacy",
+            message="Written before the counters existed",
+        ))
+        verified_device.notification_count = None
+        verified_device.unread_notification_count = None
+        await db_session.commit()
+
+        _, unread_count, total = await NotificationService.get_all_notifications(db_session, verified_device)
+
+        assert (unread_count, total) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_reconcile_fixes_drift(
+        self, db_session: AsyncSession, verified_device: Device,
+    ):
+        await NotificationService.create_notification(
+            db=db_session,
+            device=verified_device,
+            notification_type=NotificationType.TAPS_SPOTTED,
+            title="Alert",
+            message="Message",
+        )
+        verified_device.unread_notification_count = 7
+        await db_session.commit()
+
+        assert await NotificationService.reconcile_notification_counts(db_session) >= 1
+
+        await db_session.refresh(verified_device)
+        assert (verified_device.unread_notification_count, verified_device.notification_count) == (1, 1)
+
+
 class TestNotificationEndpoints:
     """Tests for notification API endpoints."""
 
@@ -333,3 +540,114 @@ class TestNotificationEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert data["marked_count"] == 0  # None marked
+
+
+class TestNotificationPagination:
+    """Keyset pagination of GET /notifications across personal and broadcast rows."""
+
+    @pytest.mark.asyncio
+    async def test_cursor_walks_every_notification_once(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        auth_headers: dict,
+        active_session: ParkingSession,
+        verified_device: Device,
+        test_parking_lot: ParkingLot,
+    ):
+        now = datetime.now(timezone.utc)
+        for i in range(3):
+            db_session.add(Notification(
+                device_id=verified_device.id,
+                notification_type=NotificationType.CHECKOUT_REMINDER,
+                title=f"Reminder {i}",
+                message="Check out when you leave",
+                created_at=now - timedelta(minutes=i + 1),
+            ))
+        await db_session.commit()
+        for _ in range(2):
+            await _broadcast(db_session, test_parking_lot)
+
+        seen = []
+        cursor = None
+        for _ in range(5):
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            response = await client.get("/api/v1/notifications", headers=auth_headers, params=params)
+            assert response.status_code == 200
+            seen += [n["id"] for n in response.json()["notifications"]]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+        assert sum(1 for i in seen if i < 0) == 2
+
+    @pytest.mark.asyncio
+    async def test_bad_cursor_rejected(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get(
+            "/api/v1/notifications", headers=auth_headers, params={"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 400
+
+
+class TestLongPoll:
+    """GET /notifications/unread?wait=N."""
+
+    @pytest.mark.asyncio
+    async def test_wait_returns_when_notification_arrives(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        auth_headers: dict,
+        verified_device: Device,
+    ):
+        parked = asyncio.Event()
+
+        async def park(event, timeout):
+            parked.set()
+            return await wait_for_notification(event, timeout)
+
+        with patch("app.api.notifications.wait_for_notification", park):
+            poll = asyncio.create_task(
+                client.get("/api/v1/notifications/unread?wait=10", headers=auth_headers)
+            )
+            await asyncio.wait_for(parked.wait(), timeout=5)
+            assert len(notification_waiters) == 1
+
+            await NotificationService.create_notification(
+                db=db_session,
+                device=verified_device,
+                notification_type=NotificationType.CHECKOUT_REMINDER,
+                title="Still parked?",
+                message="Check out when you leave",
+            )
+            response = await asyncio.wait_for(poll, timeout=5)
+
+        assert response.status_code == 200
+        assert response.json()["unread_count"] == 1
+        assert len(notification_waiters) == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_empty(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+    ):
+        response = await client.get("/api/v1/notifications/unread?wait=1", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["notifications"] == []
+        assert len(notification_waiters) == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_bounded(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get("/api/v1/notifications/unread?wait=300", headers=auth_headers)
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_wake_only_targets_device(self):
+        with notification_waiters.register(1) as mine, notification_waiters.register(2) as other:
+            assert notification_waiters.wake([1]) == 1
+            assert mine.is_set()
+            assert not other.is_set()
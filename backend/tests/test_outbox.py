@@ -0,0 +1,224 @@
+"""
+Tests for the notification outbox and its workers.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.broadcast_notification import BroadcastNotification
+from app.models.device import Device
+from app.models.notification_job import NotificationJob, NotificationJobType, NotificationJobStatus
+from app.models.parking_lot import ParkingLot
+from app.models.parking_session import ParkingSession
+from app.services.notification import NotificationService
+from app.services.outbox import (
+    backoff_seconds,
+    claim_jobs,
+    enqueue_job,
+    process_due_jobs,
+    run_job,
+)
+
+
+async def _lot_alert(db: AsyncSession, lot: ParkingLot) -> NotificationJob:
+    job = enqueue_job(db, NotificationJobType.LOT_ALERT, {
+        "parking_lot_id": lot.id,
+        "parking_lot_name": lot.name,
+        "parking_lot_code": lot.code,
+    })
+    await db.commit()
+    return job
+
+
+class TestOutboxProcessing:
+    """Tests for claiming and running outbox jobs."""
+
+    @pytest.mark.asyncio
+    async def test_lot_alert_job_creates_notifications(
+        self, db_session: AsyncSession, session_factory,
+        active_session: ParkingSession, verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        job = await _lot_alert(db_session, test_parking_lot)
+
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
+            assert await process_due_jobs(session_factory) == 1
+
+        await db_session.refresh(job)
+        assert job.status == NotificationJobStatus.DONE
+        assert job.attempts == 1
+
+        unread = await NotificationService.get_unread_notifications(db_session, verified_device)
+        assert len(unread) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_job_retried_with_backoff(
+        self, db_session: AsyncSession, session_factory, test_parking_lot: ParkingLot,
+    ):
+        job = await _lot_alert(db_session, test_parking_lot)
+
+        with patch.object(
+            NotificationService, "notify_parked_users",
+            new_callable=AsyncMock, side_effect=RuntimeError("db blip"),
+        ):
+            await process_due_jobs(session_factory)
+
+        await db_session.refresh(job)
+        assert job.status == NotificationJobStatus.PENDING
+        assert job.last_error == "db blip"
+        available_at = job.available_at
+        if available_at.tzinfo is None:
+            available_at = available_at.replace(tzinfo=timezone.utc)
+        assert available_at > datetime.now(timezone.utc)
+
+        # Not due again until the backoff elapses
+        assert await process_due_jobs(session_factory) == 0
+
+    @pytest.mark.asyncio
+    async def test_job_fails_after_max_attempts(
+        self, db_session: AsyncSession, session_factory, test_parking_lot: ParkingLot,
+    ):
+        job = await _lot_alert(db_session, test_parking_lot)
+        job.attempts = settings.outbox_max_attempts - 1
+        await db_session.commit()
+
+        with patch.object(
+            NotificationService, "notify_parked_users",
+            new_callable=AsyncMock, side_effect=RuntimeError("still broken"),
+        ):
+            await process_due_jobs(session_factory)
+
+        await db_session.refresh(job)
+        assert job.status == NotificationJobStatus.FAILED
+        assert job.completed_at is not None
+
+    @pytest.mark.asyncio
+    async def test_expired_claim_is_reclaimed(
+        self, db_session: AsyncSession, session_factory, test_parking_lot: ParkingLot,
+    ):
+        """A job left PROCESSING by a dead worker is picked up once its lease expires."""
+        job = await _lot_alert(db_session, test_parking_lot)
+        job.status = NotificationJobStatus.PROCESSING
+        job.attempts = 1
+        job.locked_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await db_session.commit()
+
+        async with session_factory() as db:
+            claimed = await claim_jobs(db)
+
+        assert [j.id for j in claimed] == [job.id]
+        assert claimed[0].attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_live_claim_not_reclaimed(
+        self, db_session: AsyncSession, session_factory, test_parking_lot: ParkingLot,
+    ):
+        await _lot_alert(db_session, test_parking_lot)
+
+        async with session_factory() as db:
+            assert len(await claim_jobs(db)) == 1
+        async with session_factory() as db:
+            assert await claim_jobs(db) == []
+
+    @pytest.mark.asyncio
+    async def test_stale_worker_cannot_finish_reclaimed_job(
+        self, db_session: AsyncSession, session_factory, test_parking_lot: ParkingLot,
+    ):
+        """A worker whose claim expired doesn't overwrite the new claimant's state."""
+        await _lot_alert(db_session, test_parking_lot)
+        async with session_factory() as db:
+            (stale,) = await claim_jobs(db)
+        async with session_factory() as db:
+            await db.execute(
+                update(NotificationJob).values(locked_until=datetime.now(timezone.utc) - timedelta(seconds=1))
+            )
+            await db.commit()
+        async with session_factory() as db:
+            (current,) = await claim_jobs(db)
+
+        with patch.object(
+            NotificationService, "notify_parked_users",
+            new_callable=AsyncMock, side_effect=RuntimeError("timed out"),
+        ):
+            await run_job(session_factory, stale)
+
+        async with session_factory() as db:
+            job = await db.get(NotificationJob, current.id)
+        assert job.status == NotificationJobStatus.PROCESSING
+        assert job.attempts == 2
+        assert job.last_error is None
+
+    @pytest.mark.asyncio
+    async def test_retried_lot_alert_reuses_broadcast(
+        self, db_session: AsyncSession, session_factory,
+        active_session: ParkingSession, verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        """An attempt that failed after committing the broadcast doesn't add a second one on retry."""
+        job = await _lot_alert(db_session, test_parking_lot)
+
+        with patch.object(
+            NotificationService, "prune_dead_tokens",
+            new_callable=AsyncMock, side_effect=RuntimeError("connection reset"),
+        ), patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
+            verified_device.is_push_enabled = True
+            verified_device.push_token = "fcm-token"
+            await db_session.commit()
+            await process_due_jobs(session_factory)
+            await db_session.execute(update(NotificationJob).values(available_at=datetime.now(timezone.utc)))
+            await db_session.commit()
+            await process_due_jobs(session_factory)
+
+        broadcasts = (await db_session.execute(select(BroadcastNotification))).scalars().all()
+        assert [b.job_id for b in broadcasts] == [job.id]
+        await db_session.refresh(verified_device)
+        assert verified_device.unread_notification_count == 1
+
+    def test_backoff_grows_and_caps(self):
+        assert backoff_seconds(1) == 5
+        assert backoff_seconds(2) == 10
+        assert backoff_seconds(3) == 20
+        assert backoff_seconds(50) == 300
+
+
+class TestSightingEnqueuesAlert:
+    """report_sighting writes the alert job with the sighting."""
+
+    @pytest.mark.asyncio
+    async def test_weekday_report_enqueues_job(
+        self, client: AsyncClient, db_session: AsyncSession,
+        auth_headers: dict, test_parking_lot: ParkingLot,
+    ):
+        with patch("app.api.sightings._is_weekend", return_value=False):
+            response = await client.post(
+                "/api/v1/sightings",
+                headers=auth_headers,
+                json={"parking_lot_id": test_parking_lot.id},
+            )
+
+        assert response.status_code == 201
+        job = (await db_session.execute(select(NotificationJob))).scalar_one()
+        assert job.job_type == NotificationJobType.LOT_ALERT
+        assert job.status == NotificationJobStatus.PENDING
+        assert job.payload["parking_lot_id"] == test_parking_lot.id
+        assert job.payload["sighting_id"] == response.json()["id"]
+
+    @pytest.mark.asyncio
+    async def test_weekend_report_enqueues_nothing(
+        self, client: AsyncClient, db_session: AsyncSession,
+        auth_headers: dict, test_parking_lot: ParkingLot,
+    ):
+        with patch("app.api.sightings._is_weekend", return_value=True):
+            response = await client.post(
+                "/api/v1/sightings",
+                headers=auth_headers,
+                json={"parking_lot_id": test_parking_lot.id},
+            )
+
+        assert response.status_code == 201
+        result = await db_session.execute(select(NotificationJob))
+        assert result.scalars().all() == []
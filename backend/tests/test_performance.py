@@ -93,7 +93,7 @@ class TestConcurrentOperations:
         lot = await _create_lot(db_session, "Conc Sight", "CS01")
         devices = [await create_verified_device_with_headers(db_session) for _ in range(10)]
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             results = await asyncio.gather(
                 *[
                     client.post(
@@ -115,7 +115,7 @@ class TestConcurrentOperations:
         lot = await _create_lot(db_session, "Conc Vote", "CV01")
         creator, c_hdrs = await create_verified_device_with_headers(db_session)
 
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             r = await client.post(
                 f"{API}/sightings",
                 json={"parking_lot_id": lot.id},
@@ -0,0 +1,151 @@
+"""
+Checks for the single-statement PostgreSQL write paths.
+
+The suite runs on SQLite, which takes the multi-statement fallbacks, so
+these run the raw SQL against a real Postgres given by TEST_POSTGRES_URL
+(see test_query_plans) and are skipped without one. Tables are created in
+a throwaway schema per test.
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.api.feed import _toggle_vote_pg
+from app.api.sightings import RATE_LIMIT_MINUTES, _insert_or_upvote_pg
+from app.database import Base
+from app.models.device import Device
+from app.models.parking_lot import ParkingLot
+from app.models.taps_sighting import TapsSighting
+from app.models.vote import Vote, VoteType
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+
+DEVICES = 5
+
+
+@pytest_asyncio.fixture
+async def pg_sessions():
+    """Session factory bound to a fresh schema with one lot and DEVICES devices."""
+    pytest.importorskip("asyncpg")
+    schema = f"statements_{uuid.uuid4().hex[:8]}"
+    engine = create_async_engine(
+        POSTGRES_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with sessions() as db:
+            db.add(ParkingLot(name="Lot 1", code="L1"))
+            db.add_all(Device(device_id=f"device-{n}") for n in range(1, DEVICES + 1))
+            await db.commit()
+        yield sessions
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await engine.dispose()
+
+
+async def _sighting(sessions) -> int:
+    async with sessions() as db:
+        sighting = TapsSighting(parking_lot_id=1)
+        db.add(sighting)
+        await db.commit()
+        return sighting.id
+
+
+async def _votes(sessions, sighting_id: int) -> dict:
+    async with sessions() as db:
+        result = await db.execute(
+            select(Vote.device_id, Vote.vote_type).where(Vote.sighting_id == sighting_id)
+        )
+        return dict(result.all())
+
+
+class TestToggleVote:
+    """_TOGGLE_VOTE_SQL (vote_on_sighting)."""
+
+    @pytest.mark.asyncio
+    async def test_create_update_remove(self, pg_sessions):
+        sighting_id = await _sighting(pg_sessions)
+
+        async with pg_sessions() as db:
+            assert await _toggle_vote_pg(db, sighting_id, 1, VoteType.UPVOTE) == "created"
+            assert await _toggle_vote_pg(db, sighting_id, 1, VoteType.DOWNVOTE) == "updated"
+        assert await _votes(pg_sessions, sighting_id) == {1: VoteType.DOWNVOTE}
+
+        async with pg_sessions() as db:
+            assert await _toggle_vote_pg(db, sighting_id, 1, VoteType.DOWNVOTE) == "removed"
+        assert await _votes(pg_sessions, sighting_id) == {}
+
+    @pytest.mark.asyncio
+    async def test_missing_sighting(self, pg_sessions):
+        async with pg_sessions() as db:
+            assert await _toggle_vote_pg(db, 999, 1, VoteType.UPVOTE) is None
+            assert await db.scalar(select(func.count(Vote.id))) == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_clicks_leave_one_vote(self, pg_sessions):
+        sighting_id = await _sighting(pg_sessions)
+
+        async def click(vote_type: VoteType):
+            async with pg_sessions() as db:
+                return await _toggle_vote_pg(db, sighting_id, 1, vote_type)
+
+        actions = await asyncio.gather(*(
+            click(VoteType.UPVOTE if n % 2 else VoteType.DOWNVOTE) for n in range(DEVICES)
+        ))
+
+        assert "created" in actions
+        assert len(await _votes(pg_sessions, sighting_id)) <= 1
+
+
+class TestInsertOrUpvote:
+    """_INSERT_OR_UPVOTE_SQL (report_sighting's dedupe)."""
+
+    @staticmethod
+    async def _report(sessions, device_id: int):
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=RATE_LIMIT_MINUTES)
+        async with sessions() as db:
+            sighting, created = await _insert_or_upvote_pg(db, 1, device_id, f"from {device_id}", cutoff)
+            await db.commit()
+            return sighting, created
+
+    @pytest.mark.asyncio
+    async def test_second_report_upvotes(self, pg_sessions):
+        first, created = await self._report(pg_sessions, 1)
+        assert created
+        assert first.notes == "from 1"
+
+        second, created = await self._report(pg_sessions, 2)
+        assert not created
+        assert second.id == first.id
+        assert await _votes(pg_sessions, first.id) == {2: VoteType.UPVOTE}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reports_create_one_sighting(self, pg_sessions):
+        results = await asyncio.gather(*(
+            self._report(pg_sessions, device_id) for device_id in range(1, DEVICES + 1)
+        ))
+
+        assert sum(created for _, created in results) == 1
+        sighting_ids = {sighting.id for sighting, _ in results}
+        assert len(sighting_ids) == 1
+        async with pg_sessions() as db:
+            assert await db.scalar(select(func.count(TapsSighting.id))) == 1
+        # Every reporter but the creator upvoted it
+        assert len(await _votes(pg_sessions, sighting_ids.pop())) == DEVICES - 1
@@ -1,21 +1,33 @@
 """
 Tests for push notification sending: FCM (Android) and APNs (iOS).
 
-Covers NotificationService.send_push_notification, _send_fcm, _send_apns,
-_is_fcm_token, send_checkout_reminder, and notify_parked_users.
+Covers NotificationService.send_push_messages, send_push_notifications,
+_send_fcm_batch, _send_apns_result, _is_fcm_token, send_checkout_reminders,
+and notify_parked_users.
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.device import Device
 from app.models.notification import Notification, NotificationType
 from app.models.parking_lot import ParkingLot
 from app.models.parking_session import ParkingSession
-from app.services.notification import NotificationService
+from app.config import settings
+from app.services.metrics import latency, metrics_snapshot, reset_metrics
+from app.services.notification import (
+    NotificationService,
+    PushMessage,
+    PushResult,
+    _is_dead_fcm_token_error,
+)
+from app.services.push_lanes import LaneGate, PushLane
 
 
 # ---------------------------------------------------------------------------
@@ -42,150 +54,131 @@ class TestIsFcmToken:
 
 
 # ---------------------------------------------------------------------------
-# send_push_notification (routes to _send_fcm or _send_apns)
+# _send_fcm_batch / send_push_notifications
 # ---------------------------------------------------------------------------
 
-class TestSendPushNotification:
-    """Tests for the routing logic in send_push_notification."""
+class _UnregisteredError(Exception):
+    pass
 
-    @pytest.mark.asyncio
-    async def test_routes_to_fcm_for_fcm_token(self):
-        """FCM token → _send_fcm called."""
-        fcm_token = "dGVzdDp0b2tlbjp3aXRoOmNvbG9ucw:APA91bExample"
-        with patch.object(
-            NotificationService, "_send_fcm", new_callable=AsyncMock, return_value=True
-        ) as mock_fcm, patch.object(
-            NotificationService, "_send_apns", new_callable=AsyncMock
-        ) as mock_apns:
-            result = await NotificationService.send_push_notification(
-                fcm_token, "Title", "Body"
-            )
 
-            assert result is True
-            mock_fcm.assert_called_once_with(fcm_token, "Title", "Body", None)
-            mock_apns.assert_not_called()
+class _SenderIdMismatchError(Exception):
+    pass
 
-    @pytest.mark.asyncio
-    async def test_routes_to_apns_for_apns_token(self):
-        """APNs token → _send_apns called."""
-        apns_token = "a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4e5f6a1b2"
-        with patch.object(
-            NotificationService, "_send_apns", new_callable=AsyncMock, return_value=True
-        ) as mock_apns, patch.object(
-            NotificationService, "_send_fcm", new_callable=AsyncMock
-        ) as mock_fcm:
-            result = await NotificationService.send_push_notification(
-                apns_token, "Title", "Body"
-            )
 
-            assert result is True
-            mock_apns.assert_called_once_with(apns_token, "Title", "Body", None, 1, False)
-            mock_fcm.assert_not_called()
+def _mock_fcm_batch(mock_messaging, fail_tokens=()):
+    """Wire a mocked fcm_messaging whose send_each fails for `fail_tokens`."""
+    mock_messaging.Message = MagicMock(side_effect=lambda token, **kw: token)
+    mock_messaging.UnregisteredError = _UnregisteredError
+    mock_messaging.SenderIdMismatchError = _SenderIdMismatchError
 
-    @pytest.mark.asyncio
-    async def test_passes_data_payload(self):
-        """Extra data dict is forwarded to the underlying sender."""
-        fcm_token = "dGVzdDp0b2tlbjp3aXRoOmNvbG9ucw:APA91bExample"
-        data = {"type": "TAPS_SPOTTED", "lot_id": 1}
-        with patch.object(
-            NotificationService, "_send_fcm", new_callable=AsyncMock, return_value=True
-        ) as mock_fcm:
-            await NotificationService.send_push_notification(
-                fcm_token, "Title", "Body", data
-            )
+    def send_each(messages):
+        responses = [
+            MagicMock(success=False, exception=_UnregisteredError("gone"))
+            if token in fail_tokens else MagicMock(success=True, exception=None)
+            for token in messages
+        ]
+        return MagicMock(responses=responses, success_count=sum(r.success for r in responses))
 
-            mock_fcm.assert_called_once_with(fcm_token, "Title", "Body", data)
+    mock_messaging.send_each = MagicMock(side_effect=send_each)
 
-    @pytest.mark.asyncio
-    async def test_returns_false_on_send_failure(self):
-        """If underlying sender returns False, so does send_push_notification."""
-        fcm_token = "dGVzdDp0b2tlbjp3aXRoOmNvbG9ucw:APA91bExample"
-        with patch.object(
-            NotificationService, "_send_fcm", new_callable=AsyncMock, return_value=False
-        ):
-            result = await NotificationService.send_push_notification(
-                fcm_token, "Title", "Body"
-            )
 
-            assert result is False
+class TestSendFcmBatch:
+    """Tests for batched FCM sends."""
 
+    @pytest.mark.asyncio
+    async def test_chunks_and_per_token_results(self):
+        """Tokens are sent in chunks of FCM_BATCH_SIZE with one result per token."""
+        tokens = [f"fcm:{i}" for i in range(5)]
+        with patch("app.services.notification.FCM_IMPORTABLE", True), \
+             patch("app.services.notification.FCM_BATCH_SIZE", 2), \
+             patch("app.services.notification.firebase_admin") as mock_admin, \
+             patch("app.services.notification.fcm_messaging") as mock_messaging:
+            mock_admin.get_app.return_value = MagicMock()
+            _mock_fcm_batch(mock_messaging, fail_tokens={"fcm:3"})
 
-# ---------------------------------------------------------------------------
-# _send_fcm
-# ---------------------------------------------------------------------------
+            results = await NotificationService._send_fcm_batch(
+                [PushMessage(token, "Title", "Body") for token in tokens]
+            )
 
-class TestSendFcm:
-    """Tests for FCM sending with firebase_admin mocked."""
+        assert mock_messaging.send_each.call_count == 3
+        assert [r.token for r in results] == tokens
+        assert [r.success for r in results] == [True, True, True, False, True]
+        assert results[3].unregistered is True
 
     @pytest.mark.asyncio
-    async def test_send_fcm_success(self):
-        """Successful FCM send returns True."""
+    async def test_batch_error_fails_whole_chunk(self):
+        """An exception from send_each marks every token in that chunk failed."""
         with patch("app.services.notification.FCM_IMPORTABLE", True), \
              patch("app.services.notification.firebase_admin") as mock_admin, \
              patch("app.services.notification.fcm_messaging") as mock_messaging:
             mock_admin.get_app.return_value = MagicMock()
-            mock_messaging.Message = MagicMock()
-            mock_messaging.Notification = MagicMock()
-            mock_messaging.AndroidConfig = MagicMock()
-            mock_messaging.AndroidNotification = MagicMock()
-            mock_messaging.send = MagicMock(return_value="projects/test/messages/123")
-
-            result = await NotificationService._send_fcm(
-                "fcm-token:example", "Title", "Body"
+            _mock_fcm_batch(mock_messaging)
+            mock_messaging.send_each.side_effect = Exception("quota")
+
+            results = await NotificationService._send_fcm_batch(
+                [PushMessage("fcm:1", "Title", "Body"), PushMessage("fcm:2", "Title", "Body")]
             )
 
-            assert result is True
+        assert [(r.success, r.error) for r in results] == [(False, "quota"), (False, "quota")]
 
     @pytest.mark.asyncio
-    async def test_send_fcm_not_importable(self):
-        """Firebase not installed → returns False."""
+    async def test_fcm_unavailable(self):
+        """Firebase not installed or not initialized → every message fails without a send."""
+        messages = [PushMessage("fcm:1", "Title", "Body")]
         with patch("app.services.notification.FCM_IMPORTABLE", False):
-            result = await NotificationService._send_fcm(
-                "fcm-token:example", "Title", "Body"
-            )
-
-            assert result is False
+            results = await NotificationService._send_fcm_batch(messages)
+        assert [(r.success, r.error) for r in results] == [(False, "FCM unavailable")]
 
-    @pytest.mark.asyncio
-    async def test_send_fcm_not_initialized(self):
-        """Firebase app not initialized → returns False."""
         with patch("app.services.notification.FCM_IMPORTABLE", True), \
              patch("app.services.notification.firebase_admin") as mock_admin:
             mock_admin.get_app.side_effect = ValueError("No app")
+            results = await NotificationService._send_fcm_batch(messages)
+        assert [(r.success, r.error) for r in results] == [(False, "FCM unavailable")]
 
-            result = await NotificationService._send_fcm(
-                "fcm-token:example", "Title", "Body"
+    @pytest.mark.asyncio
+    async def test_send_push_notifications_splits_by_platform(self):
+        """FCM tokens are batched; APNs tokens are sent one by one."""
+        fcm_token = "fcm-token:example"
+        apns_token = "a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4e5f6a1b2"
+
+        with patch.object(
+            NotificationService, "_send_fcm_batch", new_callable=AsyncMock,
+            side_effect=lambda messages, *a: [PushResult(m.token, True) for m in messages],
+        ) as mock_batch, patch.object(
+            NotificationService, "_send_apns_result", new_callable=AsyncMock,
+            return_value=PushResult(apns_token, False, "BadDeviceToken", unregistered=True),
+        ) as mock_apns:
+            results = await NotificationService.send_push_notifications(
+                [fcm_token, apns_token], "Title", "Body", badge=3, time_sensitive=True,
+                lane=PushLane.ALERT, collapse_id="taps-lot-1",
             )
 
-            assert result is False
+        mock_batch.assert_called_once_with(
+            [PushMessage(fcm_token, "Title", "Body")], PushLane.ALERT, "taps-lot-1"
+        )
+        mock_apns.assert_called_once_with(
+            apns_token, "Title", "Body", None, 3, True, PushLane.ALERT, "taps-lot-1"
+        )
+        assert results[fcm_token].success is True
+        assert results[apns_token].success is False
 
     @pytest.mark.asyncio
-    async def test_send_fcm_send_error(self):
-        """FCM send raises exception → returns False."""
-
-        class _UnregisteredError(Exception):
-            pass
-
+    async def test_collapse_id_sets_fcm_collapse_key(self):
         with patch("app.services.notification.FCM_IMPORTABLE", True), \
              patch("app.services.notification.firebase_admin") as mock_admin, \
              patch("app.services.notification.fcm_messaging") as mock_messaging:
             mock_admin.get_app.return_value = MagicMock()
-            mock_messaging.Message = MagicMock()
-            mock_messaging.Notification = MagicMock()
-            mock_messaging.AndroidConfig = MagicMock()
-            mock_messaging.AndroidNotification = MagicMock()
-            mock_messaging.UnregisteredError = _UnregisteredError
-            mock_messaging.send = MagicMock(side_effect=Exception("send failed"))
-
-            result = await NotificationService._send_fcm(
-                "fcm-token:example", "Title", "Body"
+            _mock_fcm_batch(mock_messaging)
+
+            await NotificationService._send_fcm_batch(
+                [PushMessage("fcm:1", "Title", "Body")], collapse_id="taps-lot-1"
             )
 
-            assert result is False
+        assert mock_messaging.AndroidConfig.call_args.kwargs["collapse_key"] == "taps-lot-1"
 
 
 # ---------------------------------------------------------------------------
-# _send_apns
+# _send_apns_result
 # ---------------------------------------------------------------------------
 
 class TestSendApns:
@@ -203,13 +196,28 @@ class TestSendApns:
         with patch.object(
             NotificationService, "_get_apns_client", return_value=mock_client
         ):
-            result = await NotificationService._send_apns(
+            result = await NotificationService._send_apns_result(
                 "a1b2c3d4" * 8, "Title", "Body"
             )
 
-            assert result is True
+            assert result.success is True
             mock_client.send_notification.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_collapse_id_sent_as_apns_collapse_id(self):
+        mock_client = AsyncMock()
+        mock_client.send_notification = AsyncMock(return_value=MagicMock(is_successful=True))
+
+        with patch.object(
+            NotificationService, "_get_apns_client", return_value=mock_client
+        ):
+            await NotificationService._send_apns_result(
+                "a1b2c3d4" * 8, "Title", "Body", collapse_id="taps-lot-1"
+            )
+
+        request = mock_client.send_notification.call_args.args[0]
+        assert request.collapse_key == "taps-lot-1"
+
     @pytest.mark.asyncio
     async def test_send_apns_failure_response(self):
         """APNs returns unsuccessful → returns False."""
@@ -223,11 +231,11 @@ class TestSendApns:
         with patch.object(
             NotificationService, "_get_apns_client", return_value=mock_client
         ):
-            result = await NotificationService._send_apns(
+            result = await NotificationService._send_apns_result(
                 "a1b2c3d4" * 8, "Title", "Body"
             )
 
-            assert result is False
+            assert result.success is False
 
     @pytest.mark.asyncio
     async def test_send_apns_no_client(self):
@@ -235,11 +243,11 @@ class TestSendApns:
         with patch.object(
             NotificationService, "_get_apns_client", return_value=None
         ):
-            result = await NotificationService._send_apns(
+            result = await NotificationService._send_apns_result(
                 "a1b2c3d4" * 8, "Title", "Body"
             )
 
-            assert result is False
+            assert result.success is False
 
     @pytest.mark.asyncio
     async def test_send_apns_exception(self):
@@ -250,19 +258,192 @@ class TestSendApns:
         with patch.object(
             NotificationService, "_get_apns_client", return_value=mock_client
         ):
-            result = await NotificationService._send_apns(
+            result = await NotificationService._send_apns_result(
                 "a1b2c3d4" * 8, "Title", "Body"
             )
 
-            assert result is False
+            assert result.success is False
+
+    @pytest.mark.asyncio
+    async def test_send_apns_dead_token_flagged(self):
+        """BadDeviceToken/Unregistered responses mark the token unregistered."""
+        mock_client = AsyncMock()
+        mock_client.send_notification = AsyncMock(
+            return_value=MagicMock(is_successful=False, description="BadDeviceToken")
+        )
+
+        with patch.object(
+            NotificationService, "_get_apns_client", return_value=mock_client
+        ):
+            result = await NotificationService._send_apns_result(
+                "a1b2c3d4" * 8, "Title", "Body"
+            )
+
+        assert result.success is False
+        assert result.unregistered is True
+
+    @pytest.mark.asyncio
+    async def test_send_apns_timeout(self):
+        """A send slower than apns_send_timeout_seconds is abandoned and counted."""
+        async def slow_send(request):
+            await asyncio.sleep(1)
+
+        mock_client = AsyncMock()
+        mock_client.send_notification = slow_send
+        reset_metrics()
+
+        with patch.object(
+            NotificationService, "_get_apns_client", return_value=mock_client
+        ), patch.object(settings, "apns_send_timeout_seconds", 0.01):
+            result = await NotificationService._send_apns_result(
+                "a1b2c3d4" * 8, "Title", "Body"
+            )
+
+        assert result.success is False
+        assert latency("push.apns").timeouts == 1
+
+    @pytest.mark.asyncio
+    async def test_send_apns_concurrency_bounded(self):
+        """No more than the shared cap of requests are in flight at once."""
+        in_flight = 0
+        peak = 0
+
+        async def send(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MagicMock(is_successful=True)
+
+        mock_client = AsyncMock()
+        mock_client.send_notification = send
+
+        with patch.object(
+            NotificationService, "_get_apns_client", return_value=mock_client
+        ), patch("app.services.push_lanes._gate", LaneGate(3, {PushLane.REMINDER: 3})):
+            results = await asyncio.gather(*(
+                NotificationService._send_apns_result("a1b2c3d4" * 8, "Title", "Body")
+                for _ in range(10)
+            ))
+
+        assert all(r.success for r in results)
+        assert peak == 3
 
 
 # ---------------------------------------------------------------------------
-# send_checkout_reminder
+# Push priority lanes
 # ---------------------------------------------------------------------------
 
-class TestSendCheckoutReminder:
-    """Tests for the checkout reminder flow."""
+class TestPushLanes:
+    """Alert-lane sends go ahead of reminder-lane sends."""
+
+    @pytest.mark.asyncio
+    async def test_reminders_wait_for_alerts(self):
+        gate = LaneGate(5, {PushLane.REMINDER: 5})
+        order = []
+        release_alert = asyncio.Event()
+
+        async def send(lane, name, hold=None):
+            async with gate.slot(lane):
+                order.append(name)
+                if hold is not None:
+                    await hold.wait()
+
+        alert = asyncio.create_task(send(PushLane.ALERT, "alert-1", release_alert))
+        await asyncio.sleep(0)
+        reminder = asyncio.create_task(send(PushLane.REMINDER, "reminder"))
+        await asyncio.sleep(0.01)
+        assert order == ["alert-1"]  # Reminder held while the alert is in flight
+
+        # A second alert queued now still goes before the waiting reminder
+        second = asyncio.create_task(send(PushLane.ALERT, "alert-2"))
+        await asyncio.sleep(0.01)
+        release_alert.set()
+        await asyncio.gather(alert, reminder, second)
+
+        assert order == ["alert-1", "alert-2", "reminder"]
+        assert gate.alerts_pending == 0
+
+    @pytest.mark.asyncio
+    async def test_reminders_count_against_shared_cap(self):
+        gate = LaneGate(3, {PushLane.REMINDER: 1})
+        release = asyncio.Event()
+        in_flight = []
+
+        async def send(lane):
+            async with gate.slot(lane):
+                in_flight.append(lane)
+                await release.wait()
+
+        reminder = asyncio.create_task(send(PushLane.REMINDER))
+        await asyncio.sleep(0)
+        alerts = [asyncio.create_task(send(PushLane.ALERT)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        # The in-flight reminder isn't preempted and holds one of the 3 slots
+        assert in_flight == [PushLane.REMINDER, PushLane.ALERT, PushLane.ALERT]
+        release.set()
+        await asyncio.gather(reminder, *alerts)
+
+    @pytest.mark.asyncio
+    async def test_reminder_budget_below_shared_cap(self):
+        gate = LaneGate(3, {PushLane.REMINDER: 1})
+        release = asyncio.Event()
+        in_flight = []
+
+        async def send():
+            async with gate.slot(PushLane.REMINDER):
+                in_flight.append(PushLane.REMINDER)
+                await release.wait()
+
+        reminders = [asyncio.create_task(send()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        assert len(in_flight) == 1
+        release.set()
+        await asyncio.gather(*reminders)
+        assert len(in_flight) == 3
+
+    @pytest.mark.asyncio
+    async def test_lot_alert_uses_alert_lane(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        verified_device.push_token = "a" * 64
+        verified_device.is_push_enabled = True
+        await db_session.commit()
+
+        with patch.object(
+            NotificationService, "send_push_notifications",
+            new_callable=AsyncMock, return_value={},
+        ) as mock_push:
+            await NotificationService.notify_parked_users(
+                db=db_session,
+                parking_lot_id=test_parking_lot.id,
+                parking_lot_name=test_parking_lot.name,
+            )
+
+        assert mock_push.call_args.kwargs["lane"] == PushLane.ALERT
+
+
+# ---------------------------------------------------------------------------
+# send_checkout_reminders
+# ---------------------------------------------------------------------------
+
+async def _load_sessions(db: AsyncSession, *sessions: ParkingSession):
+    """Reload sessions with device and parking_lot, as the reminder job does."""
+    result = await db.execute(
+        select(ParkingSession)
+        .where(ParkingSession.id.in_([s.id for s in sessions]))
+        .options(selectinload(ParkingSession.device), selectinload(ParkingSession.parking_lot))
+        .order_by(ParkingSession.id)
+    )
+    return list(result.scalars().all())
+
+
+class TestSendCheckoutReminders:
+    """Tests for the batched checkout reminder flow."""
 
     @pytest.mark.asyncio
     async def test_sends_reminder_with_push(
@@ -276,19 +457,22 @@ class TestSendCheckoutReminder:
         await db_session.commit()
 
         with patch.object(
-            NotificationService, "send_push_notification",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_push_messages",
+            new_callable=AsyncMock, return_value={"fcm-token:example": PushResult("fcm-token:example", True)},
         ) as mock_push:
-            result = await NotificationService.send_checkout_reminder(
-                db=db_session,
-                session=active_session,
-                device=verified_device,
-                parking_lot_name=test_parking_lot.name,
+            result = await NotificationService.send_checkout_reminders(
+                db_session, await _load_sessions(db_session, active_session)
             )
 
-            assert result is True
-            assert active_session.reminder_sent is True
+            assert result == 1
             mock_push.assert_called_once()
+            assert mock_push.call_args.kwargs["lane"] == PushLane.REMINDER
+            [message] = mock_push.call_args.args[0]
+            assert message.token == "fcm-token:example"
+            assert test_parking_lot.name in message.body
+
+        await db_session.refresh(active_session)
+        assert active_session.reminder_sent is True
 
     @pytest.mark.asyncio
     async def test_sends_reminder_without_push_token(
@@ -301,20 +485,19 @@ class TestSendCheckoutReminder:
         await db_session.commit()
 
         with patch.object(
-            NotificationService, "send_push_notification",
+            NotificationService, "send_push_messages",
             new_callable=AsyncMock,
         ) as mock_push:
-            result = await NotificationService.send_checkout_reminder(
-                db=db_session,
-                session=active_session,
-                device=verified_device,
-                parking_lot_name=test_parking_lot.name,
+            result = await NotificationService.send_checkout_reminders(
+                db_session, await _load_sessions(db_session, active_session)
             )
 
-            assert result is True
-            assert active_session.reminder_sent is True
+            assert result == 1
             mock_push.assert_not_called()
 
+        await db_session.refresh(active_session)
+        assert active_session.reminder_sent is True
+
     @pytest.mark.asyncio
     async def test_creates_in_app_notification(
         self, db_session: AsyncSession, active_session: ParkingSession,
@@ -322,17 +505,13 @@ class TestSendCheckoutReminder:
     ):
         """Reminder always creates a CHECKOUT_REMINDER notification in DB."""
         with patch.object(
-            NotificationService, "send_push_notification",
-            new_callable=AsyncMock, return_value=False,
+            NotificationService, "send_push_messages",
+            new_callable=AsyncMock, return_value={},
         ):
-            await NotificationService.send_checkout_reminder(
-                db=db_session,
-                session=active_session,
-                device=verified_device,
-                parking_lot_name=test_parking_lot.name,
+            await NotificationService.send_checkout_reminders(
+                db_session, await _load_sessions(db_session, active_session)
             )
 
-        from sqlalchemy import select
         result = await db_session.execute(
             select(Notification).where(
                 Notification.device_id == verified_device.id,
@@ -341,6 +520,91 @@ class TestSendCheckoutReminder:
         )
         notification = result.scalar_one()
         assert test_parking_lot.name in notification.message
+        await db_session.refresh(verified_device)
+        assert verified_device.unread_notification_count == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_writes_once_and_sends_fcm_together(
+        self, db_session: AsyncSession, test_parking_lot: ParkingLot
+    ):
+        """One commit for the whole batch; FCM reminders share one send_each call despite differing bodies."""
+        sessions = []
+        for i in range(3):
+            device = Device(device_id=f"reminder-{i}", email_verified=True,
+                            is_push_enabled=True, push_token=f"fcm-token:{i}")
+            db_session.add(device)
+            await db_session.flush()
+            session = ParkingSession(device_id=device.id, parking_lot_id=test_parking_lot.id,
+                                     checked_in_at=datetime.now(timezone.utc) - timedelta(hours=4))
+            db_session.add(session)
+            sessions.append(session)
+        await db_session.commit()
+        loaded = await _load_sessions(db_session, *sessions)
+
+        with patch("app.services.notification.FCM_IMPORTABLE", True), \
+             patch("app.services.notification.firebase_admin") as mock_admin, \
+             patch("app.services.notification.fcm_messaging") as mock_messaging, \
+             patch.object(db_session, "commit", wraps=db_session.commit) as mock_commit:
+            mock_admin.get_app.return_value = MagicMock()
+            _mock_fcm_batch(mock_messaging)
+            result = await NotificationService.send_checkout_reminders(db_session, loaded)
+
+        assert result == 3
+        mock_messaging.send_each.assert_called_once()
+        assert sorted(mock_messaging.send_each.call_args.args[0]) == [f"fcm-token:{i}" for i in range(3)]
+        session_ids = {call.kwargs["data"]["session_id"] for call in mock_messaging.Message.call_args_list}
+        assert session_ids == {str(session.id) for session in sessions}
+        mock_commit.assert_called_once()
+        for session in sessions:
+            await db_session.refresh(session)
+            assert session.reminder_sent is True
+
+    @pytest.mark.asyncio
+    async def test_push_failure_keeps_reminders(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        """The reminders are committed before the pushes, so a failed send doesn't undo them."""
+        verified_device.is_push_enabled = True
+        verified_device.push_token = "fcm-token:example"
+        await db_session.commit()
+
+        with patch.object(
+            NotificationService, "send_push_messages", new_callable=AsyncMock,
+            side_effect=RuntimeError("push exploded"),
+        ):
+            result = await NotificationService.send_checkout_reminders(
+                db_session, await _load_sessions(db_session, active_session)
+            )
+
+        assert result == 1
+        await db_session.refresh(active_session)
+        assert active_session.reminder_sent is True
+
+    @pytest.mark.asyncio
+    async def test_dead_tokens_pruned(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        """A token the provider reports dead is cleared, and the lot's push targets dropped."""
+        verified_device.is_push_enabled = True
+        verified_device.push_token = "fcm-token:dead"
+        await db_session.commit()
+
+        with patch.object(
+            NotificationService, "send_push_messages", new_callable=AsyncMock,
+            return_value={"fcm-token:dead": PushResult("fcm-token:dead", False, "Unregistered", unregistered=True)},
+        ), patch(
+            "app.services.notification.invalidate_push_targets", new_callable=AsyncMock,
+        ) as mock_invalidate:
+            await NotificationService.send_checkout_reminders(
+                db_session, await _load_sessions(db_session, active_session)
+            )
+
+        await db_session.refresh(verified_device)
+        assert verified_device.push_token is None
+        assert verified_device.is_push_enabled is False
+        mock_invalidate.assert_called_once_with(test_parking_lot.id)
 
 
 # ---------------------------------------------------------------------------
@@ -355,10 +619,10 @@ class TestNotifyParkedUsers:
         self, db_session: AsyncSession, active_session: ParkingSession,
         verified_device: Device, test_parking_lot: ParkingLot
     ):
-        """One user parked → one notification created, returns 1."""
+        """One user parked → one broadcast visible to them, returns 1."""
         with patch.object(
-            NotificationService, "send_push_notification",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_push_notifications",
+            new_callable=AsyncMock, return_value={},
         ):
             count = await NotificationService.notify_parked_users(
                 db=db_session,
@@ -368,14 +632,8 @@ class TestNotifyParkedUsers:
 
             assert count == 1
 
-        from sqlalchemy import select
-        result = await db_session.execute(
-            select(Notification).where(
-                Notification.device_id == verified_device.id,
-                Notification.notification_type == NotificationType.TAPS_SPOTTED,
-            )
-        )
-        assert result.scalar_one() is not None
+        unread = await NotificationService.get_unread_notifications(db_session, verified_device)
+        assert [n.notification_type for n in unread] == [NotificationType.TAPS_SPOTTED]
 
     @pytest.mark.asyncio
     async def test_notify_no_parked_users(
@@ -383,8 +641,8 @@ class TestNotifyParkedUsers:
     ):
         """No active sessions → returns 0, no notifications created."""
         with patch.object(
-            NotificationService, "send_push_notification",
-            new_callable=AsyncMock,
+            NotificationService, "send_push_notifications",
+            new_callable=AsyncMock, return_value={},
         ) as mock_push:
             count = await NotificationService.notify_parked_users(
                 db=db_session,
@@ -406,8 +664,8 @@ class TestNotifyParkedUsers:
         await db_session.commit()
 
         with patch.object(
-            NotificationService, "send_push_notification",
-            new_callable=AsyncMock,
+            NotificationService, "send_push_notifications",
+            new_callable=AsyncMock, return_value={},
         ) as mock_push:
             count = await NotificationService.notify_parked_users(
                 db=db_session,
@@ -418,6 +676,53 @@ class TestNotifyParkedUsers:
             assert count == 1  # still counted as notified (in-app)
             mock_push.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_alert_stages_traced_from_sighting(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        """Each stage is observed as latency since the sighting was reported."""
+        token = "a" * 64
+        verified_device.push_token = token
+        verified_device.is_push_enabled = True
+        await db_session.commit()
+        reset_metrics()
+
+        now = datetime.now(timezone.utc)
+        with patch.object(
+            NotificationService, "send_push_notifications",
+            new_callable=AsyncMock, return_value={token: PushResult(token, True, acked_at=now)},
+        ):
+            await NotificationService.notify_parked_users(
+                db=db_session,
+                parking_lot_id=test_parking_lot.id,
+                parking_lot_name=test_parking_lot.name,
+                sighting_reported_at=now - timedelta(seconds=3),
+            )
+
+        snapshot = metrics_snapshot()["latency"]
+        for stage in ("fanout_started", "rows_inserted", "fanout_finished"):
+            assert snapshot[f"alert.{stage}"]["p50_ms"] >= 3000
+        acked = snapshot["alert.push_acked.apns"]
+        assert acked["count"] == 1
+        assert acked["p50_ms"] == 3000.0
+        assert (acked["buckets_s"]["2.0"], acked["buckets_s"]["5.0"]) == (0, 1)
+        assert "alert.push_acked.fcm" not in snapshot
+
+    @pytest.mark.asyncio
+    async def test_alert_without_sighting_not_traced(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        test_parking_lot: ParkingLot
+    ):
+        reset_metrics()
+        await NotificationService.notify_parked_users(
+            db=db_session,
+            parking_lot_id=test_parking_lot.id,
+            parking_lot_name=test_parking_lot.name,
+        )
+
+        assert not any(name.startswith("alert.") for name in metrics_snapshot()["latency"])
+
     @pytest.mark.asyncio
     async def test_notify_multiple_users(
         self, db_session: AsyncSession, test_parking_lot: ParkingLot
@@ -447,8 +752,8 @@ class TestNotifyParkedUsers:
         await db_session.commit()
 
         with patch.object(
-            NotificationService, "send_push_notification",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_push_notifications",
+            new_callable=AsyncMock, return_value={},
         ):
             count = await NotificationService.notify_parked_users(
                 db=db_session,
@@ -457,3 +762,160 @@ class TestNotifyParkedUsers:
             )
 
             assert count == 3
+
+
+
+class TestAlertSuppression:
+    """Repeat alerts for a lot skip devices alerted within the suppression window."""
+
+    @staticmethod
+    def _claims(suppressed_device_ids):
+        def claim(keys, ttl):
+            assert ttl == settings.alert_suppression_minutes * 60
+            return [int(key.rsplit(":", 1)[1]) not in suppressed_device_ids for key in keys]
+        return claim
+
+    async def _park_second_device(self, db: AsyncSession, lot: ParkingLot) -> Device:
+        device = Device(device_id="second-device", email_verified=True,
+                        is_push_enabled=True, push_token="b" * 64)
+        db.add(device)
+        await db.flush()
+        db.add(ParkingSession(
+            device_id=device.id,
+            parking_lot_id=lot.id,
+            checked_in_at=datetime.now(timezone.utc) - timedelta(hours=1),
+        ))
+        await db.commit()
+        return device
+
+    @pytest.mark.asyncio
+    async def test_recently_alerted_device_not_pushed(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        verified_device.push_token = "a" * 64
+        verified_device.is_push_enabled = True
+        await db_session.commit()
+        await self._park_second_device(db_session, test_parking_lot)
+        reset_metrics()
+
+        with patch(
+            "app.services.notification.cache_claim_many", new_callable=AsyncMock,
+            side_effect=self._claims({verified_device.id}),
+        ), patch.object(
+            NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={},
+        ) as mock_push:
+            count = await NotificationService.notify_parked_users(
+                db=db_session,
+                parking_lot_id=test_parking_lot.id,
+                parking_lot_name=test_parking_lot.name,
+            )
+
+        assert count == 2
+        assert mock_push.call_args.kwargs["push_tokens"] == ["b" * 64]
+        assert mock_push.call_args.kwargs["collapse_id"] == f"taps-lot-{test_parking_lot.id}"
+        assert metrics_snapshot()["counters"]["alert.suppressed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_fully_suppressed_alert_adds_no_notification(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        with patch(
+            "app.services.notification.cache_claim_many", new_callable=AsyncMock,
+            side_effect=self._claims({verified_device.id}),
+        ), patch.object(
+            NotificationService, "send_push_notifications", new_callable=AsyncMock,
+        ) as mock_push:
+            count = await NotificationService.notify_parked_users(
+                db=db_session,
+                parking_lot_id=test_parking_lot.id,
+                parking_lot_name=test_parking_lot.name,
+            )
+
+        assert count == 0
+        mock_push.assert_not_called()
+        assert await NotificationService.get_unread_notifications(db_session, verified_device) == []
+
+    @pytest.mark.asyncio
+    async def test_failed_alert_releases_claims(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        """A retry of an alert that never went out is not suppressed."""
+        with patch(
+            "app.services.notification.cache_claim_many", new_callable=AsyncMock,
+            side_effect=self._claims(set()),
+        ), patch(
+            "app.services.notification.cache_delete", new_callable=AsyncMock,
+        ) as mock_delete, patch.object(
+            NotificationService, "_adjust_counts", new_callable=AsyncMock,
+            side_effect=RuntimeError("db blip"),
+        ):
+            with pytest.raises(RuntimeError):
+                await NotificationService.notify_parked_users(
+                    db=db_session,
+                    parking_lot_id=test_parking_lot.id,
+                    parking_lot_name=test_parking_lot.name,
+                )
+
+        mock_delete.assert_called_once_with(f"alert_sent:{test_parking_lot.id}:{verified_device.id}")
+
+
+# ---------------------------------------------------------------------------
+# Dead token pruning
+# ---------------------------------------------------------------------------
+
+class TestPruneDeadTokens:
+    """Provider feedback clears tokens that will never work again."""
+
+    def test_fcm_dead_token_errors(self):
+        from firebase_admin import exceptions, messaging
+
+        assert _is_dead_fcm_token_error(messaging.UnregisteredError("gone"))
+        assert _is_dead_fcm_token_error(exceptions.InvalidArgumentError(
+            "The registration token is not a valid FCM registration token"
+        ))
+        assert not _is_dead_fcm_token_error(exceptions.InvalidArgumentError("Invalid JSON payload"))
+        assert not _is_dead_fcm_token_error(exceptions.UnavailableError("try later"))
+
+    @pytest.mark.asyncio
+    async def test_alert_prunes_dead_tokens(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        """Tokens reported dead during a lot alert are cleared from their devices."""
+        verified_device.push_token = "dead-token:abc"
+        verified_device.is_push_enabled = True
+        await db_session.commit()
+
+        with patch.object(
+            NotificationService, "send_push_notifications", new_callable=AsyncMock,
+            return_value={"dead-token:abc": PushResult("dead-token:abc", False, "gone", unregistered=True)},
+        ):
+            await NotificationService.notify_parked_users(
+                db=db_session,
+                parking_lot_id=test_parking_lot.id,
+                parking_lot_name=test_parking_lot.name,
+            )
+
+        await db_session.refresh(verified_device)
+        assert verified_device.push_token is None
+        assert verified_device.push_platform is None
+        assert verified_device.is_push_enabled is False
+
+    @pytest.mark.asyncio
+    async def test_transient_failures_keep_token(
+        self, db_session: AsyncSession, verified_device: Device
+    ):
+        verified_device.push_token = "flaky-token:abc"
+        verified_device.is_push_enabled = True
+        await db_session.commit()
+
+        pruned = await NotificationService.prune_dead_tokens(
+            db_session, {"flaky-token:abc": PushResult("flaky-token:abc", False, "timeout")}
+        )
+
+        assert pruned == 0
+        await db_session.refresh(verified_device)
+        assert verified_device.push_token == "flaky-token:abc"
@@ -0,0 +1,208 @@
+"""
+Tests for stored push platforms and the per-lot push target index.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Set
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.device import Device, PushPlatform
+from app.models.parking_lot import ParkingLot
+from app.models.parking_session import ParkingSession
+from app.services import push_targets
+from app.services.push_targets import (
+    COMPLETE,
+    PushTarget,
+    add_push_target,
+    get_lot_push_targets,
+    remove_push_target,
+)
+
+APNS_TOKEN = "a1b2c3d4" * 8
+FCM_TOKEN = "dGVzdDp0b2tlbg:APA91bExample"
+
+
+@pytest_asyncio.fixture
+async def fake_sets():
+    """Back the push target index with an in-memory dict of sets instead of Redis."""
+    store: Dict[str, Set[str]] = {}
+
+    async def members(key):
+        return set(store.get(key, set()))
+
+    async def add(key, values, ttl=None):
+        store.setdefault(key, set()).update(values)
+
+    async def add_existing(key, values, ttl):
+        if key in store:
+            store[key].update(values)
+
+    async def add_guarded(key, values, guard_key, guard, ttl):
+        if guard not in store.get(guard_key, set()):
+            return False
+        store[guard_key].discard(guard)
+        if not store[guard_key]:
+            del store[guard_key]  # Redis drops empty sets
+        store.setdefault(key, set()).update(values)
+        return True
+
+    async def remove(key, values, guard_key, ttl):
+        if guard_key in store:
+            store.pop(key, None)
+            store.pop(guard_key)
+        else:
+            store.get(key, set()).difference_update(values)
+
+    with patch.object(push_targets, "cache_set_members", members), \
+         patch.object(push_targets, "cache_set_add", add), \
+         patch.object(push_targets, "cache_set_add_existing", add_existing), \
+         patch.object(push_targets, "cache_set_add_guarded", add_guarded), \
+         patch.object(push_targets, "cache_set_remove", remove):
+        yield store
+
+
+class TestPushPlatform:
+    """Device.push_platform follows push_token."""
+
+    def test_platform_set_from_token(self):
+        device = Device(device_id=str(uuid.uuid4()), push_token=APNS_TOKEN)
+        assert device.push_platform == PushPlatform.APNS.value
+
+        device.push_token = FCM_TOKEN
+        assert device.push_platform == PushPlatform.FCM.value
+
+        device.push_token = None
+        assert device.push_platform is None
+
+    @pytest.mark.asyncio
+    async def test_platform_set_on_update(
+        self, client: AsyncClient, db_session: AsyncSession,
+        auth_headers: dict, verified_device: Device,
+    ):
+        response = await client.patch(
+            "/api/v1/auth/me", headers=auth_headers, json={"push_token": APNS_TOKEN},
+        )
+        assert response.status_code == 200
+
+        await db_session.refresh(verified_device)
+        assert verified_device.push_platform == PushPlatform.APNS.value
+
+
+class TestLotPushTargets:
+    """Tests for get_lot_push_targets and its check-in/out deltas."""
+
+    def test_member_round_trip(self):
+        target = PushTarget(7, "fcm", FCM_TOKEN)
+        assert PushTarget.from_member(target.to_member()) == target
+
+        no_push = PushTarget(8, None, None)
+        assert PushTarget.from_member(no_push.to_member()) == no_push
+
+    @pytest.mark.asyncio
+    async def test_db_fallback_without_redis(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        targets = await get_lot_push_targets(db_session, test_parking_lot.id)
+        assert targets == [PushTarget(verified_device.id, None, None)]
+
+    @pytest.mark.asyncio
+    async def test_complete_set_served_without_db(
+        self, db_session: AsyncSession, fake_sets, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        await get_lot_push_targets(db_session, test_parking_lot.id)  # rebuild from DB
+
+        other = Device(device_id=str(uuid.uuid4()), push_token=FCM_TOKEN, is_push_enabled=True)
+        db_session.add(other)
+        await db_session.commit()
+        await add_push_target(test_parking_lot.id, other)
+        await remove_push_target(test_parking_lot.id, verified_device)
+
+        # db=None: the complete set answers on its own
+        targets = await get_lot_push_targets(None, test_parking_lot.id)
+        assert targets == [PushTarget(other.id, "fcm", FCM_TOKEN)]
+
+    @pytest.mark.asyncio
+    async def test_delta_on_missing_key_dropped(
+        self, db_session: AsyncSession, fake_sets, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        """A check-in after the set expired leaves no partial set behind; the next read rebuilds."""
+        other = Device(device_id=str(uuid.uuid4()))
+        db_session.add(other)
+        await db_session.commit()
+        await add_push_target(test_parking_lot.id, other)
+        assert fake_sets == {}
+
+        targets = await get_lot_push_targets(db_session, test_parking_lot.id)
+        assert [t.device_id for t in targets] == [verified_device.id]
+
+    @pytest.mark.asyncio
+    async def test_checkin_during_rebuild_kept(
+        self, db_session: AsyncSession, fake_sets, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        """A check-in landing between the rebuild's DB read and its write isn't lost."""
+        other = Device(device_id=str(uuid.uuid4()))
+        db_session.add(other)
+        await db_session.commit()
+        execute = db_session.execute
+
+        async def read_then_check_in(*args, **kwargs):
+            result = await execute(*args, **kwargs)
+            await add_push_target(test_parking_lot.id, other)
+            return result
+
+        with patch.object(db_session, "execute", read_then_check_in):
+            await get_lot_push_targets(db_session, test_parking_lot.id)
+
+        targets = await get_lot_push_targets(None, test_parking_lot.id)
+        assert {t.device_id for t in targets} == {verified_device.id, other.id}
+
+    @pytest.mark.asyncio
+    async def test_checkout_during_rebuild_not_cached(
+        self, db_session: AsyncSession, fake_sets, active_session: ParkingSession,
+        verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        """A check-out landing between the rebuild's DB read and its write leaves no phantom target."""
+        execute = db_session.execute
+
+        async def read_then_check_out(*args, **kwargs):
+            result = await execute(*args, **kwargs)
+            active_session.checked_out_at = datetime.now(timezone.utc)
+            await db_session.commit()
+            await remove_push_target(test_parking_lot.id, verified_device)
+            return result
+
+        with patch.object(db_session, "execute", read_then_check_out):
+            # This read started before the check-out, so it still sees the device
+            await get_lot_push_targets(db_session, test_parking_lot.id)
+
+        assert fake_sets == {}  # Nothing cached, the next read rebuilds
+        assert await get_lot_push_targets(db_session, test_parking_lot.id) == []
+        assert COMPLETE in fake_sets[f"lot_push_targets:{test_parking_lot.id}"]
+
+    @pytest.mark.asyncio
+    async def test_checkin_and_checkout_update_set(
+        self, client: AsyncClient, db_session: AsyncSession, fake_sets,
+        auth_headers: dict, verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        await get_lot_push_targets(db_session, test_parking_lot.id)  # empty but complete
+
+        await client.post(
+            "/api/v1/sessions/checkin", headers=auth_headers,
+            json={"parking_lot_id": test_parking_lot.id},
+        )
+        assert [t.device_id for t in await get_lot_push_targets(None, test_parking_lot.id)] == [
+            verified_device.id
+        ]
+
+        await client.post("/api/v1/sessions/checkout", headers=auth_headers)
+        assert await get_lot_push_targets(None, test_parking_lot.id) == []
@@ -0,0 +1,128 @@
+"""
+Query-plan checks for the active-session partial indexes.
+
+SQLite doesn't plan like PostgreSQL, so these run against a real Postgres
+given by TEST_POSTGRES_URL (e.g. postgresql+asyncpg://postgres@localhost/postgres)
+and are skipped without one. Tables are created in a throwaway schema, so
+the database's own tables are never touched.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.models.device import Device
+from app.models.parking_session import ParkingSession
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+
+SCHEMA = f"query_plans_{uuid.uuid4().hex[:8]}"
+
+# Closed sessions vastly outnumber active ones in production
+CLOSED_SESSIONS = 20000
+ACTIVE_SESSIONS = 20
+
+
+@pytest_asyncio.fixture
+async def pg_conn():
+    pytest.importorskip("asyncpg")
+    engine = create_async_engine(
+        POSTGRES_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    async with engine.connect() as conn:
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.commit()
+        try:
+            await conn.run_sync(Base.metadata.create_all)
+            await _populate(conn)
+            yield conn
+        finally:
+            await conn.rollback()
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            await conn.commit()
+    await engine.dispose()
+
+
+async def _populate(conn) -> None:
+    await conn.execute(text(
+        "INSERT INTO parking_lots (name, code, is_active) "
+        "SELECT 'Lot ' || n, 'L' || n, true FROM generate_series(1, 10) n"
+    ))
+    await conn.execute(text(
+        "INSERT INTO devices (device_id, email_verified, is_push_enabled, broadcast_read_cursor) "
+        "SELECT 'device-' || n, true, false, 0 FROM generate_series(1, 1000) n"
+    ))
+    await conn.execute(text(
+        "INSERT INTO parking_sessions (device_id, parking_lot_id, checked_in_at, checked_out_at, reminder_sent) "
+        "SELECT n % 1000 + 1, n % 10 + 1, now() - interval '2 days', now() - interval '1 day', n % 2 = 0 "
+        f"FROM generate_series(1, {CLOSED_SESSIONS}) n"
+    ))
+    await conn.execute(text(
+        "INSERT INTO parking_sessions (device_id, parking_lot_id, checked_in_at, reminder_sent) "
+        "SELECT n, n % 10 + 1, now() - interval '4 hours', false "
+        f"FROM generate_series(1, {ACTIVE_SESSIONS}) n"
+    ))
+    await conn.execute(text("ANALYZE"))
+
+
+async def _plan(conn, stmt) -> str:
+    sql = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    result = await conn.execute(text(f"EXPLAIN {sql}"))
+    return "\n".join(row[0] for row in result.all())
+
+
+@pytest.mark.asyncio
+async def test_active_session_by_device_uses_partial_index(pg_conn):
+    """check_in, check_out and get_current_session."""
+    plan = await _plan(pg_conn, select(ParkingSession).where(
+        ParkingSession.device_id == 7,
+        ParkingSession.checked_out_at.is_(None),
+    ))
+    assert "ix_parking_sessions_active_device" in plan
+
+
+@pytest.mark.asyncio
+async def test_active_parkers_by_lot_use_partial_index(pg_conn):
+    """get_parking_lot's active-parker count."""
+    plan = await _plan(pg_conn, select(func.count(ParkingSession.id)).where(
+        ParkingSession.parking_lot_id == 3,
+        ParkingSession.checked_out_at.is_(None),
+    ))
+    assert "ix_parking_sessions_active_lot" in plan
+
+
+@pytest.mark.asyncio
+async def test_push_targets_use_partial_index(pg_conn):
+    """get_lot_push_targets on a cache miss (notify_parked_users)."""
+    plan = await _plan(pg_conn, (
+        select(Device.id, Device.push_token, Device.push_platform, Device.is_push_enabled)
+        .join(ParkingSession, ParkingSession.device_id == Device.id)
+        .where(
+            ParkingSession.parking_lot_id == 3,
+            ParkingSession.checked_out_at.is_(None),
+        )
+    ))
+    assert "ix_parking_sessions_active_lot" in plan
+
+
+@pytest.mark.asyncio
+async def test_reminder_scan_uses_partial_index(pg_conn):
+    """process_pending_reminders."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=3)
+    plan = await _plan(pg_conn, select(ParkingSession).where(
+        ParkingSession.checked_out_at.is_(None),
+        ParkingSession.checked_in_at <= cutoff,
+        ParkingSession.reminder_sent == False,  # Reminder not yet sent
+    ))
+    assert "ix_parking_sessions_reminder_due" in plan
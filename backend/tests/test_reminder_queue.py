@@ -0,0 +1,157 @@
+"""
+Tests for the Redis delayed-reminder queue (Redis itself is mocked).
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.device import Device
+from app.models.parking_lot import ParkingLot
+from app.models.parking_session import ParkingSession
+from app.services.notification import NotificationService
+from app.services.reminder_queue import (
+    QUEUE_KEY,
+    RETRY_DELAY_SECONDS,
+    enqueue_pending_reminders,
+    process_due_reminders,
+    reminder_due_at,
+)
+
+
+async def _session(db: AsyncSession, device: Device, lot: ParkingLot, hours_ago: float, **kwargs) -> ParkingSession:
+    session = ParkingSession(
+        device_id=device.id,
+        parking_lot_id=lot.id,
+        checked_in_at=datetime.now(timezone.utc) - timedelta(hours=hours_ago),
+        **kwargs,
+    )
+    db.add(session)
+    await db.commit()
+    return session
+
+
+class TestQueueOnCheckInOut:
+    """Check-in schedules the reminder; check-out cancels it."""
+
+    @pytest.mark.asyncio
+    async def test_check_in_schedules_and_check_out_cancels(
+        self, client: AsyncClient, auth_headers: dict, test_parking_lot: ParkingLot,
+    ):
+        with patch("app.services.reminder_queue.cache_zadd", new_callable=AsyncMock) as mock_zadd, \
+             patch("app.services.reminder_queue.cache_zrem", new_callable=AsyncMock) as mock_zrem:
+            checkin = await client.post(
+                "/api/v1/sessions/checkin",
+                headers=auth_headers,
+                json={"parking_lot_id": test_parking_lot.id},
+            )
+            await client.post("/api/v1/sessions/checkout", headers=auth_headers)
+
+        session_id = str(checkin.json()["id"])
+        key, scores = mock_zadd.call_args.args
+        assert key == QUEUE_KEY
+        due_in = scores[session_id] - datetime.now(timezone.utc).timestamp()
+        assert settings.parking_reminder_hours * 3600 - 60 < due_in <= settings.parking_reminder_hours * 3600
+        mock_zrem.assert_called_once_with(QUEUE_KEY, [session_id])
+
+
+class TestProcessDueReminders:
+    """Tests for popping and sending due reminders."""
+
+    @pytest.mark.asyncio
+    async def test_sends_popped_active_sessions_once(
+        self, db_session: AsyncSession, verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        other = Device(device_id="checked-out", email_verified=True)
+        db_session.add(other)
+        await db_session.flush()
+        due = await _session(db_session, verified_device, test_parking_lot, hours_ago=4)
+        left = await _session(
+            db_session, other, test_parking_lot, hours_ago=4,
+            checked_out_at=datetime.now(timezone.utc) - timedelta(hours=1),
+        )
+        popped = [str(due.id), str(left.id)]
+
+        with patch("app.services.reminder_queue.cache_zpop_due", new_callable=AsyncMock, return_value=popped), \
+             patch.object(NotificationService, "send_push_messages", new_callable=AsyncMock, return_value={}):
+            assert await process_due_reminders(db_session) == 1
+            # Popped again (e.g. re-seeded by the backstop scan): already reminded
+            assert await process_due_reminders(db_session) == 0
+
+        await db_session.refresh(due)
+        assert due.reminder_sent is True
+
+    @pytest.mark.asyncio
+    async def test_nothing_due_skips_database(self, db_session: AsyncSession):
+        with patch("app.services.reminder_queue.cache_zpop_due", new_callable=AsyncMock, return_value=[]), \
+             patch.object(db_session, "execute", new_callable=AsyncMock) as mock_execute:
+            assert await process_due_reminders(db_session) == 0
+
+        mock_execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_requeued(
+        self, db_session: AsyncSession, active_session: ParkingSession,
+    ):
+        now = datetime.now(timezone.utc)
+        session_id = str(active_session.id)
+        with patch(
+            "app.services.reminder_queue.cache_zpop_due", new_callable=AsyncMock,
+            return_value=[session_id],
+        ), patch.object(
+            NotificationService, "send_checkout_reminders", new_callable=AsyncMock,
+            side_effect=RuntimeError("db blip"),
+        ), patch("app.services.reminder_queue.cache_zadd", new_callable=AsyncMock) as mock_zadd:
+            assert await process_due_reminders(db_session, now) == 0
+
+        retry_at = (now + timedelta(seconds=RETRY_DELAY_SECONDS)).timestamp()
+        mock_zadd.assert_called_once_with(QUEUE_KEY, {session_id: retry_at})
+
+    @pytest.mark.asyncio
+    async def test_failed_query_requeued(self, db_session: AsyncSession):
+        now = datetime.now(timezone.utc)
+        with patch(
+            "app.services.reminder_queue.cache_zpop_due", new_callable=AsyncMock,
+            return_value=["7", "8"],
+        ), patch.object(
+            db_session, "execute", new_callable=AsyncMock, side_effect=RuntimeError("db down"),
+        ), patch("app.services.reminder_queue.cache_zadd", new_callable=AsyncMock) as mock_zadd:
+            assert await process_due_reminders(db_session, now) == 0
+
+        retry_at = (now + timedelta(seconds=RETRY_DELAY_SECONDS)).timestamp()
+        mock_zadd.assert_called_once_with(QUEUE_KEY, {"7": retry_at, "8": retry_at})
+
+
+class TestEnqueuePendingReminders:
+    """Seeding the queue from the database."""
+
+    @pytest.mark.asyncio
+    async def test_seeds_unreminded_active_sessions(
+        self, db_session: AsyncSession, verified_device: Device, test_parking_lot: ParkingLot,
+    ):
+        other = Device(device_id="reminded", email_verified=True)
+        db_session.add(other)
+        await db_session.flush()
+        pending = await _session(db_session, verified_device, test_parking_lot, hours_ago=1)
+        await _session(db_session, other, test_parking_lot, hours_ago=5, reminder_sent=True)
+
+        with patch("app.services.reminder_queue.cache_available", return_value=True), \
+             patch("app.services.reminder_queue.cache_zadd", new_callable=AsyncMock) as mock_zadd:
+            assert await enqueue_pending_reminders(db_session) == 1
+
+        mock_zadd.assert_called_once_with(
+            QUEUE_KEY,
+            {str(pending.id): reminder_due_at(pending.checked_in_at).timestamp()},
+            nx=True,
+        )
+
+    @pytest.mark.asyncio
+    async def test_no_redis_no_query(self, db_session: AsyncSession):
+        with patch.object(db_session, "execute", new_callable=AsyncMock) as mock_execute:
+            assert await enqueue_pending_reminders(db_session) == 0
+
+        mock_execute.assert_not_called()
@@ -5,7 +5,7 @@ ReminderService.process_pending_reminders finds sessions where:
   - checked_out_at IS NULL (still active)
   - checked_in_at <= now - 3 hours
   - reminder_sent = False
-and sends a checkout reminder for each.
+and sends their checkout reminders in one batch.
 """
 
 import uuid
@@ -15,9 +15,11 @@ from unittest.mock import AsyncMock, patch
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.device import Device
 from app.models.parking_lot import ParkingLot
 from app.models.parking_session import ParkingSession
+from app.services.metrics import metrics_snapshot, reset_metrics
 from app.services.notification import NotificationService
 from app.services.reminder import ReminderService, run_reminder_job
 
@@ -49,6 +51,10 @@ async def _create_session(
     return session
 
 
+def _send_all(db: AsyncSession, sessions: list) -> int:
+    return len(sessions)
+
+
 # ---------------------------------------------------------------------------
 # process_pending_reminders
 # ---------------------------------------------------------------------------
@@ -62,8 +68,8 @@ class TestProcessPendingReminders:
     ):
         """No sessions at all → returns 0."""
         with patch.object(
-            NotificationService, "send_checkout_reminder",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_checkout_reminders",
+            new_callable=AsyncMock, side_effect=_send_all,
         ) as mock_remind:
             count = await ReminderService.process_pending_reminders(db_session)
 
@@ -78,8 +84,8 @@ class TestProcessPendingReminders:
         await _create_session(db_session, verified_device, test_parking_lot, hours_ago=2.0)
 
         with patch.object(
-            NotificationService, "send_checkout_reminder",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_checkout_reminders",
+            new_callable=AsyncMock, side_effect=_send_all,
         ) as mock_remind:
             count = await ReminderService.process_pending_reminders(db_session)
 
@@ -96,18 +102,18 @@ class TestProcessPendingReminders:
         )
 
         with patch.object(
-            NotificationService, "send_checkout_reminder",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_checkout_reminders",
+            new_callable=AsyncMock, side_effect=_send_all,
         ) as mock_remind:
             count = await ReminderService.process_pending_reminders(db_session)
 
             assert count == 1
             mock_remind.assert_called_once()
-            # Verify correct session and device were passed
-            call_kwargs = mock_remind.call_args.kwargs
-            assert call_kwargs["session"].id == session.id
-            assert call_kwargs["device"].id == verified_device.id
-            assert call_kwargs["parking_lot_name"] == test_parking_lot.name
+            # Verify the session was passed with its device and lot loaded
+            sessions = mock_remind.call_args.args[1]
+            assert [s.id for s in sessions] == [session.id]
+            assert sessions[0].device.id == verified_device.id
+            assert sessions[0].parking_lot.name == test_parking_lot.name
 
     @pytest.mark.asyncio
     async def test_session_already_reminded(
@@ -120,8 +126,8 @@ class TestProcessPendingReminders:
         )
 
         with patch.object(
-            NotificationService, "send_checkout_reminder",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_checkout_reminders",
+            new_callable=AsyncMock, side_effect=_send_all,
         ) as mock_remind:
             count = await ReminderService.process_pending_reminders(db_session)
 
@@ -139,8 +145,8 @@ class TestProcessPendingReminders:
         )
 
         with patch.object(
-            NotificationService, "send_checkout_reminder",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_checkout_reminders",
+            new_callable=AsyncMock, side_effect=_send_all,
         ) as mock_remind:
             count = await ReminderService.process_pending_reminders(db_session)
 
@@ -166,13 +172,13 @@ class TestProcessPendingReminders:
             await _create_session(db_session, device, test_parking_lot, hours_ago=4.0)
 
         with patch.object(
-            NotificationService, "send_checkout_reminder",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_checkout_reminders",
+            new_callable=AsyncMock, side_effect=_send_all,
         ) as mock_remind:
             count = await ReminderService.process_pending_reminders(db_session)
 
             assert count == 3
-            assert mock_remind.call_count == 3
+            assert len(mock_remind.call_args.args[1]) == 3
 
     @pytest.mark.asyncio
     async def test_mixed_sessions(
@@ -201,25 +207,25 @@ class TestProcessPendingReminders:
         )
 
         with patch.object(
-            NotificationService, "send_checkout_reminder",
-            new_callable=AsyncMock, return_value=True,
+            NotificationService, "send_checkout_reminders",
+            new_callable=AsyncMock, side_effect=_send_all,
         ) as mock_remind:
             count = await ReminderService.process_pending_reminders(db_session)
 
             assert count == 1
-            assert mock_remind.call_count == 1
+            assert len(mock_remind.call_args.args[1]) == 1
 
     @pytest.mark.asyncio
     async def test_handles_send_failure_gracefully(
         self, db_session: AsyncSession, verified_device: Device, test_parking_lot: ParkingLot
     ):
-        """If send_checkout_reminder raises, it's caught and doesn't crash."""
+        """If send_checkout_reminders raises, it's caught and doesn't crash."""
         await _create_session(
             db_session, verified_device, test_parking_lot, hours_ago=4.0
         )
 
         with patch.object(
-            NotificationService, "send_checkout_reminder",
+            NotificationService, "send_checkout_reminders",
             new_callable=AsyncMock, side_effect=Exception("DB error"),
         ):
             # Should not raise
@@ -229,6 +235,72 @@ class TestProcessPendingReminders:
             assert count == 0
 
 
+# ---------------------------------------------------------------------------
+# auto_checkout_expired_sessions
+# ---------------------------------------------------------------------------
+
+class TestAutoCheckout:
+    """Tests for the nightly auto-checkout."""
+
+    async def _park(self, db: AsyncSession, lot: ParkingLot, count: int) -> list:
+        sessions = []
+        for _ in range(count):
+            device = Device(device_id=str(uuid.uuid4()), email_verified=True)
+            db.add(device)
+            await db.flush()
+            sessions.append(await _create_session(db, device, lot, hours_ago=1.0))
+        return sessions
+
+    @pytest.mark.asyncio
+    async def test_closes_active_sessions_in_batches(
+        self, db_session: AsyncSession, verified_device: Device, test_parking_lot: ParkingLot
+    ):
+        closed_earlier = await _create_session(
+            db_session, verified_device, test_parking_lot, hours_ago=2.0, checked_out=True,
+        )
+        earlier_checkout = closed_earlier.checked_out_at
+        sessions = await self._park(db_session, test_parking_lot, 5)
+        reset_metrics()
+
+        with patch.object(settings, "auto_checkout_batch_size", 2):
+            assert await ReminderService.auto_checkout_expired_sessions(db_session) == 5
+
+        for session in sessions:
+            await db_session.refresh(session)
+            assert session.checked_out_at is not None
+        await db_session.refresh(closed_earlier)
+        assert closed_earlier.checked_out_at == earlier_checkout
+
+        snapshot = metrics_snapshot()
+        assert snapshot["counters"]["auto_checkout.sessions_closed"] == 5
+        assert snapshot["latency"]["auto_checkout.batch"]["count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidates_only_touched_lots(
+        self, db_session: AsyncSession, test_parking_lot: ParkingLot
+    ):
+        empty_lot = ParkingLot(name="Empty Lot", code="EMPTY", is_active=True)
+        db_session.add(empty_lot)
+        await db_session.commit()
+        sessions = await self._park(db_session, test_parking_lot, 2)
+
+        with patch("app.services.reminder.cache_delete", new_callable=AsyncMock) as mock_delete, \
+             patch("app.services.reminder.invalidate_push_targets", new_callable=AsyncMock) as mock_targets, \
+             patch("app.services.reminder.cancel_reminder", new_callable=AsyncMock) as mock_cancel:
+            await ReminderService.auto_checkout_expired_sessions(db_session)
+
+        mock_delete.assert_called_once_with(f"lot_stats:{test_parking_lot.id}")
+        mock_targets.assert_called_once_with(test_parking_lot.id)
+        assert sorted(mock_cancel.call_args.args) == sorted(s.id for s in sessions)
+
+    @pytest.mark.asyncio
+    async def test_nothing_active(self, db_session: AsyncSession):
+        with patch("app.services.reminder.invalidate_push_targets", new_callable=AsyncMock) as mock_targets:
+            assert await ReminderService.auto_checkout_expired_sessions(db_session) == 0
+
+        mock_targets.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # run_reminder_job
 # ---------------------------------------------------------------------------
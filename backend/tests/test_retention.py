@@ -0,0 +1,173 @@
+"""
+Tests for the sighting rollup and notification retention jobs.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.broadcast_notification import BroadcastNotification, BroadcastRead
+from app.models.device import Device
+from app.models.notification import Notification, NotificationType
+from app.models.notification_job import NotificationJob, NotificationJobStatus, NotificationJobType
+from app.models.parking_lot import ParkingLot
+from app.models.sighting_rollup import SightingHourlyRollup
+from app.models.taps_sighting import TapsSighting
+from app.models.vote import Vote, VoteType
+from app.services.metrics import metrics_snapshot, reset_metrics
+from app.services.retention import RetentionService
+
+
+class TestSightingRetention:
+    """Tests for RetentionService.archive_old_sightings."""
+
+    @pytest.mark.asyncio
+    async def test_old_sightings_rolled_up_and_deleted(
+        self,
+        db_session: AsyncSession,
+        verified_device: Device,
+        test_parking_lot: ParkingLot,
+    ):
+        old_hour = (
+            datetime.now(timezone.utc) - timedelta(days=settings.sighting_retention_days + 1)
+        ).replace(minute=0, second=0, microsecond=0)
+
+        old_a = TapsSighting(parking_lot_id=test_parking_lot.id, reported_at=old_hour + timedelta(minutes=5))
+        old_b = TapsSighting(parking_lot_id=test_parking_lot.id, reported_at=old_hour + timedelta(minutes=40))
+        recent = TapsSighting(parking_lot_id=test_parking_lot.id)
+        db_session.add_all([old_a, old_b, recent])
+        await db_session.flush()
+        db_session.add(Vote(device_id=verified_device.id, sighting_id=old_a.id, vote_type=VoteType.UPVOTE))
+        db_session.add(Vote(device_id=verified_device.id, sighting_id=old_b.id, vote_type=VoteType.DOWNVOTE))
+        db_session.add(Vote(device_id=verified_device.id, sighting_id=recent.id, vote_type=VoteType.UPVOTE))
+        await db_session.commit()
+
+        # Batch size 1 forces the hour to be accumulated across batches
+        with patch.object(settings, "retention_batch_size", 1):
+            assert await RetentionService.archive_old_sightings(db_session) == 2
+
+        rollup = (await db_session.execute(select(SightingHourlyRollup))).scalar_one()
+        assert rollup.parking_lot_id == test_parking_lot.id
+        assert (rollup.sighting_count, rollup.upvote_count, rollup.downvote_count) == (2, 1, 1)
+
+        remaining = (await db_session.execute(select(TapsSighting.id))).scalars().all()
+        assert remaining == [recent.id]
+        votes = (await db_session.execute(select(Vote.sighting_id))).scalars().all()
+        assert votes == [recent.id]
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_archive(
+        self, db_session: AsyncSession, test_parking_lot: ParkingLot
+    ):
+        db_session.add(TapsSighting(parking_lot_id=test_parking_lot.id))
+        await db_session.commit()
+
+        assert await RetentionService.archive_old_sightings(db_session) == 0
+        result = await db_session.execute(select(SightingHourlyRollup))
+        assert result.scalars().all() == []
+
+
+class TestNotificationRetention:
+    """Tests for RetentionService.prune_old_notifications."""
+
+    @pytest.mark.asyncio
+    async def test_old_read_notifications_deleted(
+        self,
+        db_session: AsyncSession,
+        verified_device: Device,
+    ):
+        now = datetime.now(timezone.utc)
+        old = now - timedelta(days=settings.notification_retention_days + 1)
+
+        def notification(created_at, read_at):
+            return Notification(
+                device_id=verified_device.id,
+                notification_type=NotificationType.CHECKOUT_REMINDER,
+                title="Still parked?",
+                message="Check out when you leave",
+                created_at=created_at,
+                read_at=read_at,
+            )
+
+        old_read_a = notification(old, old)
+        old_read_b = notification(old, old)
+        old_unread = notification(old, None)
+        recent_read = notification(now, now)
+        db_session.add_all([old_read_a, old_read_b, old_unread, recent_read])
+        verified_device.notification_count = 4
+        verified_device.unread_notification_count = 1
+        await db_session.commit()
+        reset_metrics()
+
+        with patch.object(settings, "retention_batch_size", 1):
+            assert await RetentionService.prune_old_notifications(db_session) == 2
+
+        remaining = (await db_session.execute(select(Notification.id).order_by(Notification.id))).scalars().all()
+        assert remaining == [old_unread.id, recent_read.id]
+        await db_session.refresh(verified_device)
+        assert (verified_device.unread_notification_count, verified_device.notification_count) == (1, 2)
+        assert metrics_snapshot()["counters"]["retention.notifications_deleted"] == 2
+
+    @pytest.mark.asyncio
+    async def test_old_broadcasts_deleted_with_receipts(
+        self,
+        db_session: AsyncSession,
+        verified_device: Device,
+        test_parking_lot: ParkingLot,
+    ):
+        now = datetime.now(timezone.utc)
+        old = BroadcastNotification(
+            notification_type=NotificationType.TAPS_SPOTTED,
+            title="TAPS spotted",
+            message="Move your car",
+            parking_lot_id=test_parking_lot.id,
+            created_at=now - timedelta(days=settings.notification_retention_days + 1),
+        )
+        recent = BroadcastNotification(
+            notification_type=NotificationType.TAPS_SPOTTED,
+            title="TAPS spotted",
+            message="Move your car",
+            parking_lot_id=test_parking_lot.id,
+            created_at=now,
+        )
+        db_session.add_all([old, recent])
+        await db_session.flush()
+        db_session.add(BroadcastRead(device_id=verified_device.id, broadcast_id=old.id))
+        await db_session.commit()
+
+        assert await RetentionService.prune_old_notifications(db_session) == 1
+
+        remaining = (await db_session.execute(select(BroadcastNotification.id))).scalars().all()
+        assert remaining == [recent.id]
+        assert (await db_session.execute(select(BroadcastRead))).scalars().all() == []
+
+    @pytest.mark.asyncio
+    async def test_finished_outbox_jobs_deleted(self, db_session: AsyncSession):
+        now = datetime.now(timezone.utc)
+        old = now - timedelta(days=settings.notification_retention_days + 1)
+
+        def job(status, completed_at):
+            return NotificationJob(
+                job_type=NotificationJobType.LOT_ALERT,
+                payload={},
+                status=status,
+                completed_at=completed_at,
+            )
+
+        old_done = job(NotificationJobStatus.DONE, old)
+        old_failed = job(NotificationJobStatus.FAILED, old)
+        pending = job(NotificationJobStatus.PENDING, None)
+        recent_done = job(NotificationJobStatus.DONE, now)
+        db_session.add_all([old_done, old_failed, pending, recent_done])
+        await db_session.commit()
+        reset_metrics()
+
+        assert await RetentionService.prune_old_notifications(db_session) == 2
+
+        remaining = (await db_session.execute(select(NotificationJob.id).order_by(NotificationJob.id))).scalars().all()
+        assert remaining == [pending.id, recent_done.id]
+        assert metrics_snapshot()["counters"]["retention.jobs_deleted"] == 2
@@ -0,0 +1,175 @@
+"""
+Tests for the scheduled-job leader lease.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.scheduler_lease import SchedulerLease
+from app.services.scheduler_lease import (
+    acquire_lease,
+    release_lease,
+    renew_lease,
+    run_exclusive,
+    unfinished_jobs,
+)
+
+INTERVAL = timedelta(minutes=4)
+
+
+async def _age_lease(db: AsyncSession, job_id: str, started_ago: timedelta, locked_until=None) -> None:
+    await db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.job_id == job_id)
+        .values(started_at=datetime.now(timezone.utc) - started_ago, locked_until=locked_until)
+    )
+    await db.commit()
+
+
+class TestLease:
+    """Tests for acquiring, renewing and releasing a job lease."""
+
+    @pytest.mark.asyncio
+    async def test_one_holder_per_tick(self, db_session: AsyncSession):
+        token = await acquire_lease(db_session, "job", INTERVAL)
+        assert token == 1
+        assert await acquire_lease(db_session, "job", INTERVAL) is None
+
+        # Finished runs still block the rest of the tick
+        await release_lease(db_session, "job", token)
+        assert await acquire_lease(db_session, "job", INTERVAL) is None
+
+    @pytest.mark.asyncio
+    async def test_next_tick_gets_new_token(self, db_session: AsyncSession):
+        token = await acquire_lease(db_session, "job", INTERVAL)
+        await release_lease(db_session, "job", token)
+        await _age_lease(db_session, "job", INTERVAL)
+
+        assert await acquire_lease(db_session, "job", INTERVAL) == token + 1
+
+    @pytest.mark.asyncio
+    async def test_live_lease_blocks_next_tick(self, db_session: AsyncSession):
+        """A run still in progress isn't overlapped by the next tick."""
+        await acquire_lease(db_session, "job", INTERVAL)
+        await _age_lease(
+            db_session, "job", INTERVAL,
+            locked_until=datetime.now(timezone.utc) + timedelta(seconds=30),
+        )
+
+        assert await acquire_lease(db_session, "job", INTERVAL) is None
+
+    @pytest.mark.asyncio
+    async def test_crashed_holder_taken_over(self, db_session: AsyncSession):
+        """An expired lease that was never released is acquired by the next tick."""
+        token = await acquire_lease(db_session, "job", INTERVAL)
+        await _age_lease(
+            db_session, "job", INTERVAL,
+            locked_until=datetime.now(timezone.utc) - timedelta(seconds=1),
+        )
+
+        new_token = await acquire_lease(db_session, "job", INTERVAL)
+        assert new_token == token + 1
+
+        # The old holder is fenced off
+        assert await renew_lease(db_session, "job", token) is False
+        await release_lease(db_session, "job", token)
+        lease = (await db_session.execute(select(SchedulerLease))).scalar_one()
+        await db_session.refresh(lease)
+        assert lease.locked_until is not None
+        assert await renew_lease(db_session, "job", new_token) is True
+
+    @pytest.mark.asyncio
+    async def test_jobs_leased_independently(self, db_session: AsyncSession):
+        assert await acquire_lease(db_session, "a", INTERVAL) == 1
+        assert await acquire_lease(db_session, "b", INTERVAL) == 1
+
+
+class TestResume:
+    """Taking over a run whose holder died before completing it."""
+
+    RESUME_WINDOW = timedelta(hours=2)
+
+    @pytest.mark.asyncio
+    async def test_dead_holder_run_resumed_once(self, db_session: AsyncSession):
+        token = await acquire_lease(db_session, "job", INTERVAL)
+        await _age_lease(
+            db_session, "job", timedelta(minutes=10),
+            locked_until=datetime.now(timezone.utc) - timedelta(seconds=1),
+        )
+        assert await unfinished_jobs(db_session, ["job", "other"], self.RESUME_WINDOW) == ["job"]
+
+        resumed = await acquire_lease(db_session, "job", INTERVAL, resume_within=self.RESUME_WINDOW)
+        assert resumed == token + 1
+        await release_lease(db_session, "job", resumed)
+
+        assert await unfinished_jobs(db_session, ["job"], self.RESUME_WINDOW) == []
+        assert await acquire_lease(db_session, "job", INTERVAL, resume_within=self.RESUME_WINDOW) is None
+
+    @pytest.mark.asyncio
+    async def test_live_or_old_runs_not_resumed(self, db_session: AsyncSession):
+        await acquire_lease(db_session, "live", INTERVAL)
+        await acquire_lease(db_session, "old", INTERVAL)
+        await _age_lease(db_session, "old", timedelta(hours=3))
+
+        assert await unfinished_jobs(db_session, ["live", "old"], self.RESUME_WINDOW) == []
+        assert await acquire_lease(db_session, "live", INTERVAL, resume_within=self.RESUME_WINDOW) is None
+
+    @pytest.mark.asyncio
+    async def test_failed_run_counts_as_completed(self, session_factory):
+        job = AsyncMock(side_effect=RuntimeError("boom"))
+        await run_exclusive(session_factory, "job", job, INTERVAL)
+
+        async with session_factory() as db:
+            assert await unfinished_jobs(db, ["job"], self.RESUME_WINDOW) == []
+
+
+class TestRunExclusive:
+    """Tests for running a scheduled job under the lease."""
+
+    @pytest.mark.asyncio
+    async def test_runs_once_per_tick(self, session_factory):
+        job = AsyncMock()
+
+        assert await run_exclusive(session_factory, "job", job, INTERVAL) is True
+        assert await run_exclusive(session_factory, "job", job, INTERVAL) is False
+        job.assert_called_once()
+
+        async with session_factory() as db:
+            lease = (await db.execute(select(SchedulerLease))).scalar_one()
+        assert lease.locked_until is None
+
+    @pytest.mark.asyncio
+    async def test_job_error_releases_lease(self, session_factory):
+        job = AsyncMock(side_effect=RuntimeError("boom"))
+
+        assert await run_exclusive(session_factory, "job", job, INTERVAL) is True
+
+        async with session_factory() as db:
+            lease = (await db.execute(select(SchedulerLease))).scalar_one()
+        assert lease.locked_until is None
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_cancels_job(self, session_factory):
+        cancelled = asyncio.Event()
+
+        async def job(db):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with patch.object(settings, "scheduler_lease_seconds", 0.3), \
+             patch("app.services.scheduler_lease.renew_lease", new_callable=AsyncMock, return_value=False):
+            assert await run_exclusive(session_factory, "job", job, INTERVAL) is True
+
+        assert cancelled.is_set()
+        async with session_factory() as db:
+            lease = (await db.execute(select(SchedulerLease))).scalar_one()
+        assert lease.completed_at is None
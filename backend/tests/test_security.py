@@ -110,7 +110,7 @@ class TestInputValidation:
         self, client: AsyncClient, db_session: AsyncSession,
         test_parking_lot: ParkingLot, auth_headers: dict,
     ):
-        with patch.object(NotificationService, "send_push_notification", new_callable=AsyncMock, return_value=True):
+        with patch.object(NotificationService, "send_push_notifications", new_callable=AsyncMock, return_value={}):
             r = await client.post(
                 f"{API}/sightings",
                 json={"parking_lot_id": test_parking_lot.id, "notes": "x" * 500},
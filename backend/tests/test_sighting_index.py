@@ -0,0 +1,214 @@
+"""
+Tests for the in-memory recent-sighting index.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.parking_lot import ParkingLot
+from app.models.taps_sighting import TapsSighting
+from app.services.sighting_index import (
+    IndexedSighting,
+    SightingIndex,
+    load_sighting_index,
+    publish_sighting,
+    resync_sighting_index,
+    sighting_index,
+)
+
+
+def _sighting(id: int, lot_id: int, minutes_ago: int, notes=None) -> IndexedSighting:
+    return IndexedSighting(
+        id, lot_id, datetime.now(timezone.utc) - timedelta(minutes=minutes_ago), notes
+    )
+
+
+@pytest_asyncio.fixture
+async def live_index():
+    """Mark the shared index live for the duration of a test."""
+    sighting_index.clear()
+    sighting_index.live = True
+    yield sighting_index
+    sighting_index.clear()
+
+
+class TestSightingIndex:
+    """Unit tests for SightingIndex lookups."""
+
+    def test_not_live_returns_none(self):
+        index = SightingIndex()
+        index.add(_sighting(1, 1, 5))
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        assert index.recent(since) is None
+        assert index.count(since, 1) is None
+
+    def test_recent_newest_first_across_lots(self):
+        index = SightingIndex()
+        index.live = True
+        index.add(_sighting(1, 1, 30))
+        index.add(_sighting(2, 2, 10))
+        index.add(_sighting(3, 1, 20))
+
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        assert [s.id for s in index.recent(since)] == [2, 3, 1]
+        assert [s.id for s in index.recent(since, [1])] == [3, 1]
+        assert index.count(since, 1) == 2
+        assert index.latest(since, lot_id=1).id == 3
+
+    def test_since_filters_older(self):
+        index = SightingIndex()
+        index.live = True
+        index.add(_sighting(1, 1, 90))
+        index.add(_sighting(2, 1, 5))
+
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        assert [s.id for s in index.recent(since, [1])] == [2]
+
+    def test_duplicate_ids_ignored(self):
+        index = SightingIndex()
+        index.live = True
+        assert index.add(_sighting(1, 1, 5)) is True
+        assert index.add(_sighting(1, 1, 5)) is False
+
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        assert index.count(since, 1) == 1
+
+    def test_outside_window_not_covered(self):
+        index = SightingIndex(window_hours=2)
+        index.live = True
+        assert index.covers(datetime.now(timezone.utc) - timedelta(hours=1))
+        assert not index.covers(datetime.now(timezone.utc) - timedelta(hours=3))
+        assert index.recent(datetime.now(timezone.utc) - timedelta(hours=3)) is None
+
+    def test_prune_drops_expired(self):
+        index = SightingIndex(window_hours=1)
+        index.live = True
+        index.add(_sighting(1, 1, 120))
+        index.add(_sighting(2, 1, 5))
+
+        since = datetime.now(timezone.utc) - timedelta(minutes=30)
+        assert [s.id for s in index.recent(since, [1])] == [2]
+        assert index.add(_sighting(1, 1, 120)) is True  # id forgotten once pruned
+
+    def test_payload_round_trip(self):
+        original = _sighting(7, 3, 1, notes="level 2")
+        copy = IndexedSighting.from_payload(original.to_payload())
+        assert (copy.id, copy.parking_lot_id, copy.reported_at, copy.notes) == (
+            7, 3, original.reported_at, "level 2"
+        )
+
+
+class TestSightingIndexReadPaths:
+    """Read paths answer from the index when it is live."""
+
+    @pytest.mark.asyncio
+    async def test_load_from_db(
+        self, db_session: AsyncSession, test_parking_lot: ParkingLot
+    ):
+        db_session.add(TapsSighting(parking_lot_id=test_parking_lot.id))
+        db_session.add(TapsSighting(
+            parking_lot_id=test_parking_lot.id,
+            reported_at=datetime.now(timezone.utc) - timedelta(days=2),
+        ))
+        await db_session.commit()
+
+        sighting_index.clear()
+        try:
+            await load_sighting_index(db_session)
+            since = datetime.now(timezone.utc) - timedelta(hours=1)
+            assert sighting_index.live
+            assert sighting_index.count(since, test_parking_lot.id) == 1
+        finally:
+            sighting_index.clear()
+
+    @pytest.mark.asyncio
+    async def test_resync_adds_missed_sightings(
+        self, db_session: AsyncSession, test_parking_lot: ParkingLot, live_index
+    ):
+        published = TapsSighting(parking_lot_id=test_parking_lot.id)
+        db_session.add(published)
+        await db_session.commit()
+        await publish_sighting(published)
+        assert await resync_sighting_index(db_session) == 0
+
+        # Committed, but the pub/sub message never arrived
+        db_session.add(TapsSighting(parking_lot_id=test_parking_lot.id))
+        await db_session.commit()
+
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        assert live_index.count(since, test_parking_lot.id) == 1
+        assert await resync_sighting_index(db_session) == 1
+        assert live_index.count(since, test_parking_lot.id) == 2
+
+    @pytest.mark.asyncio
+    async def test_feed_served_from_index(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        test_parking_lot: ParkingLot,
+        live_index: SightingIndex,
+    ):
+        # Only present in memory — proves the feed didn't query the table
+        live_index.add(_sighting(999, test_parking_lot.id, 5, notes="memory only"))
+
+        response = await client.get(f"/api/v1/feed/{test_parking_lot.id}", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_sightings"] == 1
+        assert data["sightings"][0]["id"] == 999
+        assert data["sightings"][0]["notes"] == "memory only"
+
+    @pytest.mark.asyncio
+    async def test_report_publishes_to_index(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        auth_headers: dict,
+        test_parking_lot: ParkingLot,
+        live_index: SightingIndex,
+    ):
+        response = await client.post(
+            "/api/v1/sightings",
+            headers=auth_headers,
+            json={"parking_lot_id": test_parking_lot.id},
+        )
+        assert response.status_code == 201
+
+        since = datetime.now(timezone.utc) - timedelta(minutes=5)
+        latest = live_index.latest(since, lot_id=test_parking_lot.id)
+        assert latest is not None
+        assert latest.id == response.json()["id"]
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_hit_from_index(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        auth_headers: dict,
+        test_parking_lot: ParkingLot,
+        live_index: SightingIndex,
+    ):
+        existing = TapsSighting(parking_lot_id=test_parking_lot.id)
+        db_session.add(existing)
+        await db_session.commit()
+        await db_session.refresh(existing)
+        await publish_sighting(existing)
+
+        response = await client.post(
+            "/api/v1/sightings",
+            headers=auth_headers,
+            json={"parking_lot_id": test_parking_lot.id},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["was_rate_limited"] is True
+        assert response.json()["id"] == existing.id
+
+        result = await db_session.execute(select(TapsSighting))
+        assert len(result.scalars().all()) == 1
@@ -2,14 +2,18 @@
 Tests for TAPS sighting endpoints.
 """
 
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from unittest.mock import patch
 from httpx import AsyncClient
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.parking_lot import ParkingLot
 from app.models.device import Device
 from app.models.parking_session import ParkingSession
+from app.models.taps_sighting import TapsSighting
 
 
 class TestSightingEndpoints:
@@ -197,6 +201,53 @@ class TestSightingEndpoints:
         for sighting in data:
             assert sighting["parking_lot_id"] == test_parking_lot.id
 
+    @pytest.mark.asyncio
+    async def test_list_sightings_cursor_pagination(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        auth_headers: dict,
+        test_parking_lot: ParkingLot
+    ):
+        """Pages follow X-Next-Cursor without gaps or repeats, including reported_at ties."""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for minutes_ago in (1, 2, 2, 3, 4):
+            db_session.add(TapsSighting(
+                parking_lot_id=test_parking_lot.id,
+                reported_at=now - timedelta(minutes=minutes_ago),
+            ))
+        await db_session.commit()
+
+        seen = []
+        cursor = None
+        for _ in range(5):
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/v1/sightings", headers=auth_headers, params=params)
+            assert response.status_code == 200
+            seen.extend(s["id"] for s in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    @pytest.mark.asyncio
+    async def test_list_sightings_bounds(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+    ):
+        """Out-of-range hours/limit are rejected, as is a malformed cursor."""
+        for params in ({"limit": 0}, {"limit": 1000}, {"hours": 0}, {"hours": 100000}):
+            response = await client.get("/api/v1/sightings", headers=auth_headers, params=params)
+            assert response.status_code == 422
+
+        response = await client.get("/api/v1/sightings", headers=auth_headers, params={"cursor": "nope"})
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     async def test_get_latest_sighting(
         self,
@@ -360,3 +411,20 @@ class TestSightingEndpoints:
 
         assert response.status_code == 201
         mock_notify.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_dedupe_bucket_unique_per_lot(
+        self,
+        db_session: AsyncSession,
+        test_parking_lot: ParkingLot,
+    ):
+        """Two sightings can't claim the same rate-limit bucket at a lot; unbucketed rows never conflict."""
+        db_session.add(TapsSighting(parking_lot_id=test_parking_lot.id))
+        db_session.add(TapsSighting(parking_lot_id=test_parking_lot.id))
+        db_session.add(TapsSighting(parking_lot_id=test_parking_lot.id, dedupe_bucket=1))
+        await db_session.commit()
+
+        db_session.add(TapsSighting(parking_lot_id=test_parking_lot.id, dedupe_bucket=1))
+        with pytest.raises(IntegrityError):
+            await db_session.commit()
+        await db_session.rollback()